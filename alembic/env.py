@@ -20,7 +20,9 @@ from app.models.database import User, Stocks
 config = context.config
 
 # Override sqlalchemy.url with DATABASE_URL from config
-config.set_main_option("sqlalchemy.url", DATABASE_URL)
+# (% is configparser's interpolation character; URL-encoded passwords and
+# socket paths contain it)
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -56,7 +58,8 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
-        render_as_batch=True,  # Enable batch mode for SQLite
+        # SQLite can't ALTER most things: autogenerate table-copying batches
+        render_as_batch=url.startswith("sqlite"),
     )
 
     with context.begin_transaction():
@@ -80,7 +83,9 @@ def run_migrations_online() -> None:
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
-            render_as_batch=True,  # Enable batch mode for SQLite
+            # Batches recreate tables on SQLite and are plain ALTERs elsewhere,
+            # so the same migrations run on both
+            render_as_batch=connection.dialect.name == "sqlite",
         )
 
         with context.begin_transaction():
@@ -0,0 +1,48 @@
+"""add stock price table
+
+Revision ID: 3c1f0e8a9b21
+Revises: 60a7f7130b64
+Create Date: 2026-10-18 09:12:41.118204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c1f0e8a9b21"
+down_revision: Union[str, Sequence[str], None] = "60a7f7130b64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "stock_price",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("stock_id", sa.Uuid(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("recorded_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["stock_id"], ["stocks.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("stock_price", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_stock_price_stock_id"), ["stock_id"], unique=False
+        )
+        batch_op.create_index(
+            batch_op.f("ix_stock_price_recorded_at"), ["recorded_at"], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("stock_price", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_stock_price_recorded_at"))
+        batch_op.drop_index(batch_op.f("ix_stock_price_stock_id"))
+
+    op.drop_table("stock_price")
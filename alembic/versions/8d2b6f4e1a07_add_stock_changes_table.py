@@ -0,0 +1,44 @@
+"""add stock changes table
+
+Revision ID: 8d2b6f4e1a07
+Revises: 3c1f0e8a9b21
+Create Date: 2026-10-18 11:40:05.537912
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d2b6f4e1a07"
+down_revision: Union[str, Sequence[str], None] = "3c1f0e8a9b21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "stock_changes",
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("ticker", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("seq"),
+        sqlite_autoincrement=True,
+    )
+    with op.batch_alter_table("stock_changes", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_stock_changes_changed_at"), ["changed_at"], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("stock_changes", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_stock_changes_changed_at"))
+
+    op.drop_table("stock_changes")
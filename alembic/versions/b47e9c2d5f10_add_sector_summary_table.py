@@ -0,0 +1,47 @@
+"""add sector summary table
+
+Revision ID: b47e9c2d5f10
+Revises: 8d2b6f4e1a07
+Create Date: 2026-10-18 13:05:52.904416
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b47e9c2d5f10"
+down_revision: Union[str, Sequence[str], None] = "8d2b6f4e1a07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "sector_summary",
+        sa.Column("sector", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("stock_count", sa.Integer(), nullable=False),
+        sa.Column("priced_count", sa.Integer(), nullable=False),
+        sa.Column("price_sum", sa.Float(), nullable=False),
+        sa.Column("price_min", sa.Float(), nullable=True),
+        sa.Column("price_max", sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint("sector"),
+    )
+    # Backfill from the existing stocks
+    op.execute(
+        "INSERT INTO sector_summary "
+        "(sector, stock_count, priced_count, price_sum, price_min, price_max) "
+        "SELECT COALESCE(sector, ''), COUNT(*), COUNT(current_price), "
+        "COALESCE(SUM(current_price), 0), MIN(current_price), MAX(current_price) "
+        "FROM stocks GROUP BY COALESCE(sector, '')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("sector_summary")
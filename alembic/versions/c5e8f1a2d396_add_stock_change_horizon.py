@@ -0,0 +1,34 @@
+"""add stock change horizon
+
+Revision ID: c5e8f1a2d396
+Revises: a81d5c3f9e47
+Create Date: 2026-10-19 16:05:12.418930
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c5e8f1a2d396"
+down_revision: Union[str, Sequence[str], None] = "a81d5c3f9e47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "stock_change_horizon",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("pruned_seq", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("stock_change_horizon")
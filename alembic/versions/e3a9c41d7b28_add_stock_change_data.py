@@ -0,0 +1,48 @@
+"""add stock change op and data
+
+Revision ID: e3a9c41d7b28
+Revises: b47e9c2d5f10
+Create Date: 2026-10-19 09:12:37.604118
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e3a9c41d7b28"
+down_revision: Union[str, Sequence[str], None] = "b47e9c2d5f10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("stock_changes", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "op",
+                sqlmodel.sql.sqltypes.AutoString(),
+                server_default="update",
+                nullable=False,
+            )
+        )
+        batch_op.add_column(sa.Column("data", sa.JSON(), nullable=True))
+        batch_op.create_index(
+            batch_op.f("ix_stock_changes_ticker"), ["ticker"], unique=False
+        )
+
+    # Rows logged before ops existed: '*' marks a bulk change
+    op.execute("UPDATE stock_changes SET op = 'bulk' WHERE ticker = '*'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("stock_changes", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_stock_changes_ticker"))
+        batch_op.drop_column("data")
+        batch_op.drop_column("op")
@@ -0,0 +1,33 @@
+"""add stock version
+
+Revision ID: f6b2d8e05c93
+Revises: e3a9c41d7b28
+Create Date: 2026-10-19 11:47:02.318560
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f6b2d8e05c93"
+down_revision: Union[str, Sequence[str], None] = "e3a9c41d7b28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("stocks", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("version", sa.Integer(), server_default="1", nullable=False)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("stocks", schema=None) as batch_op:
+        batch_op.drop_column("version")
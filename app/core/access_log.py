@@ -0,0 +1,176 @@
+"""
+Structured access log: one JSON line per request with its route, status,
+latency, the database statements it ran and its stock cache hits and misses.
+
+Requests only build a dict and put it on a bounded queue; a listener thread
+formats and writes the lines. Successful requests faster than
+access_log_slow_ms are sampled at access_log_sample_rate (each line carries
+the rate it was sampled at, so counts can be scaled back up); errors and
+slow requests are always logged. If the queue is full the line is dropped
+and counted instead of blocking the request.
+"""
+
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, TextIO
+
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.settings import settings
+
+access_logger = logging.getLogger("app.access")
+
+
+class RequestStats:
+    """Counters for the request being handled, shared with its threadpool calls"""
+
+    __slots__ = ("statements", "cache_hits", "cache_misses")
+
+    def __init__(self):
+        self.statements = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def count_cache_lookup(hit: bool):
+    stats = _stats.get()
+    if stats is not None:
+        if hit:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    # Statements run by the group commit writer or job threads are not
+    # attributed to a request
+    stats = _stats.get()
+    if stats is not None:
+        stats.statements += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "access", None) or {"message": record.getMessage()}
+        return json.dumps({"time": round(record.created, 3), **fields})
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener and never blocks"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The default formats the message here, on the request's thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AccessLog:
+    """The queue between requests and the thread writing the log lines"""
+
+    def __init__(self, queue_size: int):
+        self.handler = _DroppingQueueHandler(queue.Queue(queue_size))
+        self._listener: Optional[QueueListener] = None
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped
+
+    @property
+    def running(self) -> bool:
+        return self._listener is not None
+
+    def start(self, stream: Optional[TextIO] = None):
+        if self._listener is None:
+            output = logging.StreamHandler(stream or sys.stdout)
+            output.setFormatter(JsonFormatter())
+            self._listener = QueueListener(self.handler.queue, output)
+            self._listener.start()
+
+    def stop(self):
+        """Write out the queued lines and stop the thread"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+access_log = AccessLog(settings.access_log_queue_size)
+access_logger.addHandler(access_log.handler)
+access_logger.setLevel(logging.INFO)
+access_logger.propagate = False
+
+
+class AccessLogMiddleware:
+    """Times each HTTP request and logs it through the access log queue"""
+
+    def __init__(self, app: ASGIApp, sample_rate: float, slow_ms: float):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Not started outside the app's lifespan (e.g. scripts, tests)
+        if scope["type"] != "http" or not access_log.running:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _stats.reset(token)
+            duration_ms = (time.perf_counter() - started) * 1000
+            if status_code >= 400 or duration_ms >= self.slow_ms:
+                rate = 1.0
+            elif random.random() < self.sample_rate:
+                rate = self.sample_rate
+            else:
+                rate = 0.0
+            if rate:
+                # The router stores the matched route in the scope
+                route = scope.get("route")
+                access_logger.info(
+                    "access",
+                    extra={
+                        "access": {
+                            "method": scope["method"],
+                            "route": getattr(route, "path", None),
+                            "path": scope["path"],
+                            "status": status_code,
+                            "duration_ms": round(duration_ms, 3),
+                            "db_statements": stats.statements,
+                            "cache_hits": stats.cache_hits,
+                            "cache_misses": stats.cache_misses,
+                            "sample_rate": rate,
+                        }
+                    },
+                )
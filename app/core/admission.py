@@ -0,0 +1,68 @@
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class AdmissionControlMiddleware:
+    """
+    Sheds load with 503 + Retry-After once a worker has `max_in_flight`
+    requests (or `max_writes` write requests) running, so requests are turned
+    away before the threadpool and the SQLite write lock saturate instead of
+    queueing behind them. A limit of 0 disables that check. /health/ probes
+    are never shed. Long polls call
+    release_admission() before parking, so idle waiters are not counted.
+    """
+
+    def __init__(
+        self, app: ASGIApp, max_in_flight: int, max_writes: int, retry_after: int
+    ):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.max_writes = max_writes
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.writes = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Health probes must answer however busy the worker is
+        if scope["type"] != "http" or scope["path"].startswith("/health/"):
+            await self.app(scope, receive, send)
+            return
+
+        write = scope["method"] not in READ_METHODS
+        if (self.max_in_flight and self.in_flight >= self.max_in_flight) or (
+            write and self.max_writes and self.writes >= self.max_writes
+        ):
+            response = JSONResponse(
+                {"detail": "Server busy, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        self.writes += write
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.in_flight -= 1
+                self.writes -= write
+
+        scope["admission_release"] = release
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            release()
+
+
+def release_admission(request: Request):
+    """Stop counting this request against the admission limits"""
+    release = request.scope.get("admission_release")
+    if release is not None:
+        release()
@@ -0,0 +1,153 @@
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: pip install .[formats]
+    brotli = None
+
+
+# Already compressed: another pass costs CPU and saves nothing
+INCOMPRESSIBLE_TYPES = (
+    "application/vnd.apache.parquet",
+    "application/gzip",
+    "application/zip",
+    "image/",
+)
+
+
+def parse_quality_list(header: str) -> dict[str, float]:
+    """Parse an Accept or Accept-Encoding header into {value: q}"""
+    values = {}
+    for part in header.split(","):
+        value, *params = (piece.strip() for piece in part.split(";"))
+        if not value:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        values[value.lower()] = q
+    return values
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred supported content coding the client accepts, if any"""
+    accepted = parse_quality_list(accept_encoding)
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            # wbits=31: zlib stream with a gzip header and trailer
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compress a chunk, flushing it so the client can decode it right away"""
+        if self._zlib is not None:
+            mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+            return self._zlib.compress(data) + self._zlib.flush(mode)
+        data = self._brotli.process(data)
+        return data + (self._brotli.finish() if final else self._brotli.flush())
+
+
+class CompressionMiddleware:
+    """
+    gzip or brotli (when installed) response compression, negotiated from
+    Accept-Encoding. Bodies under `minimum_size` bytes, already compressed
+    types, responses that set Content-Encoding and file downloads go out
+    unchanged. Streamed responses are compressed chunk by chunk.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor: Optional[Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=list(start["headers"]))
+                content_type = headers.get("content-type", "")
+                # File downloads (FileResponse) keep their strong ETag and
+                # byte ranges, which only hold for the uncompressed file
+                if (
+                    "content-encoding" in headers
+                    or "accept-ranges" in headers
+                    or "content-disposition" in headers
+                    or content_type.startswith(INCOMPRESSIBLE_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                compressor = Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "content-length" in headers:
+                    del headers["content-length"]
+                start["headers"] = headers.raw
+                if not more_body:
+                    body = compressor.compress(body, final=True)
+                    headers["Content-Length"] = str(len(body))
+                    start["headers"] = headers.raw
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+
+            data = compressor.compress(body, final=not more_body)
+            await send(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
+
+        await self.app(scope, receive, send_compressed)
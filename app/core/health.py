@@ -0,0 +1,53 @@
+"""
+Whether this worker should get traffic, for GET /health/ready.
+
+A worker is ready once the lifespan has warmed the connection pool and the
+caches, and stops being ready as soon as it is told to shut down. SIGTERM
+(or SIGINT) also starts draining: long polls return at once instead of
+holding the shutdown up for their full wait, while uvicorn stops accepting
+connections and lets the requests in flight finish. The lifespan shutdown
+then flushes buffered writes.
+"""
+
+import signal
+import threading
+
+from app.utils.change_log import ALL_TICKERS
+from app.utils.change_notify import change_notifier
+
+
+class Readiness:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.ready = False
+        self.draining = False
+
+    def mark_ready(self):
+        self.ready, self.draining = True, False
+
+    def start_draining(self):
+        """Stop reporting ready and release parked long polls"""
+        self.ready, self.draining = False, True
+        change_notifier.notify(ALL_TICKERS)
+
+
+readiness = Readiness()
+
+
+def install_drain_handler():
+    """Start draining on SIGTERM/SIGINT, then run uvicorn's own handler"""
+    # Signal handlers can only be set from the main thread; test clients run
+    # the lifespan on another one
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(signum)
+
+        def handler(signum, frame, previous=previous):
+            readiness.start_draining()
+            if callable(previous):
+                previous(signum, frame)
+
+        signal.signal(signum, handler)
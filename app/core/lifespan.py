@@ -0,0 +1,58 @@
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+
+from app.core.access_log import access_log
+from app.core.health import install_drain_handler, readiness
+from app.core.settings import settings
+from app.models.engine import engine, warm_up_pool
+from app.utils.price_board import price_board
+from app.utils.read_snapshot import read_snapshot_refresher
+from app.modules.auth.bulk_import import shutdown_hash_pool
+from app.modules.jobs.tasks import job_runner
+from app.utils.group_commit import group_commit
+from app.utils.sharding import current_shard_router
+from app.utils.stock_cache import stock_cache
+
+
+def warm_caches():
+    """Catch up with the change log, and load the price arrays for rankings"""
+    try:
+        with Session(engine) as session:
+            stock_cache.sync(session)
+            if settings.warm_price_board and current_shard_router() is None:
+                price_board.sync(session)
+    except SQLAlchemyError:
+        # Tables missing (migrations pending): the first requests build them
+        pass
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Do the expensive one-off work before the first request arrives"""
+    # FastAPI caches the schema on app.openapi_schema, so /openapi.json and
+    # /scalar never have to generate it inside a request
+    app.openapi()
+    access_log.start()
+    warm_up_pool()
+    warm_caches()
+    if settings.group_commit_enabled:
+        group_commit.start()
+    if settings.read_backend == "mmap":
+        read_snapshot_refresher.start()
+    job_runner.start()
+    install_drain_handler()
+    readiness.mark_ready()
+    yield
+    # Uvicorn has already waited for the requests in flight (signals start
+    # draining earlier; this covers other shutdowns)
+    readiness.start_draining()
+    # Running jobs stop at their next progress report; queued ones are cancelled
+    job_runner.stop()
+    read_snapshot_refresher.stop()
+    # Commit writes still waiting in the writer before the process exits
+    group_commit.stop()
+    shutdown_hash_pool()
+    access_log.stop()
@@ -0,0 +1,167 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request, status
+
+from app.core.settings import settings
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def too_many_requests_error(detail: str, wait: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(math.ceil(wait))},
+    )
+
+
+class RateLimiter:
+    """
+    In-process token buckets keyed by client and route. Each bucket refills
+    at `rate` tokens per second and holds at most `burst`; the least recently
+    used buckets are dropped beyond `max_keys`.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        # Sync endpoints call in from the threadpool
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        """Take `cost` tokens; returns 0 if allowed, else seconds until it would be"""
+        cost = min(cost, self.burst)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def check(self, request: Request, cost: float = 1.0):
+        """Raise 429 with Retry-After once the client's bucket for the route is empty"""
+        if not settings.rate_limit_enabled:
+            return
+        wait = self.acquire(f"{request.url.path}:{client_ip(request)}", cost)
+        if wait:
+            raise too_many_requests_error("Too many requests", wait)
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class FailureLockout:
+    """
+    Consecutive failure counters with exponential lockout. Once a key reaches
+    `threshold` failures it is locked for `base_delay` seconds, doubling with
+    each further failure up to `max_delay`. Counters are forgotten after
+    `window` seconds without a failure, or on success.
+    """
+
+    def __init__(
+        self,
+        threshold: int,
+        base_delay: float,
+        max_delay: float,
+        window: float,
+        max_keys: int = 100_000,
+    ):
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.max_keys = max_keys
+        # key -> (failures, last failure, locked until)
+        self._entries: OrderedDict[str, tuple[int, float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def locked_for(self, key: str) -> float:
+        """Seconds until `key` may try again (0 if it is not locked)"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return 0.0
+        return max(0.0, entry[2] - time.monotonic())
+
+    def record_failure(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            failures, last_failure, _ = self._entries.pop(key, (0, now, 0.0))
+            if now - last_failure > self.window:
+                failures = 0
+            failures += 1
+            locked_until = 0.0
+            if failures >= self.threshold:
+                exponent = min(failures - self.threshold, 32)
+                delay = min(self.max_delay, self.base_delay * 2**exponent)
+                locked_until = now + delay
+            self._entries[key] = (failures, now, locked_until)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    def record_success(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# bcrypt-backed endpoints: a few attempts per minute per client
+auth_limiter = RateLimiter(
+    rate=settings.rate_limit_auth_per_minute / 60, burst=settings.rate_limit_auth_burst
+)
+stocks_list_limiter = RateLimiter(
+    rate=settings.rate_limit_stocks_per_second, burst=settings.rate_limit_stocks_burst
+)
+# Bulk user imports: one token per password hashed
+bulk_import_limiter = RateLimiter(
+    rate=settings.rate_limit_bulk_rows_per_minute / 60,
+    burst=settings.rate_limit_bulk_rows_burst,
+)
+
+# Failed logins per email, and per client IP (higher: NAT may share an address)
+account_lockout = FailureLockout(
+    threshold=settings.login_lockout_account_threshold,
+    base_delay=settings.login_lockout_base_delay,
+    max_delay=settings.login_lockout_max_delay,
+    window=settings.login_failure_window,
+)
+ip_lockout = FailureLockout(
+    threshold=settings.login_lockout_ip_threshold,
+    base_delay=settings.login_lockout_base_delay,
+    max_delay=settings.login_lockout_max_delay,
+    window=settings.login_failure_window,
+)
+
+
+def limit_auth(request: Request):
+    """Dependency for the bcrypt-backed auth endpoints"""
+    auth_limiter.check(request)
+
+
+def reset_rate_limits():
+    for limiter in (
+        auth_limiter,
+        stocks_list_limiter,
+        bulk_import_limiter,
+        account_lockout,
+        ip_lockout,
+    ):
+        limiter.reset()
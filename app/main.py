@@ -1,15 +1,45 @@
-from app.modules.auth.router import auth_router
-from app.modules.stock.router import stocks_router
 from fastapi import FastAPI
+
+from app.core.access_log import AccessLogMiddleware
+from app.core.admission import AdmissionControlMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.lifespan import lifespan
 from app.core.settings import settings
-from scalar_fastapi import get_scalar_api_reference
+from app.modules.auth.router import auth_router
+from app.modules.health.router import health_router
+from app.modules.jobs.router import jobs_router
+from app.modules.portfolio.router import portfolio_router
+from app.modules.stock.router import stocks_router
 
-app = FastAPI(title=settings.APP_NAME, version=settings.VERSION)
+app = FastAPI(title=settings.APP_NAME, version=settings.VERSION, lifespan=lifespan)
+# Stays under the threadpool's 40 threads so sync endpoints never queue there
+app.add_middleware(
+    AdmissionControlMiddleware,
+    max_in_flight=settings.admission_max_in_flight,
+    max_writes=settings.admission_max_writes,
+    retry_after=settings.admission_retry_after,
+)
+app.add_middleware(
+    CompressionMiddleware, minimum_size=settings.compression_minimum_size
+)
+# Outermost, so requests shed by admission control are logged too
+if settings.access_log_enabled:
+    app.add_middleware(
+        AccessLogMiddleware,
+        sample_rate=settings.access_log_sample_rate,
+        slow_ms=settings.access_log_slow_ms,
+    )
 
 app.include_router(auth_router)
 app.include_router(stocks_router)
+app.include_router(portfolio_router)
+app.include_router(jobs_router)
+app.include_router(health_router)
 
 
 @app.get("/scalar")
 def get_scalar():
+    # Imported lazily: the docs UI is not needed to serve API traffic
+    from scalar_fastapi import get_scalar_api_reference
+
     return get_scalar_api_reference(openapi_url=app.openapi_url, title=app.title)
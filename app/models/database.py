@@ -1,6 +1,8 @@
 import uuid
+from datetime import datetime, timezone
+from sqlalchemy import JSON
 from sqlmodel import SQLModel, Field
-from typing import Optional
+from typing import Any, Optional
 
 
 class User(SQLModel, table=True):
@@ -25,3 +27,93 @@ class Stocks(SQLModel, table=True):
     )
     description: Optional[str] = Field(default=None, description="Company description")
     stockFrom: Optional[str] = Field(default="Stock from where")
+    version: int = Field(
+        default=1,
+        sa_column_kwargs={"server_default": "1"},
+        description="Incremented by every update, for If-Match checks",
+    )
+
+
+class StockPrice(SQLModel, table=True):
+    __tablename__ = "stock_price"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    stock_id: uuid.UUID = Field(foreign_key="stocks.id", index=True)
+    price: float = Field(description="Recorded stock price")
+    recorded_at: datetime = Field(index=True, description="When the price was recorded")
+
+
+class StockChange(SQLModel, table=True):
+    """
+    Append-only log of stock writes, polled by every worker to invalidate
+    caches and served to downstream mirrors by GET /stocks/changes
+    """
+
+    __tablename__ = "stock_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq: Optional[int] = Field(default=None, primary_key=True)
+    ticker: str = Field(
+        index=True, description="Changed ticker, or '*' for bulk changes"
+    )
+    op: str = Field(
+        default="update",
+        sa_column_kwargs={"server_default": "update"},
+        description="create, update, delete, or bulk for '*'",
+    )
+    data: Optional[dict[str, Any]] = Field(
+        default=None, sa_type=JSON, description="The stock after a create or update"
+    )
+    changed_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), index=True
+    )
+
+
+class StockChangeHorizon(SQLModel, table=True):
+    """
+    Single row: the newest change pruned from stock_changes that a mirror
+    behind it can no longer replay (e.g. an expired delete)
+    """
+
+    __tablename__ = "stock_change_horizon"
+
+    id: int = Field(default=1, primary_key=True)
+    pruned_seq: int = Field(default=0, description="Seq of that change")
+
+
+class SectorSummary(SQLModel, table=True):
+    """Per-sector aggregates, kept up to date by every stock write"""
+
+    __tablename__ = "sector_summary"
+
+    # Stocks without a sector are summarized under ""
+    sector: str = Field(primary_key=True)
+    stock_count: int = Field(default=0)
+    priced_count: int = Field(default=0, description="Stocks with a current_price")
+    price_sum: float = Field(default=0.0)
+    price_min: Optional[float] = Field(default=None)
+    price_max: Optional[float] = Field(default=None)
+
+
+class Job(SQLModel, table=True):
+    """Background job run by the in-process job runner"""
+
+    __tablename__ = "jobs"
+
+    id: uuid.UUID = Field(primary_key=True, default_factory=uuid.uuid4)
+    kind: str = Field(description="What the job does, e.g. seed")
+    params: dict[str, Any] = Field(default_factory=dict, sa_type=JSON)
+    status: str = Field(
+        default="queued",
+        index=True,
+        description="queued, running, succeeded, failed or cancelled",
+    )
+    progress: float = Field(default=0.0, description="Fraction done, 0 to 1")
+    message: Optional[str] = Field(default=None, description="Latest progress note")
+    result: Optional[dict[str, Any]] = Field(default=None, sa_type=JSON)
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    worker: Optional[int] = Field(default=None, description="PID that owns the job")
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -1,10 +1,50 @@
+from sqlalchemy import event, text
 from sqlmodel import create_engine, Session
 from app.core.settings import settings
 
+
+def engine_options(database_url: str) -> dict:
+    """Pool settings for a server database; SQLite keeps SQLAlchemy's defaults"""
+    if database_url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        # Drop connections the server closed (restart, idle timeout) on checkout
+        "pool_pre_ping": True,
+    }
+
+
 # Database URL from environment or default to SQLite
-engine = create_engine(settings.database_url, echo=True)
+engine = create_engine(
+    settings.database_url,
+    echo=settings.sql_echo,
+    **engine_options(settings.database_url),
+)
+
+
+if engine.dialect.name == "sqlite" and settings.workers > 1:
+
+    @event.listens_for(engine, "connect")
+    def _sqlite_multi_worker_pragmas(dbapi_connection, connection_record):
+        # WAL lets readers in every worker proceed while one worker writes;
+        # busy_timeout makes writers queue for the lock instead of failing
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
 
 
 def db_session():
     with Session(engine) as session:
         yield session
+
+
+def warm_up_pool(connections: int = settings.db_warm_connections):
+    """Open pooled connections up front so the first requests don't pay for it"""
+    opened = [engine.connect() for _ in range(connections)]
+    for conn in opened:
+        conn.execute(text("SELECT 1"))
+        conn.close()
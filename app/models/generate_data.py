@@ -0,0 +1,249 @@
+"""
+Generate a large synthetic dataset for performance testing
+
+Unlike seed_data.py, which inserts a handful of real Indonesian stocks, this
+script creates any number of realistic-looking stocks (optionally with daily
+price history and users) using bulk inserts. The output is fully determined
+by the seed, so benchmarks and scale tests always see the same data.
+"""
+
+import argparse
+import random
+import string
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from itertools import batched
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import Engine
+from sqlmodel import Session
+from app.models.database import Stocks, StockChange, StockPrice, User
+from app.utils.change_log import ALL_TICKERS, BULK
+from app.utils.db_helpers import bulk_insert, lock_change_log
+from app.utils.sector_summary import rebuild_sector_summary
+
+# Sector distribution roughly follows the composition of the IDX listing:
+# a few large sectors hold most of the tickers, with a long tail behind them.
+# Each entry is (sector, weight, median price in IDR).
+SECTORS = [
+    ("Banking", 0.22, 3500.0),
+    ("Consumer Goods", 0.16, 1800.0),
+    ("Mining", 0.12, 900.0),
+    ("Property", 0.10, 250.0),
+    ("Infrastructure", 0.08, 1200.0),
+    ("Energy", 0.07, 1500.0),
+    ("Telecommunications", 0.06, 2800.0),
+    ("Healthcare", 0.05, 1600.0),
+    ("Technology", 0.05, 400.0),
+    ("Automotive", 0.04, 5000.0),
+    ("Agriculture", 0.03, 2200.0),
+    ("Transportation", 0.02, 300.0),
+]
+
+EXCHANGES = [("IDX", 0.8), ("NASDAQ", 0.1), ("NYSE", 0.1)]
+
+NAME_WORDS = [
+    "Adaro",
+    "Astra",
+    "Bumi",
+    "Cahaya",
+    "Dharma",
+    "Global",
+    "Indah",
+    "Jaya",
+    "Karya",
+    "Makmur",
+    "Mandiri",
+    "Nusantara",
+    "Prima",
+    "Sejahtera",
+    "Sentosa",
+    "Surya",
+    "Tunas",
+    "Utama",
+]
+
+HISTORY_START = datetime(2026, 1, 2, tzinfo=timezone.utc)
+DEFAULT_PASSWORD = "password123"
+
+
+def make_ticker(index: int) -> str:
+    """Map an index to a unique ticker: AAAA..ZZZZ, then AAAAA.. and so on"""
+    length = 4
+    while index >= 26**length:
+        index -= 26**length
+        length += 1
+
+    chars = []
+    for _ in range(length):
+        index, remainder = divmod(index, 26)
+        chars.append(string.ascii_uppercase[remainder])
+    return "".join(reversed(chars))
+
+
+def _round_price(price: float) -> float:
+    """Round to the IDX tick size (1 below 500, 5 above)"""
+    tick = 1 if price < 500 else 5
+    return float(max(tick, round(price / tick) * tick))
+
+
+def generate_stocks(count: int, seed: int = 42) -> Iterator[dict]:
+    """Yield `count` stock rows with a skewed sector distribution"""
+    rng = random.Random(seed)
+    sectors = [s[0] for s in SECTORS]
+    sector_weights = [s[1] for s in SECTORS]
+    median_prices = {s[0]: s[2] for s in SECTORS}
+    exchanges = [e[0] for e in EXCHANGES]
+    exchange_weights = [e[1] for e in EXCHANGES]
+
+    for index in range(count):
+        sector = rng.choices(sectors, sector_weights)[0]
+        price = median_prices[sector] * rng.lognormvariate(0.0, 0.9)
+        name = " ".join(rng.sample(NAME_WORDS, 2))
+        description = None
+        if rng.random() < 0.7:
+            description = f"{name} operates in the {sector.lower()} sector"
+
+        yield {
+            "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+            "ticker": make_ticker(index),
+            "name": f"PT {name} Tbk",
+            "sector": sector,
+            "current_price": _round_price(price),
+            "description": description,
+            "stockFrom": rng.choices(exchanges, exchange_weights)[0],
+        }
+
+
+def generate_price_history(
+    stocks: list[dict], days: int, seed: int = 42
+) -> Iterator[dict]:
+    """
+    Yield a daily random walk for each stock, oldest first, that ends at its
+    current price: the walk is taken backwards from it.
+    """
+    if days <= 0:
+        return
+    for stock in stocks:
+        # Seeded per stock, so the history does not depend on the batching
+        rng = random.Random(f"{seed}:{stock['ticker']}")
+        prices = [stock["current_price"]]
+        for _ in range(days - 1):
+            prices.append(_round_price(prices[-1] / rng.lognormvariate(0.0, 0.02)))
+        for day, price in enumerate(reversed(prices)):
+            yield {
+                "stock_id": stock["id"],
+                "price": price,
+                "recorded_at": HISTORY_START + timedelta(days=day),
+            }
+
+
+def generate_users(
+    count: int, seed: int = 42, password_hash: Optional[str] = None
+) -> Iterator[dict]:
+    """Yield `count` users sharing one password hash (bcrypt is too slow per row)"""
+    if password_hash is None:
+        from app.modules.auth.utils import hash_password
+
+        password_hash = hash_password(DEFAULT_PASSWORD)
+
+    rng = random.Random(seed + 2)
+    for index in range(count):
+        first, last = rng.sample(NAME_WORDS, 2)
+        yield {
+            "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+            "name": f"{first} {last}",
+            "email": f"user{index}@example.com",
+            "password": password_hash,
+        }
+
+
+def _bulk_insert(engine: Engine, table, rows: Iterator[dict], batch_size: int) -> int:
+    """Insert rows in batches (COPY on Postgres), one transaction per batch"""
+    inserted = 0
+    for batch in batched(rows, batch_size):
+        with engine.begin() as conn:
+            inserted += bulk_insert(conn, table, batch)
+    return inserted
+
+
+def generate_dataset(
+    engine: Optional[Engine] = None,
+    stocks: int = 10_000,
+    history_days: int = 0,
+    users: int = 0,
+    seed: int = 42,
+    batch_size: int = 5_000,
+    password_hash: Optional[str] = None,
+    progress: Optional[Callable[[float], None]] = None,
+) -> dict[str, int]:
+    """
+    Bulk insert a synthetic dataset and return the number of rows per table.
+    Expects empty tables: generated tickers/emails are not checked for conflicts.
+    `progress` is called with the fraction of stocks inserted after each batch.
+    """
+    if engine is None:
+        from app.models.engine import engine
+
+    counts = {"stocks": 0, "stock_price": 0, "user": 0}
+
+    for batch in batched(generate_stocks(stocks, seed), batch_size):
+        rows = list(batch)
+        with engine.begin() as conn:
+            counts["stocks"] += bulk_insert(conn, Stocks.__table__, rows)
+
+        if history_days:
+            counts["stock_price"] += _bulk_insert(
+                engine,
+                StockPrice.__table__,
+                generate_price_history(rows, history_days, seed),
+                batch_size,
+            )
+        if progress is not None:
+            progress(counts["stocks"] / stocks)
+
+    if stocks:
+        with Session(engine) as session:
+            rebuild_sector_summary(session)
+            lock_change_log(session)
+            session.add(StockChange(ticker=ALL_TICKERS, op=BULK))
+            session.commit()
+
+    if users:
+        counts["user"] = _bulk_insert(
+            engine,
+            User.__table__,
+            generate_users(users, seed, password_hash),
+            batch_size,
+        )
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stocks", type=int, default=10_000)
+    parser.add_argument("--history-days", type=int, default=0)
+    parser.add_argument("--users", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = generate_dataset(
+        stocks=args.stocks,
+        history_days=args.history_days,
+        users=args.users,
+        seed=args.seed,
+        batch_size=args.batch_size,
+    )
+    elapsed = time.perf_counter() - started
+
+    for table, count in counts.items():
+        print(f"✓ {table}: {count} rows")
+    print(f"\n✅ Dataset generated in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Rebuild the sector_summary table from the stocks table
+
+The summary is maintained incrementally by every stock write; run this to
+repair it after writes that bypassed the API (manual SQL, restores, ...).
+"""
+
+from sqlmodel import Session
+from app.models.engine import engine
+from app.utils.sector_summary import rebuild_sector_summary
+
+
+def rebuild_summary():
+    """Recompute all sector aggregates in one transaction"""
+    with Session(engine) as session:
+        sectors = rebuild_sector_summary(session)
+        session.commit()
+    print(f"✅ Rebuilt summary for {sectors} sectors")
+
+
+if __name__ == "__main__":
+    rebuild_summary()
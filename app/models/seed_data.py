@@ -2,13 +2,26 @@
 Seed database with dummy stock data
 """
 
+import logging
+from typing import Callable, Optional
+
+from sqlalchemy import Engine
 from sqlmodel import Session, select
-from app.models.engine import engine
 from app.models.database import Stocks
+from app.utils.change_log import ALL_TICKERS, BULK, record_stock_change
+from app.utils.sector_summary import add_to_sector_summary
+
+# Shown when run as a script; jobs inside the app stay off its stdout
+logger = logging.getLogger(__name__)
+
 
+def seed_stocks(
+    engine: Optional[Engine] = None, owns: Optional[Callable[[str], bool]] = None
+):
+    """Seed database with Indonesian dummy stocks (those it `owns`, if given)"""
+    if engine is None:
+        from app.models.engine import engine
 
-def seed_stocks():
-    """Seed database with Indonesian dummy stocks"""
     dummy_stocks = [
         {
             "ticker": "BBCA",
@@ -42,6 +55,8 @@ def seed_stocks():
 
     with Session(engine) as session:
         for stock_data in dummy_stocks:
+            if owns is not None and not owns(stock_data["ticker"]):
+                continue
             # Check if stock already exists
             existing = session.exec(
                 select(Stocks).where(Stocks.ticker == stock_data["ticker"])
@@ -50,13 +65,16 @@ def seed_stocks():
             if not existing:
                 stock = Stocks(**stock_data)
                 session.add(stock)
-                print(f"✓ Added {stock_data['ticker']} - {stock_data['name']}")
+                add_to_sector_summary(session, stock.sector, stock.current_price)
+                logger.info(f"✓ Added {stock_data['ticker']} - {stock_data['name']}")
             else:
-                print(f"⊘ Skipped {stock_data['ticker']} - already exists")
+                logger.info(f"⊘ Skipped {stock_data['ticker']} - already exists")
 
+        record_stock_change(session, ALL_TICKERS, BULK)
         session.commit()
-        print("\n✅ Database seeded successfully!")
+        logger.info("\n✅ Database seeded successfully!")
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     seed_stocks()
@@ -0,0 +1,47 @@
+"""
+Build the columnar snapshots served by GET /stocks/snapshot.{parquet,arrow}
+
+Run nightly (e.g. from cron) so the analytics download is a plain file
+serve. A snapshot that is still current is left alone.
+"""
+
+import logging
+import time
+from itertools import product
+from typing import Callable, Optional
+
+from sqlalchemy import Engine
+from sqlmodel import Session
+from app.utils.snapshot import SNAPSHOT_FORMATS, SNAPSHOT_TABLES, get_snapshot
+
+# Shown when run as a script; jobs inside the app stay off its stdout
+logger = logging.getLogger(__name__)
+
+
+def build_snapshots(
+    engine: Optional[Engine] = None,
+    progress: Optional[Callable[[float], None]] = None,
+) -> list[str]:
+    """Bring every snapshot up to date; returns their paths"""
+    if engine is None:
+        from app.models.engine import engine
+
+    snapshots = list(product(SNAPSHOT_TABLES, SNAPSHOT_FORMATS))
+    paths = []
+    with Session(engine) as session:
+        for done, (table, fmt) in enumerate(snapshots, start=1):
+            started = time.perf_counter()
+            path, _ = get_snapshot(session, table, fmt)
+            elapsed = time.perf_counter() - started
+            size = path.stat().st_size / 1024
+            logger.info(f"✓ {path} ({size:.0f} KB, {elapsed:.2f}s)")
+            paths.append(str(path))
+            if progress is not None:
+                progress(done / len(snapshots))
+    logger.info("\n✅ Snapshots up to date")
+    return paths
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    build_snapshots()
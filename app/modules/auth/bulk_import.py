@@ -0,0 +1,271 @@
+import codecs
+import csv
+import json
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import batched
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional
+
+from pydantic import ValidationError
+from sqlmodel import Session, select
+
+from app.core.settings import settings
+from app.models.database import User
+from app.modules.auth.schema import BulkImportError, BulkImportResult, RegisterUser
+from app.modules.auth.utils import hash_password
+from app.utils.db_helpers import upsert_insert
+from app.utils.stock_helpers import IN_CLAUSE_CHUNK_SIZE
+
+FORMATS = ("csv", "ndjson")
+
+# Below this many passwords, shipping them to the pool costs more than it saves
+PARALLEL_HASH_MIN = 16
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+
+class TooManyRows(Exception):
+    """Raised by UserImport.feed once an import goes past its max_rows"""
+
+
+def hash_workers() -> int:
+    """password_hash_workers, or the number of cores this process may use"""
+    if settings.password_hash_workers:
+        return settings.password_hash_workers
+    # sched_getaffinity is Linux only
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """hash_password for many passwords, spread over a process pool"""
+    global _hash_pool
+
+    hasher = partial(hash_password, rounds=settings.bcrypt_rounds)
+    if len(passwords) < PARALLEL_HASH_MIN:
+        return [hasher(password) for password in passwords]
+
+    if _hash_pool is None:
+        # spawn: forking a process that runs threads (uvicorn, the group-commit
+        # writer) can deadlock the child
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=hash_workers(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    chunksize = max(1, len(passwords) // (hash_workers() * 4))
+    return list(_hash_pool.map(hasher, passwords, chunksize=chunksize))
+
+
+def shutdown_hash_pool():
+    global _hash_pool
+
+    if _hash_pool is not None:
+        _hash_pool.shutdown()
+        _hash_pool = None
+
+
+class UserRowParser:
+    """
+    Turns lines of CSV (with a name,email,password header) or NDJSON into
+    validated rows. Lines can be fed in pieces, so uploads are parsed as they
+    stream in; rows that fail to parse are reported with their line number.
+    A quoted CSV field may span lines; the row is reported at its first line.
+    """
+
+    def __init__(self, fmt: str):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format {fmt!r}")
+        self.fmt = fmt
+        self.line = 0
+        self._header: Optional[list[str]] = None
+        # Lines of a CSV row whose quoted field is still open
+        self._pending: list[str] = []
+        self._pending_quotes = 0
+
+    def parse(
+        self, lines: Iterable[str]
+    ) -> Iterator[tuple[int, Optional[RegisterUser], Optional[str]]]:
+        """Yield (line number, row, None) or (line number, None, error)"""
+        for text in lines:
+            self.line += 1
+            line = self.line
+            if self.fmt == "csv":
+                self._pending.append(text)
+                # Quotes inside a quoted field are doubled, so an odd count
+                # means the row goes on past this line
+                self._pending_quotes += text.count('"')
+                if self._pending_quotes % 2:
+                    continue
+                line -= len(self._pending) - 1
+                text = "\n".join(self._pending)
+                self._pending = []
+                self._pending_quotes = 0
+            if not text.strip():
+                continue
+            try:
+                if self.fmt == "ndjson":
+                    data = json.loads(text)
+                elif self._header is None:
+                    self._header = next(csv.reader([text]))
+                    continue
+                else:
+                    data = dict(zip(self._header, next(csv.reader([text]))))
+                yield line, RegisterUser.model_validate(data), None
+            except (ValueError, ValidationError) as exc:
+                yield line, None, _describe(exc)
+
+    def close(self) -> Iterator[tuple[int, None, str]]:
+        """Report a CSV row left open by a quoted field that never closed"""
+        if self._pending:
+            line = self.line - len(self._pending) + 1
+            self._pending = []
+            self._pending_quotes = 0
+            yield line, None, "Invalid row: unterminated quoted field"
+
+
+def _describe(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+            for error in exc.errors()
+        )
+    return f"Invalid row: {exc}"
+
+
+def import_batch(
+    session: Session,
+    rows: list[tuple[int, RegisterUser]],
+    result: BulkImportResult,
+    charge: Optional[Callable[[int], None]] = None,
+):
+    """
+    Insert one batch of users in a single transaction, adding the outcome to
+    `result`. Emails already taken, in the table or earlier in the batch, are
+    reported instead of raising on ix_user_email. `charge`, if given, is
+    called with the number of passwords about to be hashed and may raise to
+    stop the import.
+    """
+    existing = set()
+    for chunk in batched((row.email for _, row in rows), IN_CLAUSE_CHUNK_SIZE):
+        existing.update(session.exec(select(User.email).where(User.email.in_(chunk))))
+
+    # Only hash passwords of rows that can still be inserted
+    new_rows = []
+    for line, row in rows:
+        if row.email in existing:
+            result.errors.append(
+                BulkImportError(line=line, email=row.email, detail="Duplicate email")
+            )
+        else:
+            existing.add(row.email)
+            new_rows.append((line, row))
+    if not new_rows:
+        return
+
+    if charge is not None:
+        charge(len(new_rows))
+    hashes = hash_passwords([row.password for _, row in new_rows])
+    values = [
+        {"id": uuid.uuid4(), "name": row.name, "email": row.email, "password": hashed}
+        for (_, row), hashed in zip(new_rows, hashes)
+    ]
+    stmt = (
+        upsert_insert(session, User)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User.email)
+    )
+    # executemany with RETURNING: SQLAlchemy batches the rows into
+    # multi-VALUES statements within the driver's bound parameter limit
+    inserted = set(session.scalars(stmt, values))
+    session.commit()
+
+    # Rows that lost a race with a concurrent insert of the same email
+    for line, row in new_rows:
+        if row.email in inserted:
+            result.created += 1
+        else:
+            result.errors.append(
+                BulkImportError(line=line, email=row.email, detail="Duplicate email")
+            )
+
+
+class UserImport:
+    """
+    Streaming import: feed() lines as they arrive, finish() for the result.
+    Rows are inserted in transactions of `batch_size` users, so batches
+    committed before feed() raises (TooManyRows past `max_rows` rows, or
+    whatever `charge` raises) stay imported.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        fmt: str,
+        batch_size: int = settings.bulk_import_batch_size,
+        max_rows: Optional[int] = None,
+        charge: Optional[Callable[[int], None]] = None,
+    ):
+        self.session = session
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.charge = charge
+        self.result = BulkImportResult()
+        self.rows = 0
+        self._parser = UserRowParser(fmt)
+        self._batch: list[tuple[int, RegisterUser]] = []
+
+    def _add(self, rows: Iterable[tuple[int, Optional[RegisterUser], Optional[str]]]):
+        for line, row, error in rows:
+            self.rows += 1
+            if self.max_rows is not None and self.rows > self.max_rows:
+                raise TooManyRows(self.max_rows)
+            if error is not None:
+                self.result.errors.append(BulkImportError(line=line, detail=error))
+                continue
+            self._batch.append((line, row))
+            if len(self._batch) >= self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        if self._batch:
+            import_batch(self.session, self._batch, self.result, self.charge)
+            self._batch = []
+
+    def feed(self, lines: Iterable[str]):
+        self._add(self._parser.parse(lines))
+
+    def finish(self) -> BulkImportResult:
+        self._add(self._parser.close())
+        self._flush()
+        self.result.errors.sort(key=lambda error: error.line)
+        return self.result
+
+
+def import_lines(
+    session: Session,
+    lines: Iterable[str],
+    fmt: str,
+    batch_size: int = settings.bulk_import_batch_size,
+) -> BulkImportResult:
+    """Import users from the lines of a CSV or NDJSON file"""
+    user_import = UserImport(session, fmt, batch_size)
+    user_import.feed(lines)
+    return user_import.finish()
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[list[str]]:
+    """Decode a streamed UTF-8 body into lists of complete lines"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        if lines:
+            yield lines
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield [pending]
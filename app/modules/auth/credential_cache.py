@@ -0,0 +1,59 @@
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.settings import settings
+
+
+class CredentialCache:
+    """
+    Recently verified logins, so a client logging in again within `ttl`
+    seconds skips bcrypt. Only an HMAC of (email, password, stored hash) is
+    kept, under a key generated per process, so the cache never holds
+    plaintext and an entry stops matching as soon as the stored hash changes.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._key = secrets.token_bytes(32)
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        # login_user is sync, so requests call in from the threadpool
+        self._lock = threading.Lock()
+
+    def _digest(self, email: str, password: str, hashed_password: str) -> bytes:
+        message = "\0".join((email, password, hashed_password)).encode("utf-8")
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def verify(self, email: str, password: str, hashed_password: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(email)
+        if entry is None:
+            return False
+        digest, expires_at = entry
+        if expires_at < time.monotonic():
+            return False
+        return hmac.compare_digest(
+            digest, self._digest(email, password, hashed_password)
+        )
+
+    def add(self, email: str, password: str, hashed_password: str):
+        digest = self._digest(email, password, hashed_password)
+        with self._lock:
+            self._entries[email] = (digest, time.monotonic() + self.ttl)
+            self._entries.move_to_end(email)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+credential_cache = CredentialCache(
+    ttl=settings.credential_cache_ttl,
+    max_entries=settings.credential_cache_max_entries,
+)
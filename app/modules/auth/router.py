@@ -1,36 +1,135 @@
-from app.modules.auth.utils import hash_password, verify_password
+from app.modules.auth.bulk_import import TooManyRows, UserImport, iter_lines
+from app.modules.auth.credential_cache import credential_cache
+from app.modules.auth.utils import (
+    dummy_verify,
+    hash_password,
+    needs_rehash,
+    verify_password,
+)
+from app.core.rate_limit import (
+    account_lockout,
+    bulk_import_limiter,
+    client_ip,
+    ip_lockout,
+    limit_auth,
+    too_many_requests_error,
+)
+from app.core.settings import settings
 from app.models.database import User
 from app.models.engine import db_session
-from sqlmodel import Session, select
-from app.modules.auth.schema import RegisterUser, LoginUser
-from fastapi import APIRouter, Depends, HTTPException, status
+from app.utils.group_commit import run_write_sync
+from sqlmodel import Session, select, update
+from app.modules.auth.schema import BulkImportResult, RegisterUser, LoginUser
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from functools import partial
 
 auth_router = APIRouter(prefix="/auth", tags=["Auth"])
 
+BULK_IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
 
-@auth_router.post(path="/register")
+
+@auth_router.post(path="/register", dependencies=[Depends(dependency=limit_auth)])
 def register_user(body: RegisterUser, db: Session = Depends(dependency=db_session)):
 
     hashed_password: str = hash_password(plain_password=body.password)
     new_user = User(name=body.name, email=body.email, password=hashed_password)
-    db.add(instance=new_user)
-    db.commit()
+    run_write_sync(session=db, operation=lambda session: session.add(new_user))
 
     return {"message": "User register success!"}
 
 
-@auth_router.post(path="/login")
-def login_user(body: LoginUser, db: Session = Depends(dependency=db_session)):
+@auth_router.post(
+    path="/users/bulk",
+    response_model=BulkImportResult,
+    dependencies=[Depends(dependency=limit_auth)],
+)
+async def bulk_import_users(
+    request: Request, db: Session = Depends(dependency=db_session)
+):
+    """
+    Import users from a CSV (text/csv, with a name,email,password header) or
+    NDJSON (application/x-ndjson) body. Rows are parsed as the body streams
+    in; duplicate emails and invalid rows are reported by line number.
+    Each hashed password costs a bulk_import_limiter token, and bodies past
+    bulk_import_max_rows rows get 413. Batches committed before a 413 or
+    429 stay imported; resending reports them as duplicates.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    fmt = BULK_IMPORT_FORMATS.get(content_type)
+    if fmt is None:
+        raise HTTPException(
+            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Send one of: {', '.join(BULK_IMPORT_FORMATS)}",
+        )
+
+    user_import = UserImport(
+        session=db,
+        fmt=fmt,
+        max_rows=settings.bulk_import_max_rows,
+        charge=partial(bulk_import_limiter.check, request),
+    )
+    try:
+        async for lines in iter_lines(request.stream()):
+            await run_in_threadpool(user_import.feed, lines)
+        return await run_in_threadpool(user_import.finish)
+    except TooManyRows:
+        raise HTTPException(
+            status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"At most {settings.bulk_import_max_rows} rows per import",
+        )
+
+
+def rehash_password(db: Session, user: User, plain_password: str) -> str:
+    """Store a new hash at the configured cost; returns it"""
+    hashed_password = hash_password(plain_password=plain_password)
+    statement = update(User).where(User.id == user.id).values(password=hashed_password)
+    run_write_sync(session=db, operation=lambda session: session.execute(statement))
+    return hashed_password
+
+
+@auth_router.post(path="/login", dependencies=[Depends(dependency=limit_auth)])
+def login_user(
+    body: LoginUser, request: Request, db: Session = Depends(dependency=db_session)
+):
+    account, ip = body.email.lower(), client_ip(request)
+
+    # Checked in memory before any bcrypt work, so locked-out guessing is cheap
+    locked_for = max(account_lockout.locked_for(account), ip_lockout.locked_for(ip))
+    if locked_for:
+        raise too_many_requests_error("Too many failed login attempts", locked_for)
 
     user: User | None = db.exec(
         statement=select(User).where(User.email == body.email)
     ).first()
-    if not user:
-        raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Invalid Credentials!")
+    # Unknown emails pay for a bcrypt too, so timing does not reveal accounts
+    if user is None:
+        valid = dummy_verify(plain_password=body.password)
+    elif credential_cache.verify(body.email, body.password, user.password):
+        # Verified with bcrypt moments ago
+        valid = True
+    else:
+        valid = verify_password(
+            plain_password=body.password, hashed_password=user.password
+        )
+        if valid:
+            hashed_password = user.password
+            if needs_rehash(hashed_password=hashed_password):
+                hashed_password = rehash_password(db, user, body.password)
+            credential_cache.add(body.email, body.password, hashed_password)
 
-    if not verify_password(plain_password=body.password, hashed_password=user.password):
+    if not valid:
+        account_lockout.record_failure(account)
+        ip_lockout.record_failure(ip)
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Invalid Credentials!")
 
+    account_lockout.record_success(account)
+
     # Give token / access
 
     return {"message": "User login success!!"}
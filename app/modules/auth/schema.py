@@ -1,4 +1,9 @@
-from pydantic import BaseModel
+from typing import Optional
+
+from pydantic import BaseModel, field_validator
+
+# bcrypt only uses the first 72 bytes of a password and bcrypt 5 refuses more
+MAX_PASSWORD_BYTES = 72
 
 
 class RegisterUser(BaseModel):
@@ -6,7 +11,25 @@ class RegisterUser(BaseModel):
     email: str
     password: str
 
+    @field_validator("password")
+    @classmethod
+    def _check_password_length(cls, password: str) -> str:
+        if len(password.encode("utf-8")) > MAX_PASSWORD_BYTES:
+            raise ValueError(f"longer than {MAX_PASSWORD_BYTES} bytes")
+        return password
+
 
 class LoginUser(BaseModel):
     email: str
     password: str
+
+
+class BulkImportError(BaseModel):
+    line: int
+    email: Optional[str] = None
+    detail: str
+
+
+class BulkImportResult(BaseModel):
+    created: int = 0
+    errors: list[BulkImportError] = []
@@ -1,11 +1,38 @@
+from functools import cache
+from typing import Optional
+
 import bcrypt
 
+from app.core.settings import settings
+
 
-def hash_password(plain_password: str) -> str:
-    salt = bcrypt.gensalt()
+def hash_password(plain_password: str, rounds: Optional[int] = None) -> str:
+    # Pool workers pass rounds explicitly: they do not share our settings
+    salt = bcrypt.gensalt(rounds=rounds or settings.bcrypt_rounds)
     hashed = bcrypt.hashpw(plain_password.encode("utf-8"), salt)
     return hashed.decode()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode())
+    try:
+        return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode())
+    except ValueError:
+        # bcrypt refuses passwords over 72 bytes; no stored hash came from one
+        return False
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when the hash was made with a different cost than bcrypt_rounds"""
+    # bcrypt hashes look like $2b$12$<salt and digest>
+    return int(hashed_password.split("$")[2]) != settings.bcrypt_rounds
+
+
+@cache
+def _dummy_hash() -> str:
+    return hash_password("dummy password")
+
+
+def dummy_verify(plain_password: str) -> bool:
+    """Spend the same bcrypt time as verify_password, for unknown accounts"""
+    verify_password(plain_password, _dummy_hash())
+    return False
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+
+from app.core.health import readiness
+from app.models.engine import db_session
+
+health_router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@health_router.get("/live")
+def live():
+    """The process is up and serving requests"""
+    return {"status": "ok"}
+
+
+@health_router.get("/ready")
+def ready(session: Session = Depends(db_session)):
+    """
+    The worker has finished warming up, is not shutting down, and can reach
+    the database; 503 otherwise, so load balancers and deploys hold traffic
+    """
+    if not readiness.ready:
+        detail = "Shutting down" if readiness.draining else "Starting up"
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail
+        )
+    try:
+        session.connection().execute(text("SELECT 1"))
+    except SQLAlchemyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database unavailable",
+        )
+    return {"status": "ready"}
@@ -0,0 +1,89 @@
+import uuid
+
+from fastapi import APIRouter, HTTPException, Response, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from app.core.settings import settings
+from app.modules.jobs.runner import FINISHED, JobQueueFull
+from app.modules.jobs.schema import JobCreate, JobResponse
+from app.modules.jobs.tasks import JOB_KINDS, job_runner
+from app.models.database import Job
+
+jobs_router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def job_not_found_error(job_id: uuid.UUID) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found"
+    )
+
+
+def submit_job(kind: str, params: dict, response: Response) -> Job:
+    """Validate and queue a job; 503 when the queue is full"""
+    job_kind = JOB_KINDS.get(kind)
+    if job_kind is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"Unknown job kind {kind}; expected one of {', '.join(JOB_KINDS)}",
+        )
+    if kind == "generate" and not settings.job_generate_enabled:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="generate jobs are turned off (JOB_GENERATE_ENABLED)",
+        )
+    try:
+        validated = job_kind.params.model_validate(params)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [
+                {**error, "loc": ("body", "params", *error["loc"])}
+                for error in e.errors()
+            ]
+        )
+
+    try:
+        job = job_runner.submit(kind, validated)
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many jobs queued, try again later",
+            headers={"Retry-After": "5"},
+        )
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return job
+
+
+@jobs_router.post("/", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_job(job: JobCreate, response: Response):
+    """
+    Queue a background job and return at once; follow the Location header
+    to poll its status and progress
+    """
+    return submit_job(job.kind, job.params, response)
+
+
+@jobs_router.get("/{job_id}", response_model=JobResponse)
+def get_job(job_id: uuid.UUID):
+    """Status, progress and result of a job"""
+    job = job_runner.get(job_id)
+    if job is None:
+        raise job_not_found_error(job_id)
+    return job
+
+
+@jobs_router.post("/{job_id}/cancel", response_model=JobResponse)
+def cancel_job(job_id: uuid.UUID):
+    """
+    Cancel a job: a queued one right away, a running one at its next progress
+    report (the returned status is still "running" until then)
+    """
+    job = job_runner.get(job_id)
+    if job is None:
+        raise job_not_found_error(job_id)
+    if job.status in FINISHED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job {job_id} already {job.status}",
+        )
+    return job_runner.cancel(job_id)
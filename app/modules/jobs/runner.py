@@ -0,0 +1,293 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, NamedTuple, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, delete, select, update
+
+from app.models.database import Job
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+_STOP = object()
+
+
+class JobCancelled(Exception):
+    """Raised inside a job by JobContext.report once cancellation is requested"""
+
+
+class JobQueueFull(Exception):
+    """Raised by JobRunner.submit when max_queued jobs are already waiting"""
+
+
+class JobKind(NamedTuple):
+    """A kind of job: its parameters and the function doing the work"""
+
+    params: type[BaseModel]
+    run: Callable[["JobContext", Any], Optional[dict]]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobContext:
+    """Handed to a running job to report progress and notice cancellation"""
+
+    def __init__(
+        self, job_id: uuid.UUID, engine: Engine, cancelled: threading.Event, interval
+    ):
+        self.job_id = job_id
+        self.engine = engine
+        self._cancelled = cancelled
+        self._interval = interval
+        self._reported_at = 0.0
+
+    def report(self, progress: float, message: Optional[str] = None):
+        """
+        Record how far the job got (0 to 1). Writes reach the database at most
+        every job_progress_interval seconds, and double as the check for a
+        cancel requested through another worker. Raises JobCancelled.
+        """
+        if self._cancelled.is_set():
+            raise JobCancelled()
+        now = time.monotonic()
+        if now - self._reported_at < self._interval and progress < 1:
+            return
+        self._reported_at = now
+
+        with Session(self.engine) as session:
+            cancel_requested = session.execute(
+                update(Job)
+                .where(Job.id == self.job_id)
+                .values(progress=min(progress, 1.0), message=message)
+                .returning(Job.cancel_requested)
+            ).scalar()
+            session.commit()
+        if cancel_requested:
+            self._cancelled.set()
+            raise JobCancelled()
+
+
+class JobRunner:
+    """
+    Runs slow operations (seeding, dataset generation, snapshot builds) on a
+    few background threads of this worker, so requests return 202 at once.
+
+    Jobs are rows of the jobs table: the queue only holds their ids, at most
+    `max_queued` of them. A job is run by the worker that accepted it; the row
+    is how other workers read its status and request its cancellation.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        kinds: dict[str, JobKind],
+        workers: int,
+        max_queued: int,
+        progress_interval: float,
+        retention: float,
+    ):
+        self._engine = engine
+        self.kinds = kinds
+        self.workers = workers
+        self.max_queued = max_queued
+        self.progress_interval = progress_interval
+        self.retention = retention
+        self._queue: queue.Queue = queue.Queue()
+        self._threads: list[threading.Thread] = []
+        self._running: dict[uuid.UUID, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def reset(self, engine: Optional[Engine] = None):
+        """Stop the threads, optionally switching DB (tests)"""
+        self.stop()
+        if engine is not None:
+            self._engine = engine
+
+    def start(self):
+        """Fail jobs orphaned by a dead worker, prune old ones, start threads"""
+        with self._lock:
+            if self._threads:
+                return
+            try:
+                self._recover()
+            except SQLAlchemyError:
+                # No jobs table yet (migrations pending): the rest of the app
+                # still serves, and submits fail until it is migrated
+                pass
+            self._threads = [
+                threading.Thread(target=self._run, name=f"job-{n}", daemon=True)
+                for n in range(self.workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Cancel queued and running jobs, then stop the threads"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            while True:
+                try:
+                    job_id = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job_id is not _STOP:
+                    self._finish_queued(job_id, "Cancelled at shutdown")
+            for event in self._running.values():
+                event.set()
+            for _ in threads:
+                self._queue.put(_STOP)
+        for thread in threads:
+            thread.join()
+
+    def submit(self, kind: str, params: BaseModel) -> Job:
+        """Queue a job; raises JobQueueFull rather than growing the backlog"""
+        if not self.running:
+            self.start()
+        with self._lock:
+            if self._queue.qsize() >= self.max_queued:
+                raise JobQueueFull()
+            job = Job(kind=kind, params=params.model_dump(), worker=os.getpid())
+            with Session(self._engine) as session:
+                session.add(job)
+                session.commit()
+                session.refresh(job)
+            self._queue.put(job.id)
+        return job
+
+    def get(self, job_id: uuid.UUID) -> Optional[Job]:
+        with Session(self._engine) as session:
+            return session.get(Job, job_id)
+
+    def cancel(self, job_id: uuid.UUID) -> Optional[Job]:
+        """
+        Request cancellation: a queued job is cancelled at once, a running one
+        stops at its next progress report. Finished jobs are returned as is.
+        """
+        with Session(self._engine) as session:
+            session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status.in_((QUEUED, RUNNING)))
+                .values(cancel_requested=True)
+            )
+            session.commit()
+        self._finish_queued(job_id, "Cancelled before it started")
+        event = self._running.get(job_id)
+        if event is not None:
+            event.set()
+        return self.get(job_id)
+
+    def _finish_queued(self, job_id: uuid.UUID, message: str):
+        """Cancel a job that no thread has claimed yet"""
+        with Session(self._engine) as session:
+            session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == QUEUED)
+                .values(status=CANCELLED, message=message, finished_at=_now())
+            )
+            session.commit()
+
+    def _recover(self):
+        with Session(self._engine) as session:
+            orphaned = session.exec(
+                select(Job.id, Job.worker).where(Job.status.in_((QUEUED, RUNNING)))
+            ).all()
+            dead = [
+                job_id
+                for job_id, worker in orphaned
+                if worker == os.getpid() or not _pid_alive(worker)
+            ]
+            if dead:
+                session.execute(
+                    update(Job)
+                    .where(Job.id.in_(dead))
+                    .values(
+                        status=FAILED,
+                        error="Interrupted by a restart",
+                        finished_at=_now(),
+                    )
+                )
+            session.execute(
+                delete(Job).where(
+                    Job.status.in_(FINISHED),
+                    Job.finished_at < _now() - timedelta(seconds=self.retention),
+                )
+            )
+            session.commit()
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is _STOP:
+                return
+            self._execute(job_id)
+
+    def _claim(self, job_id: uuid.UUID) -> Optional[tuple[str, dict]]:
+        with Session(self._engine) as session:
+            claimed = session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == QUEUED)
+                .values(status=RUNNING, started_at=_now())
+                .returning(Job.kind, Job.params)
+            ).first()
+            session.commit()
+        return claimed
+
+    def _execute(self, job_id: uuid.UUID):
+        cancelled = threading.Event()
+        self._running[job_id] = cancelled
+        try:
+            claimed = self._claim(job_id)
+            if claimed is None:
+                # Cancelled while it waited
+                return
+            kind, params = claimed
+            context = JobContext(
+                job_id, self._engine, cancelled, self.progress_interval
+            )
+            try:
+                job = self.kinds[kind]
+                result = job.run(context, job.params.model_validate(params))
+            except JobCancelled:
+                outcome = {"status": CANCELLED, "message": "Cancelled"}
+            except Exception as e:
+                outcome = {"status": FAILED, "error": str(e) or type(e).__name__}
+            else:
+                outcome = {"status": SUCCEEDED, "progress": 1.0, "result": result}
+            with Session(self._engine) as session:
+                session.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.status == RUNNING)
+                    .values(**outcome, finished_at=_now())
+                )
+                session.commit()
+        finally:
+            self._running.pop(job_id, None)
@@ -0,0 +1,35 @@
+import uuid
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Any, Optional
+
+
+class JobCreate(BaseModel):
+    """Schema for submitting a background job"""
+
+    kind: str = Field(..., description="seed, generate or snapshots")
+    params: dict[str, Any] = Field(
+        default_factory=dict, description="Parameters of the job kind"
+    )
+
+
+class JobResponse(BaseModel):
+    """Schema for a background job's status"""
+
+    id: uuid.UUID
+    kind: str
+    params: dict[str, Any]
+    status: str = Field(
+        ..., description="queued, running, succeeded, failed or cancelled"
+    )
+    progress: float = Field(..., description="Fraction done, 0 to 1")
+    message: Optional[str] = None
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
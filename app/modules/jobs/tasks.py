@@ -0,0 +1,97 @@
+"""
+The kinds of background job, and the runner for them. Heavy modules are
+imported inside the jobs so the app starts without them.
+"""
+
+from pydantic import BaseModel, Field
+from sqlmodel import Session, select
+
+from app.core.settings import settings
+from app.models.database import Stocks
+from app.models.engine import engine
+from app.modules.jobs.runner import JobContext, JobKind, JobRunner
+from app.utils.change_log import ALL_TICKERS
+from app.utils.change_notify import change_notifier
+from app.utils.sharding import current_shard_router
+from app.utils.stock_cache import stock_cache
+
+
+class SeedParams(BaseModel):
+    """No parameters: seeds the dummy stocks"""
+
+
+class GenerateParams(BaseModel):
+    # Bigger datasets: python -m app.models.generate_data
+    stocks: int = Field(10_000, ge=1, le=100_000, description="Stocks to insert")
+    history_days: int = Field(0, ge=0, le=365, description="Price rows per stock")
+    seed: int = Field(42, description="Random seed; equal seeds give equal data")
+
+
+class SnapshotParams(BaseModel):
+    """No parameters: rebuilds every stale columnar snapshot"""
+
+
+def _stocks_changed():
+    stock_cache.clear()
+    change_notifier.notify(ALL_TICKERS)
+
+
+def _require_unsharded(kind: str):
+    if current_shard_router() is not None:
+        raise ValueError(f"{kind} jobs do not support sharded stocks")
+
+
+def run_seed(context: JobContext, params: SeedParams) -> None:
+    from app.models.seed_data import seed_stocks
+
+    router = current_shard_router()
+    if router is None:
+        seed_stocks(context.engine)
+    else:
+        for name, engine in router.engines.items():
+            seed_stocks(engine, owns=lambda ticker: router.shard_of(ticker) == name)
+    _stocks_changed()
+
+
+def run_generate(context: JobContext, params: GenerateParams) -> dict:
+    from app.models.generate_data import generate_dataset
+
+    _require_unsharded("generate")
+    with Session(context.engine) as session:
+        if session.exec(select(Stocks.id).limit(1)).first() is not None:
+            raise ValueError("generate jobs need an empty stocks table")
+    try:
+        counts = generate_dataset(
+            context.engine,
+            stocks=params.stocks,
+            history_days=params.history_days,
+            seed=params.seed,
+            progress=context.report,
+        )
+    finally:
+        # Batches committed before a cancel or failure stay in the table
+        _stocks_changed()
+    return counts
+
+
+def run_snapshots(context: JobContext, params: SnapshotParams) -> dict:
+    from app.models.snapshot import build_snapshots
+
+    _require_unsharded("snapshots")
+    return {"paths": build_snapshots(context.engine, progress=context.report)}
+
+
+JOB_KINDS = {
+    "seed": JobKind(SeedParams, run_seed),
+    "generate": JobKind(GenerateParams, run_generate),
+    "snapshots": JobKind(SnapshotParams, run_snapshots),
+}
+
+job_runner = JobRunner(
+    engine,
+    JOB_KINDS,
+    workers=settings.job_workers,
+    max_queued=settings.job_max_queued,
+    progress_interval=settings.job_progress_interval,
+    retention=settings.job_retention,
+)
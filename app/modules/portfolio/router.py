@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+from sqlmodel import Session
+
+from app.core.settings import settings
+from app.models.engine import db_session
+from app.modules.portfolio.schema import PortfolioValue, PositionValue
+from app.utils.stock_cache import get_prices_cached
+from app.utils.stock_helpers import normalize_ticker
+
+portfolio_router = APIRouter(prefix="/portfolio", tags=["Portfolio"])
+
+
+@portfolio_router.post("/value", response_model=PortfolioValue)
+def value_portfolio(
+    holdings: dict[str, float] = Body(
+        ..., description="Quantity held per ticker", examples=[{"BBCA": 100}]
+    ),
+    session: Session = Depends(db_session),
+):
+    """Value a {ticker: quantity} portfolio with a single batched price lookup"""
+    import numpy as np
+
+    if len(holdings) > settings.portfolio_max_positions:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"At most {settings.portfolio_max_positions} positions allowed",
+        )
+
+    quantities: dict[str, float] = {}
+    for ticker, quantity in holdings.items():
+        normalized = normalize_ticker(ticker)
+        quantities[normalized] = quantities.get(normalized, 0.0) + quantity
+
+    prices = get_prices_cached(session, list(quantities))
+    found = [ticker for ticker in quantities if ticker in prices]
+    missing = [ticker for ticker in quantities if ticker not in prices]
+
+    qty = np.fromiter((quantities[t] for t in found), np.float64, len(found))
+    if not np.isfinite(qty).all():
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="Quantities must be finite numbers",
+        )
+    price = np.fromiter(
+        (np.nan if prices[t] is None else prices[t] for t in found),
+        np.float64,
+        len(found),
+    )
+    values = qty * price
+    priced = ~np.isnan(price)
+
+    # NaN -> None for unpriced positions
+    price_list = np.where(priced, price, None).tolist()
+    value_list = np.where(priced, values, None).tolist()
+    # Every field was computed above, so skip per-position validation
+    positions = [
+        PositionValue.model_construct(ticker=t, quantity=q, price=p, value=v)
+        for t, q, p, v in zip(found, qty.tolist(), price_list, value_list)
+    ]
+
+    return PortfolioValue(
+        positions=positions,
+        total_value=float(values[priced].sum()),
+        missing=missing,
+        unpriced=[found[i] for i in np.flatnonzero(~priced)],
+    )
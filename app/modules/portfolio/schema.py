@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class PositionValue(BaseModel):
+    """Value of a single holding"""
+
+    ticker: str
+    quantity: float
+    price: Optional[float] = Field(None, description="Current stock price")
+    value: Optional[float] = Field(None, description="quantity * price")
+
+
+class PortfolioValue(BaseModel):
+    """Schema for portfolio valuation response"""
+
+    positions: list[PositionValue]
+    total_value: float = Field(..., description="Sum of all priced positions")
+    missing: list[str] = Field(
+        default_factory=list, description="Tickers that do not exist"
+    )
+    unpriced: list[str] = Field(
+        default_factory=list, description="Tickers without a current price"
+    )
@@ -1,59 +1,161 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+import importlib.util
+
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Header,
+    Request,
+    Response,
+    status,
+    Depends,
+    Query,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
 from sqlmodel import Session, select
+from app.core.admission import release_admission
+from app.core.health import readiness
+from app.core.rate_limit import stocks_list_limiter
+from app.core.settings import settings
 from app.models.database import Stocks
-from app.modules.stock.schema import StockCreate, StockResponse, StockUpdate, StockList
+from app.modules.stock.schema import (
+    MoversResponse,
+    SectorSummaryList,
+    SectorSummaryResponse,
+    StockBatch,
+    StockChangeList,
+    StockCreate,
+    StockExport,
+    StockResponse,
+    StockUpdate,
+    StockList,
+    StockRankResponse,
+)
 from app.models.engine import db_session
-from app.models.seed_data import seed_stocks
+from app.modules.jobs.router import submit_job
+from app.modules.jobs.schema import JobResponse
+from app.utils.content_negotiation import (
+    ALTERNATE_FORMATS,
+    JSON,
+    STOCK_COLUMNS,
+    negotiate,
+    render_stocks,
+    stream_stocks,
+)
+from app.utils.change_log import (
+    changed_tickers_since,
+    oldest_change_seq,
+    pruned_change_seq,
+    stock_version,
+)
+from app.utils.change_notify import change_notifier
+from app.utils.group_commit import run_write
 from app.utils.pagination import paginate_query
+from app.utils.price_board import price_board
+from app.utils.read_snapshot import current_read_snapshot, read_snapshot_headers
+from app.utils.snapshot import SNAPSHOT_FORMATS, get_snapshot
+from app.utils.sector_summary import (
+    UNKNOWN_SECTOR,
+    get_sector_summaries,
+    merge_sector_summaries,
+)
+from app.utils.sharding import current_shard_router, sharding_unsupported_error
+from app.utils.stock_cache import get_stock_cached, get_stocks_cached, stock_cache
 from app.utils.stock_helpers import (
-    get_stock_or_404,
-    check_ticker_exists,
+    delete_stock_row,
+    get_stock_rows,
+    insert_stock,
+    move_stock_row,
     normalize_ticker,
+    parse_if_match,
+    select_by_tickers,
+    stock_etag,
+    stock_not_found_error,
+    update_stock_row,
 )
-from typing import Optional
+from functools import partial
+from operator import itemgetter
+from typing import Literal, Optional
+import time
 
 stocks_router = APIRouter(prefix="/stocks", tags=["Stocks"])
 
 
+async def _write(session: Session, ticker: str, operation):
+    """run_write, or a transaction on the ticker's shard when sharded"""
+    router = current_shard_router()
+    if router is None:
+        return await run_write(session, operation)
+    return await run_in_threadpool(router.write, ticker, operation)
+
+
 @stocks_router.post(
     "/", response_model=StockResponse, status_code=status.HTTP_201_CREATED
 )
-async def create_stock(stock: StockCreate, session: Session = Depends(db_session)):
+async def create_stock(
+    stock: StockCreate, response: Response, session: Session = Depends(db_session)
+):
     """Create a new stock"""
-    normalized_ticker = normalize_ticker(stock.ticker)
-
-    if check_ticker_exists(session, normalized_ticker):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Stock with ticker {normalized_ticker} already exists",
-        )
-
     stock_data = stock.model_dump()
-    stock_data["ticker"] = normalized_ticker
+    stock_data["ticker"] = normalize_ticker(stock.ticker)
 
-    db_stock = Stocks(**stock_data)
-    session.add(db_stock)
-    session.commit()
-    session.refresh(db_stock)
+    created = await _write(
+        session, stock_data["ticker"], partial(insert_stock, stock_data=stock_data)
+    )
+    stock_cache.invalidate(created.ticker)
+    change_notifier.notify(created.ticker)
 
-    return db_stock
+    response.headers["ETag"] = stock_etag(created)
+    return created
 
 
-@stocks_router.get("/", response_model=StockList)
+@stocks_router.get("/", response_model=StockList, responses=ALTERNATE_FORMATS)
 async def get_stocks(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1, description="Page number (starts from 1)"),
     page_size: int = Query(10, ge=1, le=100, description="Number of items per page"),
     sector: Optional[str] = Query(None, description="Filter by sector"),
     session: Session = Depends(db_session),
 ):
-    """Get paginated list of stocks"""
-    query = select(Stocks)
+    """
+    Get paginated list of stocks. Send `Accept: application/msgpack` or
+    `application/vnd.apache.arrow.stream` for a compact body.
+    """
+    media_type = negotiate(request)
+    # Deep pages scan every skipped row, so they cost more of the client's budget
+    skipped = (page - 1) * page_size
+    stocks_list_limiter.check(
+        request, cost=1 + skipped / settings.rate_limit_page_cost_rows
+    )
 
-    if sector:
-        query = query.where(Stocks.sector == sector)
+    router = current_shard_router()
+    snapshot = current_read_snapshot()
+    if router is not None:
+        # Merged across shards, so in ticker order
+        result = router.paginate(page, page_size, sector)
+    elif snapshot is not None:
+        result = snapshot.paginate(page, page_size, sector)
+        response.headers.update(read_snapshot_headers())
+    else:
+        query = select(Stocks)
+
+        if sector:
+            query = query.where(Stocks.sector == sector)
+
+        # Use pagination utility (FIXES PERFORMANCE BUG - no more .all())
+        result = paginate_query(session, query, page, page_size)
+    if media_type != JSON:
+        rows = [tuple(getattr(s, c) for c in STOCK_COLUMNS) for s in result.items]
+        pagination = {
+            "total": result.total,
+            "page": result.page,
+            "page_size": result.page_size,
+        }
+        rendered = render_stocks(media_type, rows, pagination)
+        rendered.headers.update(response.headers)
+        return rendered
 
-    # Use pagination utility (FIXES PERFORMANCE BUG - no more .all())
-    result = paginate_query(session, query, page, page_size)
     stocks = [StockResponse.model_validate(s) for s in result.items]
 
     return StockList(
@@ -61,57 +163,309 @@ async def get_stocks(
     )
 
 
+@stocks_router.get("/export", response_model=StockExport, responses=ALTERNATE_FORMATS)
+async def export_stocks(
+    request: Request,
+    sector: Optional[str] = Query(None, description="Filter by sector"),
+    session: Session = Depends(db_session),
+):
+    """All stocks (optionally of one sector) ordered by ticker, in any format"""
+    media_type = negotiate(request)
+    router = current_shard_router()
+    if router is not None:
+        rows = router.merged_stream(
+            partial(get_stock_rows, sector=sector),
+            key=itemgetter(STOCK_COLUMNS.index("ticker")),
+        )
+        return stream_stocks(media_type, rows)
+    return stream_stocks(media_type, get_stock_rows(session, sector))
+
+
+@stocks_router.get("/changes", response_model=StockChangeList)
+async def get_stock_changes(
+    request: Request,
+    since: int = Query(0, ge=0, description="Return changes after this sequence"),
+    limit: int = Query(100, ge=1, le=1000, description="Most changes to return"),
+    wait: float = Query(
+        0, ge=0, description="Seconds to hold the request open for a change"
+    ),
+    session: Session = Depends(db_session),
+):
+    """
+    Stock writes after sequence number `since`, oldest first, for mirroring
+    the table incrementally. Start from the ETag version of
+    `/stocks/snapshot.parquet`, then follow `next_since`. With `wait`, the
+    request is held open (up to stock_changes_max_wait) until a change lands.
+    """
+    if current_shard_router() is not None:
+        # Each shard numbers its own changes: there is no single order
+        raise sharding_unsupported_error("The change feed")
+    # Retention dropped a change a consumer this far behind needs: every old
+    # row without compaction, expired deletes with it
+    pruned = pruned_change_seq(session)
+    if not settings.stock_change_compact:
+        oldest = oldest_change_seq(session)
+        if oldest is not None:
+            pruned = max(pruned, oldest - 1)
+    if since < pruned:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Changes after {since} were pruned; reload the snapshot",
+        )
+
+    deadline = time.monotonic() + min(wait, settings.stock_changes_max_wait)
+    while True:
+        changes = changed_tickers_since(session, since, limit)
+        # Hand the connection back to the pool before parking
+        session.close()
+        remaining = deadline - time.monotonic()
+        if changes or remaining <= 0 or readiness.draining:
+            break
+        release_admission(request)
+        await change_notifier.wait(remaining, seen_seq=since)
+
+    return StockChangeList(
+        changes=changes, next_since=changes[-1].seq if changes else since
+    )
+
+
+@stocks_router.get("/snapshot.{fmt}", response_class=FileResponse)
+async def download_snapshot(
+    fmt: Literal["parquet", "arrow"],
+    table: Literal["stocks", "prices"] = Query(
+        "stocks", description="stocks, or the price history of every stock"
+    ),
+    session: Session = Depends(db_session),
+):
+    """
+    Columnar snapshot (Parquet, or Arrow IPC file) for analytics jobs. Files
+    are cached on disk and only rebuilt after the stocks change.
+    """
+    if current_shard_router() is not None:
+        raise sharding_unsupported_error("Snapshots")
+    if importlib.util.find_spec("pyarrow") is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Snapshots need the optional 'formats' extra (pyarrow)",
+        )
+
+    path, version = await run_in_threadpool(get_snapshot, session, table, fmt)
+    return FileResponse(
+        path,
+        media_type=SNAPSHOT_FORMATS[fmt],
+        filename=path.name,
+        headers={"ETag": f'"{table}-{version}"'},
+    )
+
+
+@stocks_router.get("/batch", response_model=StockBatch)
+async def get_stocks_batch(
+    tickers: list[str] = Query(
+        ...,
+        description="Comma-separated tickers (e.g. BBCA,BMRI); may be repeated",
+    ),
+    session: Session = Depends(db_session),
+):
+    """Get many stocks by ticker in one request, in the order requested"""
+    requested = list(
+        dict.fromkeys(
+            normalize_ticker(ticker)
+            for value in tickers
+            for ticker in value.split(",")
+            if ticker.strip()
+        )
+    )
+    if len(requested) > settings.batch_max_tickers:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"At most {settings.batch_max_tickers} tickers per request",
+        )
+
+    found = get_stocks_cached(session, requested)
+    return StockBatch(
+        stocks=[found[ticker] for ticker in requested if ticker in found],
+        missing=[ticker for ticker in requested if ticker not in found],
+    )
+
+
+@stocks_router.get("/sectors/summary", response_model=SectorSummaryList)
+async def get_sector_summary(session: Session = Depends(db_session)):
+    """Per-sector stock counts and price aggregates"""
+    router = current_shard_router()
+    if router is not None:
+        summaries = merge_sector_summaries(router.fan_out(get_sector_summaries))
+    else:
+        summaries = get_sector_summaries(session)
+    sectors = [
+        SectorSummaryResponse(
+            sector=summary.sector if summary.sector != UNKNOWN_SECTOR else None,
+            stock_count=summary.stock_count,
+            average_price=(
+                summary.price_sum / summary.priced_count
+                if summary.priced_count
+                else None
+            ),
+            min_price=summary.price_min,
+            max_price=summary.price_max,
+            total_market_value=summary.price_sum,
+        )
+        for summary in summaries
+    ]
+    return SectorSummaryList(sectors=sectors)
+
+
+@stocks_router.get("/movers", response_model=MoversResponse)
+async def get_movers(
+    limit: int = Query(10, ge=1, le=100, description="Stocks on each side"),
+    sector: Optional[str] = Query(None, description="Filter by sector"),
+    session: Session = Depends(db_session),
+):
+    """
+    Top gainers and losers by percent change of current_price against each
+    stock's latest recorded price. Stocks without price history are left out.
+    """
+    if current_shard_router() is not None:
+        raise sharding_unsupported_error("Movers")
+    # A rebuild reads every stock: keep it off the event loop
+    await run_in_threadpool(price_board.sync, session)
+    gainers, losers = price_board.movers(limit, sector)
+    return MoversResponse(gainers=gainers, losers=losers)
+
+
 @stocks_router.get("/{ticker}", response_model=StockResponse)
-async def get_stock(ticker: str, session: Session = Depends(db_session)):
-    """Get a specific stock by ticker symbol"""
-    return get_stock_or_404(session, ticker)
+async def get_stock(
+    ticker: str,
+    request: Request,
+    response: Response,
+    wait: Optional[float] = Query(
+        None, ge=0, description="Seconds to hold the request open for a change"
+    ),
+    since_version: Optional[int] = Query(
+        None, ge=0, description="X-Stock-Version the client already has"
+    ),
+    session: Session = Depends(db_session),
+):
+    """
+    Get a specific stock by ticker symbol. With `wait`, the response carries
+    an X-Stock-Version header; pass it back as `since_version` to hold the
+    request until the stock changes (or `wait` seconds pass) instead of polling.
+    """
+    if wait is None:
+        stock = get_stock_cached(session, ticker)
+        if current_read_snapshot() is not None:
+            response.headers.update(read_snapshot_headers())
+        response.headers["ETag"] = stock_etag(stock)
+        return stock
+    if current_shard_router() is not None:
+        raise sharding_unsupported_error("Waiting for a change")
+
+    normalized = normalize_ticker(ticker)
+    deadline = time.monotonic() + min(wait, settings.stock_changes_max_wait)
+    version = stock_version(session, normalized)
+    while version == since_version:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or readiness.draining:
+            break
+        # Parked waiters hold neither a connection nor an admission slot
+        session.close()
+        release_admission(request)
+        await change_notifier.wait(remaining, normalized, seen_seq=version)
+        version = stock_version(session, normalized)
+
+    # Read past the caches, which may not have seen the change yet
+    rows = select_by_tickers(session, [normalized])
+    session.close()
+    if not rows:
+        raise stock_not_found_error(normalized)
+    response.headers["X-Stock-Version"] = str(version)
+    response.headers["ETag"] = stock_etag(rows[0])
+    return rows[0]
+
+
+@stocks_router.get("/{ticker}/rank", response_model=StockRankResponse)
+async def get_stock_rank(ticker: str, session: Session = Depends(db_session)):
+    """Rank, percentile and z-score of a stock's current_price within its sector"""
+    if current_shard_router() is not None:
+        raise sharding_unsupported_error("Price ranks")
+    normalized = normalize_ticker(ticker)
+    # A rebuild reads every stock: keep it off the event loop
+    await run_in_threadpool(price_board.sync, session)
+    rank = price_board.rank(normalized)
+    if rank is None:
+        raise stock_not_found_error(normalized)
+    return rank
 
 
 @stocks_router.patch("/{ticker}", response_model=StockResponse)
 async def update_stock(
-    ticker: str, stock_update: StockUpdate, session: Session = Depends(db_session)
+    ticker: str,
+    stock_update: StockUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(
+        None, description="ETag of the version being updated; 412 if it changed"
+    ),
+    session: Session = Depends(db_session),
 ):
     """Update a stock by ticker symbol"""
-    stock = get_stock_or_404(session, ticker)
-
+    normalized = normalize_ticker(ticker)
     update_data = stock_update.model_dump(exclude_unset=True)
-
-    # If updating ticker, check for duplicates
     if "ticker" in update_data:
-        new_ticker = normalize_ticker(update_data["ticker"])
-        if new_ticker != stock.ticker and check_ticker_exists(session, new_ticker):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Stock with ticker {new_ticker} already exists",
-            )
-        update_data["ticker"] = new_ticker
-
-    for key, value in update_data.items():
-        setattr(stock, key, value)
+        update_data["ticker"] = normalize_ticker(update_data["ticker"])
 
-    session.add(stock)
-    session.commit()
-    session.refresh(stock)
+    router = current_shard_router()
+    if router is not None and not router.same_shard(
+        normalized, update_data.get("ticker", normalized)
+    ):
+        updated = await run_in_threadpool(
+            move_stock_row,
+            router,
+            normalized,
+            update_data,
+            parse_if_match(if_match),
+        )
+    else:
+        updated = await _write(
+            session,
+            normalized,
+            partial(
+                update_stock_row,
+                ticker=normalized,
+                update_data=update_data,
+                if_match=parse_if_match(if_match),
+            ),
+        )
+    stock_cache.invalidate(normalized, updated.ticker)
+    change_notifier.notify(normalized, updated.ticker)
 
-    return stock
+    response.headers["ETag"] = stock_etag(updated)
+    return updated
 
 
 @stocks_router.delete("/{ticker}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_stock(ticker: str, session: Session = Depends(db_session)):
+async def delete_stock(
+    ticker: str,
+    if_match: Optional[str] = Header(
+        None, description="ETag of the version being deleted; 412 if it changed"
+    ),
+    session: Session = Depends(db_session),
+):
     """Delete a stock by ticker symbol"""
-    stock = get_stock_or_404(session, ticker)
-    session.delete(stock)
-    session.commit()
-
-
-@stocks_router.post("/seed", status_code=status.HTTP_200_OK)
-async def seed_stocks_endpoint():
-    """Seed database with dummy stocks (BBCA, BMRI, BBRI, BUMI)"""
-    try:
-        seed_stocks()
-        return {"message": "Dummy stocks seeded successfully"}
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error seeding stocks: {str(e)}",
-        )
+    normalized = normalize_ticker(ticker)
+    await _write(
+        session,
+        normalized,
+        partial(delete_stock_row, ticker=normalized, if_match=parse_if_match(if_match)),
+    )
+    stock_cache.invalidate(normalized)
+    change_notifier.notify(normalized)
+
+
+@stocks_router.post(
+    "/seed", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED
+)
+def seed_stocks_endpoint(response: Response):
+    """
+    Seed database with dummy stocks (BBCA, BMRI, BBRI, BUMI) in a background
+    job; poll the Location header for its status
+    """
+    return submit_job("seed", {}, response)
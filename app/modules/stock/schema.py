@@ -1,4 +1,5 @@
 import uuid
+from datetime import datetime
 from pydantic import BaseModel, Field
 from typing import Optional
 
@@ -52,6 +53,8 @@ class StockResponse(StockBase):
     """Schema for stock response"""
 
     id: uuid.UUID = Field(..., description="Unique identifier for the stock")
+    # Sent as the ETag header rather than in the body
+    version: Optional[int] = Field(None, exclude=True)
 
     class Config:
         from_attributes = True
@@ -64,3 +67,111 @@ class StockList(BaseModel):
     total: int
     page: int
     page_size: int
+
+
+class StockExport(BaseModel):
+    """Schema for the full stock export"""
+
+    stocks: list[StockResponse]
+
+
+class StockBatch(BaseModel):
+    """Schema for batch ticker lookup response"""
+
+    stocks: list[StockResponse] = Field(
+        ..., description="Found stocks, in the order requested"
+    )
+    missing: list[str] = Field(..., description="Requested tickers that do not exist")
+
+
+class StockChangeResponse(BaseModel):
+    """Schema for one entry of the stock change log"""
+
+    seq: int = Field(..., description="Monotonic sequence number")
+    op: str = Field(..., description="create, update, delete, or bulk")
+    ticker: str = Field(..., description="Changed ticker, or '*' for bulk changes")
+    data: Optional[StockResponse] = Field(
+        None, description="The stock after a create or update"
+    )
+    changed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class StockChangeList(BaseModel):
+    """Schema for a page of the stock change log"""
+
+    changes: list[StockChangeResponse]
+    next_since: int = Field(
+        ..., description="Pass as `since` to get the changes after these"
+    )
+
+
+class SectorSummaryResponse(BaseModel):
+    """Aggregates for one sector"""
+
+    sector: Optional[str] = Field(None, description="Business sector (null if unset)")
+    stock_count: int
+    average_price: Optional[float] = Field(
+        None, description="Average current_price of stocks with a price"
+    )
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    total_market_value: float = Field(
+        ...,
+        description="Sum of current_price (share counts are not stored, "
+        "so each stock counts as one share)",
+    )
+
+
+class SectorSummaryList(BaseModel):
+    """Schema for the per-sector summary response"""
+
+    sectors: list[SectorSummaryResponse]
+
+
+class MoverResponse(BaseModel):
+    """A stock's move against its reference price"""
+
+    ticker: str
+    sector: Optional[str] = None
+    current_price: float
+    reference_price: float = Field(
+        ..., description="Latest recorded price (stock_price history)"
+    )
+    change_percent: float
+
+    class Config:
+        from_attributes = True
+
+
+class MoversResponse(BaseModel):
+    """Schema for the top gainers and losers"""
+
+    gainers: list[MoverResponse] = Field(..., description="Biggest rise first")
+    losers: list[MoverResponse] = Field(..., description="Biggest fall first")
+
+
+class StockRankResponse(BaseModel):
+    """Where a stock's current_price stands within its sector"""
+
+    ticker: str
+    sector: Optional[str] = Field(None, description="Business sector (null if unset)")
+    current_price: Optional[float] = None
+    sector_size: int = Field(..., description="Priced stocks in the sector")
+    sector_rank: Optional[int] = Field(
+        None, description="1 for the highest price in the sector"
+    )
+    percentile: Optional[float] = Field(
+        None, description="Percent of the sector priced at or below this stock"
+    )
+    z_score: Optional[float] = Field(
+        None, description="Standard deviations from the sector mean price"
+    )
+    change_percent: Optional[float] = Field(
+        None, description="Move against the latest recorded price"
+    )
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,134 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, and_, delete, func, or_, select
+
+from app.core.settings import settings
+from app.models.database import StockChange, StockChangeHorizon
+from app.modules.stock.schema import StockResponse
+from app.utils.db_helpers import lock_change_log
+
+ALL_TICKERS = "*"
+
+# Change log ops. Mirrors apply create/update as an upsert of `data` by
+# ticker and delete by ticker; bulk ('*') means re-pull the whole table.
+CREATE = "create"
+UPDATE = "update"
+DELETE = "delete"
+BULK = "bulk"
+
+_last_prune = 0.0
+
+
+def record_stock_change(
+    session: Session, ticker: str, op: str = UPDATE, stock: Optional[object] = None
+):
+    """
+    Append a change to the log in the caller's transaction, with the stock as
+    written for creates and updates. Use ALL_TICKERS (op BULK) for bulk writes
+    that touch an unknown set of stocks.
+    """
+    global _last_prune
+
+    data = None
+    if stock is not None:
+        data = StockResponse.model_validate(stock).model_dump(mode="json")
+    lock_change_log(session)
+    session.add(StockChange(ticker=ticker, op=op, data=data))
+
+    # Writers already hold the write lock, so piggyback retention on them
+    # instead of running a separate cleanup process
+    now = time.monotonic()
+    if now - _last_prune >= settings.stock_change_prune_interval:
+        _last_prune = now
+        prune_stock_changes(session, settings.stock_change_retention)
+
+
+def prune_stock_changes(
+    session: Session,
+    retention: float,
+    compact: Optional[bool] = None,
+    tombstone_retention: Optional[float] = None,
+) -> int:
+    """
+    Apply retention to change log rows older than `retention` seconds. With
+    compaction (stock_change_compact) only rows superseded by a newer change
+    of the same ticker are deleted, so the log still ends in every ticker's
+    latest state, plus deletes older than `tombstone_retention` (a deleted
+    ticker's latest state is its absence); without it they are all deleted.
+    The newest pruned change a mirror still needed is kept as the horizon
+    (pruned_change_seq) that GET /stocks/changes answers 410 behind.
+    """
+    if compact is None:
+        compact = settings.stock_change_compact
+    if tombstone_retention is None:
+        tombstone_retention = settings.stock_change_tombstone_retention
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=retention)
+    stmt = delete(StockChange).where(StockChange.changed_at < cutoff)
+    newest = select(func.max(StockChange.seq)).where(StockChange.changed_at < cutoff)
+    if compact:
+        newer = aliased(StockChange)
+        superseded = (
+            select(newer.seq)
+            .where(newer.ticker == StockChange.ticker, newer.seq > StockChange.seq)
+            .exists()
+        )
+        expired_delete = and_(
+            StockChange.op == DELETE,
+            StockChange.changed_at < now - timedelta(seconds=tombstone_retention),
+        )
+        stmt = stmt.where(or_(superseded, expired_delete))
+        # Superseded rows lose nothing: the newer change carries the state
+        newest = newest.where(expired_delete, ~superseded)
+    newest_seq = session.exec(newest).one()
+    if newest_seq is not None:
+        _advance_horizon(session, newest_seq)
+    result = session.exec(stmt)
+    return result.rowcount
+
+
+def _advance_horizon(session: Session, seq: int):
+    # Callers hold the change log lock, so there is a single writer
+    horizon = session.get(StockChangeHorizon, 1)
+    if horizon is None:
+        session.add(StockChangeHorizon(pruned_seq=seq))
+    elif seq > horizon.pruned_seq:
+        horizon.pruned_seq = seq
+        session.add(horizon)
+
+
+def pruned_change_seq(session: Session) -> int:
+    """Seq of the newest change pruned that a consumer behind it missed (0 if none)"""
+    horizon = session.exec(select(StockChangeHorizon.pruned_seq)).first()
+    return horizon or 0
+
+
+def latest_change_seq(session: Session) -> int:
+    """Sequence number of the newest change (0 for an empty log)"""
+    return session.exec(select(func.max(StockChange.seq))).one() or 0
+
+
+def stock_version(session: Session, ticker: str) -> int:
+    """Sequence number of the latest change to `ticker`, bulk changes included"""
+    query = select(func.max(StockChange.seq)).where(
+        StockChange.ticker.in_((ticker, ALL_TICKERS))
+    )
+    return session.exec(query).one() or 0
+
+
+def oldest_change_seq(session: Session) -> Optional[int]:
+    """Sequence number of the oldest change still in the log"""
+    return session.exec(select(func.min(StockChange.seq))).one()
+
+
+def changed_tickers_since(session: Session, seq: int, limit: int) -> list[StockChange]:
+    """Changes after `seq`, oldest first"""
+    return session.exec(
+        select(StockChange)
+        .where(StockChange.seq > seq)
+        .order_by(StockChange.seq)
+        .limit(limit)
+    ).all()
@@ -0,0 +1,115 @@
+import asyncio
+from functools import partial
+from typing import Callable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+
+from app.core.settings import settings
+from app.models.engine import engine
+from app.utils.change_log import ALL_TICKERS, changed_tickers_since, latest_change_seq
+
+# Waiters for any change at all (the change feed) rather than one ticker
+ANY_TICKER = ""
+
+# Past this many changes in one poll, wake everyone instead of listing them
+POLL_LIMIT = 1_000
+
+
+class ChangeNotifier:
+    """
+    Wakes requests of this worker that wait for stock writes, per ticker.
+
+    Writes made through this worker call notify() directly. Writes from other
+    workers are found by a single poller task, running only while someone
+    waits, that reads the stock_changes log every `poll_interval` seconds on
+    behalf of all waiters. A parked waiter is just an asyncio.Event wait: it
+    holds no DB connection and no thread.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], poll_interval: float):
+        self._session_factory = session_factory
+        self.poll_interval = poll_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._events: dict[str, asyncio.Event] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self._last_seq: Optional[int] = None
+
+    def reset(self, session_factory: Optional[Callable[[], Session]] = None):
+        """Forget waiters and the log position, optionally switching DB"""
+        if session_factory is not None:
+            self._session_factory = session_factory
+        self._loop, self._events, self._poller = None, {}, None
+        self._last_seq = None
+
+    def notify(self, *tickers: str):
+        """Called after a stock write commits; safe from any thread"""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake, tickers)
+
+    def _wake(self, tickers):
+        if ALL_TICKERS in tickers:
+            events = list(self._events.values())
+            self._events.clear()
+        else:
+            events = [self._events.pop(t, None) for t in (*tickers, ANY_TICKER)]
+        for event in events:
+            if event is not None:
+                event.set()
+
+    async def wait(
+        self, timeout: float, ticker: str = ANY_TICKER, seen_seq: Optional[int] = None
+    ) -> bool:
+        """
+        Wait up to `timeout` seconds for a write to `ticker` (or to any stock);
+        True if one was seen. `seen_seq` is the change log position the caller
+        has already read up to, so a poller starting later does not miss the
+        writes in between. Callers re-read the DB either way.
+        """
+        loop = asyncio.get_running_loop()
+        if self._last_seq is None:
+            self._last_seq = seen_seq
+        if self._loop is not loop:
+            # First wait, or a new event loop (tests): start over on this one
+            self._loop, self._events, self._poller = loop, {}, None
+        event = self._events.get(ticker)
+        if event is None:
+            event = self._events[ticker] = asyncio.Event()
+        if self._poller is None or self._poller.done():
+            self._poller = loop.create_task(self._poll())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except TimeoutError:
+            return False
+
+    async def _poll(self):
+        while self._events:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                tickers = await run_in_threadpool(self._read_changes)
+            except Exception:
+                # Waiters time out and re-read the DB on their own
+                continue
+            if tickers:
+                self._wake(tickers)
+
+    def _read_changes(self) -> tuple[str, ...]:
+        """Tickers changed since the previous poll"""
+        with self._session_factory() as session:
+            if self._last_seq is None:
+                self._last_seq = latest_change_seq(session)
+                return ()
+            changes = changed_tickers_since(session, self._last_seq, POLL_LIMIT)
+        if not changes:
+            return ()
+        self._last_seq = changes[-1].seq
+        if len(changes) == POLL_LIMIT:
+            return (ALL_TICKERS,)
+        return tuple({change.ticker for change in changes})
+
+
+change_notifier = ChangeNotifier(
+    partial(Session, engine), settings.stock_cache_poll_interval
+)
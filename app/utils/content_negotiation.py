@@ -0,0 +1,172 @@
+import importlib.util
+import io
+import json
+from itertools import batched
+from typing import Any, Iterable, Iterator, Optional
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import Response, StreamingResponse
+
+from app.core.compression import parse_quality_list
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+ALIASES = {"application/x-msgpack": MSGPACK, "application/vnd.msgpack": MSGPACK}
+
+# msgpack and pyarrow are optional (pip install .[formats]); pyarrow is only
+# imported when an Arrow body is actually requested, since it is slow to load
+OFFERED = [JSON] + [
+    media_type
+    for media_type, module in ((MSGPACK, "msgpack"), (ARROW, "pyarrow"))
+    if importlib.util.find_spec(module) is not None
+]
+
+# Column order of stock rows passed to render_stocks (matches StockResponse)
+STOCK_COLUMNS = ("id", "ticker", "name", "sector", "current_price", "description")
+
+# Rows encoded per chunk of a streamed export
+STREAM_CHUNK_ROWS = 1_000
+
+# OpenAPI `responses` entry for endpoints that negotiate their body format
+ALTERNATE_FORMATS = {
+    200: {"content": {media_type: {} for media_type in OFFERED if media_type != JSON}}
+}
+
+
+def negotiate(request: Request) -> str:
+    """
+    Pick the response media type from the Accept header: JSON unless the
+    client prefers MessagePack or Arrow and the package for it is installed.
+    """
+    accept = request.headers.get("accept")
+    if not accept:
+        return JSON
+
+    accepted = {ALIASES.get(k, k): q for k, q in parse_quality_list(accept).items()}
+    best, best_q = None, 0.0
+    for media_type in OFFERED:
+        q = accepted.get(
+            media_type,
+            accepted.get(media_type.split("/")[0] + "/*", accepted.get("*/*", 0.0)),
+        )
+        if q > best_q:
+            best, best_q = media_type, q
+    if best is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"Available formats: {', '.join(OFFERED)}",
+        )
+    return best
+
+
+def render_stocks(
+    media_type: str, rows: Iterable[tuple], extra: Optional[dict[str, Any]] = None
+) -> Response:
+    """
+    Encode stock rows (tuples in STOCK_COLUMNS order) plus `extra` top-level
+    fields, e.g. pagination, as JSON, MessagePack or an Arrow IPC stream.
+    JSON and MessagePack bodies have the same shape as StockList; Arrow holds
+    one column per field with `extra` in the schema metadata.
+    """
+    extra = extra or {}
+    headers = {"Vary": "Accept"}
+    if media_type == ARROW:
+        return Response(_encode_arrow(rows, extra), media_type=ARROW, headers=headers)
+
+    stocks = [_stock_dict(row) for row in rows]
+    body = {"stocks": stocks, **extra}
+    if media_type == MSGPACK:
+        import msgpack
+
+        return Response(msgpack.packb(body), media_type=MSGPACK, headers=headers)
+    content = json.dumps(body, separators=(",", ":")).encode()
+    return Response(content, media_type=JSON, headers=headers)
+
+
+def stream_stocks(
+    media_type: str, rows: Iterable[tuple], chunk_rows: int = STREAM_CHUNK_ROWS
+) -> Response:
+    """
+    render_stocks for exports. JSON and Arrow bodies are encoded `chunk_rows`
+    rows at a time as the rows are read, so the export is never held in
+    memory whole; MessagePack needs the row count up front and is not.
+    """
+    headers = {"Vary": "Accept"}
+    if media_type == ARROW:
+        body = _stream_arrow(rows, chunk_rows)
+    elif media_type == JSON:
+        body = _stream_json(rows, chunk_rows)
+    else:
+        return render_stocks(media_type, rows)
+    # A plain generator: Starlette iterates it in the threadpool
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+def _stock_dict(row: tuple) -> dict[str, Any]:
+    return dict(zip(STOCK_COLUMNS, (str(row[0]), *row[1:])))
+
+
+def _stream_json(rows: Iterable[tuple], chunk_rows: int) -> Iterator[bytes]:
+    yield b'{"stocks":['
+    separator = ""
+    for chunk in batched(rows, chunk_rows):
+        encoded = ",".join(
+            json.dumps(_stock_dict(row), separators=(",", ":")) for row in chunk
+        )
+        yield (separator + encoded).encode()
+        separator = ","
+    yield b"]}"
+
+
+def _stream_arrow(rows: Iterable[tuple], chunk_rows: int) -> Iterator[bytes]:
+    import pyarrow as pa
+
+    schema = _arrow_schema({})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for chunk in batched(rows, chunk_rows):
+            writer.write_batch(_arrow_batch(chunk, schema))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    # The end-of-stream marker
+    yield sink.getvalue()
+
+
+def _encode_arrow(rows: Iterable[tuple], extra: dict[str, Any]) -> bytes:
+    import pyarrow as pa
+
+    schema = _arrow_schema(extra)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(_arrow_batch(list(rows), schema))
+    return sink.getvalue().to_pybytes()
+
+
+def _arrow_schema(extra: dict[str, Any]):
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("id", pa.string()),
+            ("ticker", pa.string()),
+            ("name", pa.string()),
+            ("sector", pa.string()),
+            ("current_price", pa.float64()),
+            ("description", pa.string()),
+        ],
+        metadata={key: str(value) for key, value in extra.items()},
+    )
+
+
+def _arrow_batch(rows: Iterable[tuple], schema):
+    import pyarrow as pa
+
+    columns = list(zip(*rows)) or [()] * len(STOCK_COLUMNS)
+    columns[0] = [str(value) for value in columns[0]]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema,
+    )
@@ -0,0 +1,67 @@
+from typing import Iterable
+
+from sqlalchemy import Connection, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session
+
+# Key of the Postgres advisory lock held by transactions appending to the
+# stock change log
+CHANGE_LOG_LOCK = 0x5354434B
+
+
+def upsert_insert(session: Session, table):
+    """INSERT construct with ON CONFLICT support for the session's dialect"""
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def begin_write(session: Session):
+    """
+    Open the write transaction explicitly on SQLite, taking the write lock
+    up front. pysqlite only emits BEGIN ahead of DML, so a SAVEPOINT sent
+    first would start a transaction of its own and its RELEASE would commit
+    it; and a transaction that reads before it writes cannot wait for the
+    lock under busy_timeout once another worker holds it.
+    """
+    conn = session.connection()
+    if conn.dialect.name != "sqlite":
+        return
+    if not conn.connection.dbapi_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def lock_change_log(session: Session):
+    """
+    Keep change log sequence numbers committing in order. SQLite's single
+    writer already does; on Postgres a later sequence value could otherwise
+    commit first, and a reader that has moved past it would never see the
+    earlier one. The lock is released at commit or rollback.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(select(func.pg_advisory_xact_lock(CHANGE_LOG_LOCK)))
+
+
+def bulk_insert(conn: Connection, table, rows: Iterable[dict]) -> int:
+    """
+    Insert rows (all with the same keys) in the connection's transaction:
+    COPY ... FROM STDIN on Postgres with psycopg, an executemany INSERT
+    elsewhere. Returns the number of rows.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    if conn.dialect.name != "postgresql" or conn.dialect.driver != "psycopg":
+        conn.execute(table.insert(), rows)
+        return len(rows)
+
+    quote = conn.dialect.identifier_preparer
+    columns = list(rows[0])
+    statement = "COPY {} ({}) FROM STDIN".format(
+        quote.format_table(table), ", ".join(quote.quote(c) for c in columns)
+    )
+    with conn.connection.dbapi_connection.cursor() as cursor:
+        with cursor.copy(statement) as copy:
+            for row in rows:
+                copy.write_row([row[c] for c in columns])
+    return len(rows)
@@ -0,0 +1,139 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+from typing import Callable, Optional, TypeVar
+
+from sqlmodel import Session
+
+from app.core.settings import settings
+from app.models.engine import engine
+from app.utils.db_helpers import begin_write
+
+T = TypeVar("T")
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """
+    Applies write operations from concurrent requests in shared transactions.
+
+    A single writer thread takes the first pending operation, collects any
+    others submitted within `window` seconds (up to `max_batch`), runs each in
+    its own savepoint and commits once, so a burst of writes pays for one
+    fsync instead of one each. Every caller's future gets its own result or
+    error; a failing operation only rolls back its savepoint.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        window: float,
+        max_batch: int,
+    ):
+        self._session_factory = session_factory
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="group-commit", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Apply everything already submitted, then stop the writer thread"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, operation: Callable[[Session], T]) -> "Future[T]":
+        """Queue operation(session); it must not commit"""
+        future: Future[T] = Future()
+        self._queue.put((operation, future))
+        return future
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(
+                        timeout=max(0.0, deadline - time.monotonic())
+                    )
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._apply(batch)
+
+    def _apply(self, batch: list[tuple[Callable[[Session], T], Future]]):
+        done = []
+        try:
+            with self._session_factory() as session:
+                begin_write(session)
+                for operation, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with session.begin_nested():
+                            done.append((future, operation(session)))
+                    except Exception as exc:
+                        future.set_exception(exc)
+                session.commit()
+        except Exception as exc:
+            # The shared transaction failed: nothing in the batch was written
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for future, result in done:
+            future.set_result(result)
+
+
+group_commit = GroupCommitWriter(
+    session_factory=partial(Session, engine),
+    window=settings.group_commit_window,
+    max_batch=settings.group_commit_max_batch,
+)
+
+
+async def run_write(session: Session, operation: Callable[[Session], T]) -> T:
+    """
+    Run operation and commit it: through the group-commit writer when it is
+    running, otherwise directly in the request's session.
+    """
+    if group_commit.running:
+        return await asyncio.wrap_future(group_commit.submit(operation))
+    result = operation(session)
+    session.commit()
+    return result
+
+
+def run_write_sync(session: Session, operation: Callable[[Session], T]) -> T:
+    """run_write for sync endpoints, which FastAPI runs in its threadpool"""
+    if group_commit.running:
+        return group_commit.submit(operation).result()
+    result = operation(session)
+    session.commit()
+    return result
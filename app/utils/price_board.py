@@ -0,0 +1,275 @@
+"""
+In-memory price columns for rankings and movers.
+
+Every stock's current price, sector and reference price (its latest recorded
+stock_price row, e.g. the previous close) are held as NumPy arrays, built for
+one change log sequence number. When the log moves on, only the stocks it
+names are re-read and patched in place; a bulk change, or more changes than
+price_board_max_replay, rebuilds the arrays. Results computed from them
+(sorted sector prices, movers) are memoized until a change touches them.
+"""
+
+import threading
+from dataclasses import dataclass
+from itertools import batched
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import select as core_select
+from sqlmodel import Session
+
+from app.core.settings import settings
+from app.models.database import StockPrice, Stocks
+from app.utils.change_log import (
+    ALL_TICKERS,
+    changed_tickers_since,
+    latest_change_seq,
+    oldest_change_seq,
+    pruned_change_seq,
+)
+from app.utils.stock_helpers import IN_CLAUSE_CHUNK_SIZE
+
+# Sector code of deleted rows, which stay in the arrays until the next rebuild
+GONE = -1
+
+
+@dataclass
+class Mover:
+    ticker: str
+    sector: Optional[str]
+    current_price: float
+    reference_price: float
+    change_percent: float
+
+
+@dataclass
+class PriceRank:
+    ticker: str
+    sector: Optional[str]
+    current_price: Optional[float]
+    sector_size: int
+    sector_rank: Optional[int]
+    percentile: Optional[float]
+    z_score: Optional[float]
+    change_percent: Optional[float]
+
+
+def _price_rows(session: Session, tickers: Optional[Iterable[str]] = None):
+    """(ticker, current_price, sector, reference price) for some or all stocks"""
+    reference = (
+        core_select(StockPrice.price)
+        .where(StockPrice.stock_id == Stocks.id)
+        .order_by(StockPrice.recorded_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    query = core_select(Stocks.ticker, Stocks.current_price, Stocks.sector, reference)
+    conn = session.connection()
+    if tickers is None:
+        yield from conn.execute(query)
+        return
+    for chunk in batched(tickers, IN_CLAUSE_CHUNK_SIZE):
+        yield from conn.execute(query.where(Stocks.ticker.in_(chunk)))
+
+
+def _nan_if_none(value: Optional[float]) -> float:
+    return np.nan if value is None else value
+
+
+class PriceBoard:
+    """Per-process price arrays, kept current through the stock_changes log"""
+
+    def __init__(self, max_replay: int):
+        self.max_replay = max_replay
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop the arrays; the next sync rebuilds them"""
+        self.version: Optional[int] = None
+        self._tickers: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._sectors: list[Optional[str]] = []
+        self._sector_codes: dict[Optional[str], int] = {}
+        self._price = np.empty(0)
+        self._reference = np.empty(0)
+        self._sector = np.empty(0, np.int32)
+        self._memo: dict = {}
+
+    def sync(self, session: Session):
+        """Bring the arrays up to the latest change"""
+        latest = latest_change_seq(session)
+        with self._lock:
+            if latest == self.version:
+                return
+            oldest = oldest_change_seq(session)
+            if (
+                self.version is None
+                or latest < self.version
+                or (oldest is not None and oldest > self.version + 1)
+                or pruned_change_seq(session) > self.version
+            ):
+                # First sync, a recreated log, or changes pruned before we saw them
+                self._rebuild(session)
+            else:
+                changes = changed_tickers_since(session, self.version, self.max_replay)
+                tickers = {change.ticker for change in changes}
+                if len(changes) == self.max_replay or ALL_TICKERS in tickers:
+                    self._rebuild(session)
+                else:
+                    self._patch(session, tickers)
+            self.version = latest
+
+    def _code(self, sector: Optional[str]) -> int:
+        code = self._sector_codes.get(sector)
+        if code is None:
+            code = self._sector_codes[sector] = len(self._sectors)
+            self._sectors.append(sector)
+        return code
+
+    def _rebuild(self, session: Session):
+        self.reset()
+        rows = list(_price_rows(session))
+        self._tickers = [row[0] for row in rows]
+        self._rows = {ticker: n for n, ticker in enumerate(self._tickers)}
+        count = len(rows)
+        self._price = np.fromiter((_nan_if_none(r[1]) for r in rows), float, count)
+        self._reference = np.fromiter((_nan_if_none(r[3]) for r in rows), float, count)
+        self._sector = np.fromiter((self._code(r[2]) for r in rows), np.int32, count)
+
+    def _patch(self, session: Session, tickers: set[str]):
+        """Re-read changed stocks; tickers no longer found were deleted or renamed"""
+        touched = set()
+        found = {row[0]: row for row in _price_rows(session, tickers)}
+        added = [ticker for ticker in found if ticker not in self._rows]
+        if added:
+            for ticker in added:
+                self._rows[ticker] = len(self._tickers)
+                self._tickers.append(ticker)
+            grow = np.full(len(added), np.nan)
+            self._price = np.concatenate([self._price, grow])
+            self._reference = np.concatenate([self._reference, grow])
+            self._sector = np.concatenate(
+                [self._sector, np.full(len(added), GONE, np.int32)]
+            )
+
+        for ticker in tickers:
+            row = self._rows.get(ticker)
+            if row is None:
+                continue
+            touched.add(int(self._sector[row]))
+            if ticker in found:
+                _, price, sector, reference = found[ticker]
+                self._price[row] = _nan_if_none(price)
+                self._reference[row] = _nan_if_none(reference)
+                self._sector[row] = self._code(sector)
+                touched.add(int(self._sector[row]))
+            else:
+                self._price[row] = self._reference[row] = np.nan
+                self._sector[row] = GONE
+
+        # Sorted prices of untouched sectors are still good
+        self._memo = {
+            key: value
+            for key, value in self._memo.items()
+            if key[0] == "sector" and key[1] not in touched
+        }
+
+    def _sector_prices(self, code: int) -> tuple[np.ndarray, float, float]:
+        """Sorted priced values of a sector, with their mean and std"""
+        key = ("sector", code)
+        cached = self._memo.get(key)
+        if cached is None:
+            prices = self._price[self._sector == code]
+            prices = np.sort(prices[~np.isnan(prices)])
+            if prices.size:
+                cached = (prices, float(prices.mean()), float(prices.std()))
+            else:
+                cached = (prices, np.nan, np.nan)
+            self._memo[key] = cached
+        return cached
+
+    def rank(self, ticker: str) -> Optional[PriceRank]:
+        """Where a stock's price stands in its sector, or None if unknown"""
+        with self._lock:
+            row = self._rows.get(ticker)
+            if row is None or self._sector[row] == GONE:
+                return None
+            code = int(self._sector[row])
+            prices, mean, std = self._sector_prices(code)
+            price = float(self._price[row])
+            reference = float(self._reference[row])
+            sector = self._sectors[code]
+
+        result = PriceRank(
+            ticker=ticker,
+            sector=sector,
+            current_price=None,
+            sector_size=int(prices.size),
+            sector_rank=None,
+            percentile=None,
+            z_score=None,
+            change_percent=None,
+        )
+        if np.isnan(price):
+            return result
+        at_or_below = int(np.searchsorted(prices, price, side="right"))
+        result.current_price = price
+        result.sector_rank = prices.size - at_or_below + 1
+        result.percentile = 100.0 * at_or_below / prices.size
+        if std > 0:
+            result.z_score = (price - mean) / std
+        if reference != 0 and not np.isnan(reference):
+            result.change_percent = 100.0 * (price - reference) / reference
+        return result
+
+    def movers(
+        self, limit: int, sector: Optional[str] = None
+    ) -> tuple[list[Mover], list[Mover]]:
+        """
+        The `limit` biggest gainers and losers against the reference price,
+        biggest first. Only the top `limit` of each side are sorted
+        (argpartition), not every stock.
+        """
+        key = ("movers", limit, sector)
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                return cached
+
+            mask = ~np.isnan(self._price) & ~np.isnan(self._reference)
+            mask &= self._reference != 0
+            if sector is not None:
+                mask &= self._sector == self._sector_codes.get(sector, GONE)
+            rows = np.flatnonzero(mask)
+            change = self._price[rows] / self._reference[rows] - 1.0
+            up, down = change > 0, change < 0
+            result = (
+                self._top(rows[up], change[up], limit),
+                self._top(rows[down], -change[down], limit),
+            )
+            self._memo[key] = result
+            return result
+
+    def _top(self, rows: np.ndarray, scores: np.ndarray, limit: int) -> list[Mover]:
+        count = min(limit, scores.size)
+        if not count:
+            return []
+        best = np.argpartition(-scores, count - 1)[:count]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        movers = []
+        for row in rows[best].tolist():
+            price, reference = float(self._price[row]), float(self._reference[row])
+            movers.append(
+                Mover(
+                    ticker=self._tickers[row],
+                    sector=self._sectors[self._sector[row]],
+                    current_price=price,
+                    reference_price=reference,
+                    change_percent=100.0 * (price - reference) / reference,
+                )
+            )
+        return movers
+
+
+price_board = PriceBoard(max_replay=settings.price_board_max_replay)
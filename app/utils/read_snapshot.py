@@ -0,0 +1,388 @@
+"""
+Memory-mapped, read-only copy of the stocks table.
+
+The file is compiled from SQLite and swapped in with an atomic rename; every
+worker maps it read-only, so they all share one copy through the page cache.
+Layout (little-endian):
+
+    header    magic, change seq, build time, counts and section offsets
+    records   one fixed-width record per stock, in table (rowid) order
+    index     record numbers sorted by ticker, for binary search
+    sectors   (name, start, length) slices of the members section
+    members   record numbers grouped by sector, in table order
+    heap      UTF-8 strings referenced by (offset, length) pairs
+"""
+
+import logging
+import mmap
+import math
+import os
+import struct
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: every worker may compile
+    fcntl = None
+
+from sqlalchemy import select as core_select
+from sqlmodel import Session
+
+from app.core.settings import settings
+from app.models.database import Stocks
+from app.models.engine import engine
+from app.utils.change_log import latest_change_seq
+from app.utils.pagination import PaginationResult
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"STKSNAP3"
+# magic, change seq, built at, stocks, sectors, then section offsets
+HEADER = struct.Struct("<8sQdII5Q")
+# UTF-8 ticker (10 characters of up to 4 bytes, NUL padded), id, price,
+# version, then (offset, length) of name, sector, description and stockFrom
+RECORD = struct.Struct("<40s16sdI8I")
+TICKER_WIDTH = 40
+SECTOR = struct.Struct("<4I")
+NONE = 0xFFFFFFFF
+
+
+def _ticker_key(ticker: str) -> bytes:
+    encoded = ticker.encode("utf-8")
+    if len(encoded) > TICKER_WIDTH:
+        # struct would silently cut it to another ticker's key
+        raise ValueError(f"Ticker {ticker!r} is over {TICKER_WIDTH} bytes")
+    return encoded.ljust(TICKER_WIDTH, b"\0")
+
+
+class _Heap:
+    def __init__(self):
+        self.data = bytearray()
+        self._offsets: dict[str, int] = {}
+
+    def add(self, value: Optional[str]) -> tuple[int, int]:
+        if value is None:
+            return 0, NONE
+        encoded = value.encode("utf-8")
+        offset = self._offsets.get(value)
+        if offset is None:
+            offset = self._offsets[value] = len(self.data)
+            self.data += encoded
+        return offset, len(encoded)
+
+
+def compile_read_snapshot(session: Session, path: Path) -> int:
+    """Write the stocks table to `path` atomically; returns its change seq"""
+    version = latest_change_seq(session)
+    table = Stocks.__table__
+    rows = (
+        session.connection()
+        .execute(
+            core_select(
+                table.c.ticker,
+                table.c.id,
+                table.c.current_price,
+                table.c.version,
+                table.c.name,
+                table.c.sector,
+                table.c.description,
+                table.c.stockFrom,
+            )
+        )
+        .all()
+    )
+
+    heap = _Heap()
+    records = bytearray()
+    sectors: dict[str, list[int]] = {}
+    for number, (ticker, stock_id, price, version, *strings) in enumerate(rows):
+        spans = [part for value in strings for part in heap.add(value)]
+        records += RECORD.pack(
+            _ticker_key(ticker),
+            stock_id.bytes,
+            math.nan if price is None else price,
+            version,
+            *spans,
+        )
+        if strings[1] is not None:
+            sectors.setdefault(strings[1], []).append(number)
+
+    index = sorted(range(len(rows)), key=lambda n: _ticker_key(rows[n][0]))
+    sector_table, members = bytearray(), []
+    for name in sorted(sectors):
+        offset, length = heap.add(name)
+        sector_table += SECTOR.pack(offset, length, len(members), len(sectors[name]))
+        members += sectors[name]
+
+    records_at = HEADER.size
+    index_at = records_at + len(records)
+    sectors_at = index_at + 4 * len(index)
+    members_at = sectors_at + len(sector_table)
+    heap_at = members_at + 4 * len(members)
+    header = HEADER.pack(
+        MAGIC,
+        version,
+        time.time(),
+        len(rows),
+        len(sectors),
+        records_at,
+        index_at,
+        sectors_at,
+        members_at,
+        heap_at,
+    )
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as file:
+        file.write(header)
+        file.write(records)
+        file.write(struct.pack(f"<{len(index)}I", *index))
+        file.write(sector_table)
+        file.write(struct.pack(f"<{len(members)}I", *members))
+        file.write(heap.data)
+    os.replace(tmp, path)
+    return version
+
+
+class ReadSnapshot:
+    """Read-only view over a compiled snapshot file"""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.inode = os.fstat(file.fileno()).st_ino
+        (
+            magic,
+            self.version,
+            self.built_at,
+            self.count,
+            sector_count,
+            self._records_at,
+            index_at,
+            sectors_at,
+            members_at,
+            self._heap_at,
+        ) = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a stock read snapshot")
+
+        view = memoryview(self._map)
+        self._index = view[index_at : index_at + 4 * self.count].cast("I")
+        self._members = view[members_at : self._heap_at].cast("I")
+        self._sectors = {}
+        for number in range(sector_count):
+            offset, length, start, size = SECTOR.unpack_from(
+                self._map, sectors_at + number * SECTOR.size
+            )
+            self._sectors[self._string(offset, length)] = (start, size)
+
+    def _string(self, offset: int, length: int) -> Optional[str]:
+        if length == NONE:
+            return None
+        start = self._heap_at + offset
+        return self._map[start : start + length].decode("utf-8")
+
+    def _ticker(self, number: int) -> bytes:
+        start = self._records_at + number * RECORD.size
+        return self._map[start : start + TICKER_WIDTH]
+
+    def _stock(self, number: int) -> Stocks:
+        ticker, stock_id, price, version, *spans = RECORD.unpack_from(
+            self._map, self._records_at + number * RECORD.size
+        )
+        name, sector, description, stock_from = (
+            self._string(spans[i], spans[i + 1]) for i in range(0, 8, 2)
+        )
+        return Stocks(
+            id=uuid.UUID(bytes=stock_id),
+            ticker=ticker.rstrip(b"\0").decode("utf-8"),
+            name=name,
+            sector=sector,
+            current_price=None if math.isnan(price) else price,
+            description=description,
+            stockFrom=stock_from,
+            version=version,
+        )
+
+    def get(self, ticker: str) -> Optional[Stocks]:
+        """Binary search of the ticker index"""
+        try:
+            key = _ticker_key(ticker)
+        except ValueError:
+            return None
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._ticker(self._index[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self._ticker(self._index[low]) == key:
+            return self._stock(self._index[low])
+        return None
+
+    def paginate(
+        self, page: int, page_size: int, sector: Optional[str] = None
+    ) -> PaginationResult:
+        """Same page as paginate_query over select(Stocks) (table order)"""
+        offset = (page - 1) * page_size
+        if sector:
+            start, total = self._sectors.get(sector, (0, 0))
+            end = start + min(total, offset + page_size)
+            numbers = self._members[start + min(offset, total) : end]
+        else:
+            total = self.count
+            numbers = range(offset, min(total, offset + page_size))
+        return PaginationResult(
+            items=[self._stock(number) for number in numbers],
+            total=total,
+            page=page,
+            page_size=page_size,
+        )
+
+
+_current: Optional[ReadSnapshot] = None
+_fresh_at = 0.0
+_last_check = 0.0
+_lock = threading.Lock()
+
+
+def current_read_snapshot() -> Optional[ReadSnapshot]:
+    """
+    The snapshot to serve reads from, or None to use SQLite: when the read
+    backend is not "mmap", no snapshot exists yet, or it is older than
+    read_snapshot_max_lag. The file is re-checked at most once a second.
+    """
+    global _current, _fresh_at, _last_check
+
+    if settings.read_backend != "mmap":
+        return None
+
+    now = time.monotonic()
+    if now - _last_check >= 1.0:
+        with _lock:
+            _last_check = now
+            try:
+                stat = os.stat(settings.read_snapshot_path)
+            except FileNotFoundError:
+                _current = None
+                return None
+            if _current is None or _current.inode != stat.st_ino:
+                _current = ReadSnapshot(Path(settings.read_snapshot_path))
+            # The refresher touches the file whenever it finds it current
+            _fresh_at = stat.st_mtime
+
+    if _current is None or read_snapshot_lag() > settings.read_snapshot_max_lag:
+        return None
+    return _current
+
+
+def reset_read_snapshot():
+    """Drop the mapped snapshot so the next read re-checks the file"""
+    global _current, _fresh_at, _last_check
+
+    with _lock:
+        _current, _fresh_at, _last_check = None, 0.0, 0.0
+
+
+def read_snapshot_lag() -> float:
+    """Seconds since the served snapshot was last known to be current"""
+    return max(0.0, time.time() - _fresh_at)
+
+
+def read_snapshot_headers() -> dict[str, str]:
+    """Freshness headers for responses served from the snapshot"""
+    if _current is None:
+        return {}
+    return {
+        "X-Snapshot-Version": str(_current.version),
+        "X-Snapshot-Lag": f"{read_snapshot_lag():.3f}",
+    }
+
+
+@contextmanager
+def _compile_lock(path: Path) -> Iterator[bool]:
+    """Try the lock file beside `path`; yields False if another worker holds it"""
+    if fcntl is None:
+        yield True
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix(".lock"), "a") as file:
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        # Closing the file releases the lock
+        yield True
+
+
+def refresh_read_snapshot(session: Session) -> bool:
+    """Recompile if stocks changed since the snapshot; returns True if rebuilt"""
+    path = Path(settings.read_snapshot_path)
+    with _compile_lock(path) as locked:
+        if not locked:
+            # Another worker is checking or compiling it
+            return False
+        try:
+            with open(path, "rb") as file:
+                magic, version = HEADER.unpack(file.read(HEADER.size))[:2]
+        except (FileNotFoundError, struct.error):
+            magic = version = None
+
+        # A file from an older layout is rebuilt whatever its version
+        if magic != MAGIC:
+            version = None
+        if version is not None and version == latest_change_seq(session):
+            os.utime(path)
+            return False
+        compile_read_snapshot(session, path)
+        return True
+
+
+class ReadSnapshotRefresher:
+    """Background thread that keeps the snapshot file current"""
+
+    def __init__(self, session_factory, interval: float):
+        self._session_factory = session_factory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="read-snapshot", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            try:
+                with self._session_factory() as session:
+                    refresh_read_snapshot(session)
+            except Exception:
+                # Keep serving the old snapshot: its lag grows in the response
+                # headers until reads fall back to the database
+                logger.exception("Refreshing the read snapshot failed")
+            if self._stop.wait(self.interval):
+                return
+
+
+read_snapshot_refresher = ReadSnapshotRefresher(
+    partial(Session, engine), settings.read_snapshot_interval
+)
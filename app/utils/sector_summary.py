@@ -0,0 +1,155 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import case
+from sqlmodel import Session, delete, func, insert, select, update
+
+from app.models.database import SectorSummary, Stocks
+from app.utils.db_helpers import upsert_insert
+
+UNKNOWN_SECTOR = ""
+
+
+def add_to_sector_summary(
+    session: Session, sector: Optional[str], price: Optional[float]
+):
+    """Count a new stock (or the new side of an update) in its sector"""
+    stmt = upsert_insert(session, SectorSummary).values(
+        sector=sector or UNKNOWN_SECTOR,
+        stock_count=1,
+        priced_count=0 if price is None else 1,
+        price_sum=price or 0.0,
+        price_min=price,
+        price_max=price,
+    )
+    new = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SectorSummary.sector],
+        set_={
+            "stock_count": SectorSummary.stock_count + 1,
+            "priced_count": SectorSummary.priced_count + new.priced_count,
+            "price_sum": SectorSummary.price_sum + new.price_sum,
+            "price_min": case(
+                (new.price_min.is_(None), SectorSummary.price_min),
+                (SectorSummary.price_min.is_(None), new.price_min),
+                (new.price_min < SectorSummary.price_min, new.price_min),
+                else_=SectorSummary.price_min,
+            ),
+            "price_max": case(
+                (new.price_max.is_(None), SectorSummary.price_max),
+                (SectorSummary.price_max.is_(None), new.price_max),
+                (new.price_max > SectorSummary.price_max, new.price_max),
+                else_=SectorSummary.price_max,
+            ),
+        },
+    )
+    session.execute(stmt)
+
+
+def remove_from_sector_summary(
+    session: Session, sector: Optional[str], price: Optional[float]
+):
+    """
+    Uncount a deleted stock (or the old side of an update). Must run after the
+    stock row itself has been changed, since min/max may need recomputing.
+    """
+    key = sector or UNKNOWN_SECTOR
+    summary = session.exec(
+        select(
+            SectorSummary.stock_count, SectorSummary.price_min, SectorSummary.price_max
+        ).where(SectorSummary.sector == key)
+    ).first()
+    if summary is None:
+        return
+
+    stock_count, price_min, price_max = summary
+    if stock_count <= 1:
+        session.execute(delete(SectorSummary).where(SectorSummary.sector == key))
+        return
+
+    values = {"stock_count": SectorSummary.stock_count - 1}
+    if price is not None:
+        values["priced_count"] = SectorSummary.priced_count - 1
+        values["price_sum"] = SectorSummary.price_sum - price
+        # Only removing an extreme value needs a look at the remaining stocks
+        if price in (price_min, price_max):
+            session.flush()
+            # Same bucketing as rebuild_sector_summary: "" and None together
+            sector_filter = func.coalesce(Stocks.sector, UNKNOWN_SECTOR) == key
+            low, high = session.exec(
+                select(
+                    func.min(Stocks.current_price), func.max(Stocks.current_price)
+                ).where(sector_filter)
+            ).one()
+            values["price_min"] = low
+            values["price_max"] = high
+
+    session.execute(
+        update(SectorSummary).where(SectorSummary.sector == key).values(**values)
+    )
+
+
+def move_in_sector_summary(
+    session: Session,
+    old: tuple[Optional[str], Optional[float]],
+    new: tuple[Optional[str], Optional[float]],
+):
+    """Apply an update that may have changed a stock's sector or price"""
+    if old == new:
+        return
+    remove_from_sector_summary(session, *old)
+    add_to_sector_summary(session, *new)
+
+
+def rebuild_sector_summary(session: Session) -> int:
+    """Recompute every sector from the stocks table; returns the sector count"""
+    sector = func.coalesce(Stocks.sector, UNKNOWN_SECTOR)
+    aggregates = select(
+        sector,
+        func.count(),
+        func.count(Stocks.current_price),
+        func.coalesce(func.sum(Stocks.current_price), 0.0),
+        func.min(Stocks.current_price),
+        func.max(Stocks.current_price),
+    ).group_by(sector)
+
+    session.execute(delete(SectorSummary))
+    session.execute(
+        insert(SectorSummary).from_select(
+            [
+                "sector",
+                "stock_count",
+                "priced_count",
+                "price_sum",
+                "price_min",
+                "price_max",
+            ],
+            aggregates,
+        )
+    )
+    return session.exec(select(func.count()).select_from(SectorSummary)).one()
+
+
+def get_sector_summaries(session: Session) -> list[SectorSummary]:
+    query = select(SectorSummary).order_by(SectorSummary.sector)
+    # Rows are updated with Core statements, so skip the identity map
+    return session.exec(query.execution_options(populate_existing=True)).all()
+
+
+def merge_sector_summaries(
+    summaries: Iterable[list[SectorSummary]],
+) -> list[SectorSummary]:
+    """Combine the per-shard summaries of sharded stocks, ordered by sector"""
+    merged: dict[str, SectorSummary] = {}
+    for summary in (s for shard in summaries for s in shard):
+        total = merged.get(summary.sector)
+        if total is None:
+            merged[summary.sector] = SectorSummary.model_validate(summary)
+            continue
+        total.stock_count += summary.stock_count
+        total.priced_count += summary.priced_count
+        total.price_sum += summary.price_sum
+        prices = [p for p in (total.price_min, summary.price_min) if p is not None]
+        total.price_min = min(prices, default=None)
+        prices = [p for p in (total.price_max, summary.price_max) if p is not None]
+        total.price_max = max(prices, default=None)
+    return [merged[sector] for sector in sorted(merged)]
@@ -0,0 +1,179 @@
+"""
+Optional horizontal sharding of the stock tables.
+
+With SHARD_URLS set, every stock lives on exactly one shard database, chosen
+by rendezvous hashing of its ticker: adding a shard only moves the stocks
+that now hash to it. Each shard holds the full stock schema (stocks,
+sector_summary, stock_changes); users, jobs and the rest stay on
+DATABASE_URL. Lookups by ticker go to the owning shard only; listings fan out
+to every shard concurrently and merge the shards' sorted results.
+"""
+
+import heapq
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import Engine
+from sqlmodel import Session, create_engine, func, select
+
+from app.core.settings import settings
+from app.models.database import Stocks
+from app.models.engine import engine_options
+from app.utils.db_helpers import begin_write
+from app.utils.pagination import PaginationResult
+
+T = TypeVar("T")
+
+
+class ShardRouter:
+    """Routes stock reads and writes to shard engines"""
+
+    def __init__(self, engines: dict[str, Engine]):
+        if not engines:
+            raise ValueError("At least one shard is needed")
+        self.engines = engines
+        self._pool = ThreadPoolExecutor(
+            max_workers=len(engines), thread_name_prefix="shard"
+        )
+
+    def close(self):
+        self._pool.shutdown()
+        for engine in self.engines.values():
+            engine.dispose()
+
+    def shard_of(self, ticker: str) -> str:
+        """The shard owning a (normalized) ticker"""
+        return max(
+            self.engines, key=lambda name: zlib.crc32(f"{name}:{ticker}".encode())
+        )
+
+    def same_shard(self, ticker: str, other: str) -> bool:
+        return self.shard_of(ticker) == self.shard_of(other)
+
+    def get(self, ticker: str) -> Optional[Stocks]:
+        with Session(self.engines[self.shard_of(ticker)]) as session:
+            return session.exec(select(Stocks).where(Stocks.ticker == ticker)).first()
+
+    def write(self, ticker: str, operation: Callable[[Session], T]) -> T:
+        """Run operation(session) in a transaction on the ticker's shard"""
+        with Session(self.engines[self.shard_of(ticker)]) as session:
+            begin_write(session)
+            result = operation(session)
+            session.commit()
+            return result
+
+    def fan_out(self, operation: Callable[[Session], T]) -> list[T]:
+        """operation(session) on every shard at once, in shard name order"""
+        return self._run({name: (operation,) for name in sorted(self.engines)})
+
+    def by_shard(
+        self, tickers: Iterable[str], operation: Callable[[Session, list[str]], T]
+    ) -> list[T]:
+        """operation(session, tickers) on each shard owning some of `tickers`"""
+        groups: dict[str, list[str]] = {}
+        for ticker in tickers:
+            groups.setdefault(self.shard_of(ticker), []).append(ticker)
+        return self._run({name: (operation, group) for name, group in groups.items()})
+
+    def _run(self, calls: dict[str, tuple]) -> list:
+        def run(name, operation, *args):
+            with Session(self.engines[name]) as session:
+                return operation(session, *args)
+
+        futures = [self._pool.submit(run, name, *call) for name, call in calls.items()]
+        return [future.result() for future in futures]
+
+    def merged(
+        self, operation: Callable[[Session], list[T]], key: Callable[[T], object]
+    ) -> Iterator[T]:
+        """k-way merge of every shard's result, each already sorted by `key`"""
+        return heapq.merge(*self.fan_out(operation), key=key)
+
+    def merged_stream(
+        self, operation: Callable[[Session], Iterable[T]], key: Callable[[T], object]
+    ) -> Iterator[T]:
+        """
+        Lazy k-way merge of operation(session) on every shard, each sorted by
+        `key`. The shards' sessions stay open until the merge is exhausted or
+        closed, so each shard's rows are streamed rather than read whole.
+        """
+        with ExitStack() as stack:
+            runs = [
+                operation(stack.enter_context(Session(self.engines[name])))
+                for name in sorted(self.engines)
+            ]
+            yield from heapq.merge(*runs, key=key)
+
+    def paginate(
+        self, page: int, page_size: int, sector: Optional[str] = None
+    ) -> PaginationResult:
+        """
+        One page of stocks across all shards, in ticker order. Each shard
+        sends its first offset + page_size stocks by ticker (an index scan),
+        and merging those sorted runs yields the page; deep pages cost
+        offset + page_size rows per shard.
+        """
+        offset = (page - 1) * page_size
+        query = select(Stocks).order_by(Stocks.ticker)
+        if sector:
+            query = query.where(Stocks.sector == sector)
+
+        def read(session: Session):
+            total = session.exec(
+                select(func.count()).select_from(query.subquery())
+            ).one()
+            return total, session.exec(query.limit(offset + page_size)).all()
+
+        results = self.fan_out(read)
+        merged = heapq.merge(
+            *(rows for _, rows in results), key=lambda stock: stock.ticker
+        )
+        return PaginationResult(
+            items=list(islice(merged, offset, offset + page_size)),
+            total=sum(total for total, _ in results),
+            page=page,
+            page_size=page_size,
+        )
+
+
+_router: Optional[ShardRouter] = None
+_configured = False
+_lock = threading.Lock()
+
+
+def current_shard_router() -> Optional[ShardRouter]:
+    """The shard router, or None when the stocks are not sharded"""
+    global _router, _configured
+
+    if not _configured:
+        with _lock:
+            if not _configured:
+                if settings.shard_urls:
+                    _router = ShardRouter(
+                        {
+                            name: create_engine(url, **engine_options(url))
+                            for name, url in settings.shard_urls.items()
+                        }
+                    )
+                _configured = True
+    return _router
+
+
+def set_shard_router(router: Optional[ShardRouter]):
+    """Replace the configured router (tests); None turns sharding off"""
+    global _router, _configured
+
+    with _lock:
+        _router, _configured = router, True
+
+
+def sharding_unsupported_error(feature: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_501_NOT_IMPLEMENTED,
+        detail=f"{feature} is not available with sharded stocks",
+    )
@@ -0,0 +1,161 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from sqlalchemy import select as core_select
+from sqlmodel import Session
+
+from app.core.settings import settings
+from app.models.database import StockPrice, Stocks
+from app.utils.change_log import latest_change_seq
+
+SNAPSHOT_TABLES = ("stocks", "prices")
+SNAPSHOT_FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+_build_lock = threading.Lock()
+
+
+def snapshot_path(table: str, fmt: str, version: int) -> Path:
+    return Path(settings.snapshot_dir) / f"{table}-{version}.{fmt}"
+
+
+def get_snapshot(session: Session, table: str, fmt: str) -> tuple[Path, int]:
+    """
+    Path and version of an up-to-date snapshot file, building it first if
+    needed. Snapshots are versioned by the stock_changes sequence, so a file
+    is reused until a stock write (or a bulk load, logged as '*') lands.
+    """
+    version = latest_change_seq(session)
+    path = snapshot_path(table, fmt, version)
+    if path.exists():
+        return path, version
+
+    with _build_lock:
+        if not path.exists():
+            write_snapshot(session, table, fmt, path)
+            _remove_stale(table, fmt, keep=path)
+    return path, version
+
+
+def write_snapshot(session: Session, table: str, fmt: str, path: Path):
+    """Stream the table into a columnar file, settings.snapshot_chunk_rows at a time"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    query, schema, encode = _SOURCES[table](session)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        if fmt == "parquet":
+            writer = pq.ParquetWriter(tmp_name, schema, compression="zstd")
+        else:
+            writer = pa.ipc.new_file(tmp_name, schema)
+        with writer:
+            # A server-side cursor on Postgres: one chunk in memory at a time
+            result = session.connection().execute(
+                query.execution_options(yield_per=settings.snapshot_chunk_rows)
+            )
+            for rows in result.partitions():
+                columns = encode(list(zip(*rows)))
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+        # Readers only ever see complete files
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def _remove_stale(table: str, fmt: str, keep: Path):
+    """Delete older versions, except the previous one, which may still be downloading"""
+    paths = Path(settings.snapshot_dir).glob(f"{table}-*.{fmt}")
+    versions = sorted(paths, key=lambda p: int(p.stem.rsplit("-", 1)[1]))
+    for old in versions[:-2]:
+        if old != keep:
+            old.unlink(missing_ok=True)
+
+
+def _stocks_source(session: Session):
+    import pyarrow as pa
+
+    table = Stocks.__table__
+    # A fixed dictionary for every chunk: sectors are few, and the IPC file
+    # format does not allow the dictionary to change between batches
+    sectors = sorted(
+        session.connection()
+        .execute(core_select(table.c.sector).where(table.c.sector.is_not(None)))
+        .scalars()
+        .unique()
+    )
+    sector_index = {sector: index for index, sector in enumerate(sectors)}
+    sector_dictionary = pa.array(sectors, type=pa.string())
+
+    schema = pa.schema(
+        [
+            ("id", pa.string()),
+            ("ticker", pa.string()),
+            ("name", pa.string()),
+            ("sector", pa.dictionary(pa.int32(), pa.string())),
+            ("current_price", pa.float64()),
+            ("description", pa.string()),
+            ("stockFrom", pa.string()),
+        ]
+    )
+    query = core_select(
+        table.c.id,
+        table.c.ticker,
+        table.c.name,
+        table.c.sector,
+        table.c.current_price,
+        table.c.description,
+        table.c.stockFrom,
+    ).order_by(table.c.ticker)
+
+    def encode(columns: list[tuple]) -> list:
+        ids, tickers, names, row_sectors, prices, descriptions, origins = columns
+        indices = pa.array(
+            [None if s is None else sector_index[s] for s in row_sectors], pa.int32()
+        )
+        return [
+            pa.array([str(value) for value in ids], pa.string()),
+            pa.array(tickers, pa.string()),
+            pa.array(names, pa.string()),
+            pa.DictionaryArray.from_arrays(indices, sector_dictionary),
+            pa.array(prices, pa.float64()),
+            pa.array(descriptions, pa.string()),
+            pa.array(origins, pa.string()),
+        ]
+
+    return query, schema, encode
+
+
+def _prices_source(session: Session):
+    import pyarrow as pa
+
+    schema = pa.schema(
+        [
+            ("ticker", pa.string()),
+            ("price", pa.float64()),
+            ("recorded_at", pa.timestamp("us", tz="UTC")),
+        ]
+    )
+    # Insertion order: the generator writes each stock's history together,
+    # and sorting millions of rows here would defeat the chunked read
+    query = (
+        core_select(Stocks.ticker, StockPrice.price, StockPrice.recorded_at)
+        .join(Stocks, Stocks.id == StockPrice.stock_id)
+        .order_by(StockPrice.id)
+    )
+
+    def encode(columns: list[tuple]) -> list:
+        return [pa.array(column, field.type) for column, field in zip(columns, schema)]
+
+    return query, schema, encode
+
+
+_SOURCES = {"stocks": _stocks_source, "prices": _prices_source}
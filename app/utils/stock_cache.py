@@ -0,0 +1,238 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from sqlmodel import Session
+
+from app.core.access_log import count_cache_lookup
+from app.core.settings import settings
+from app.modules.stock.schema import StockResponse
+from app.utils.change_log import (
+    ALL_TICKERS,
+    changed_tickers_since,
+    latest_change_seq,
+)
+from app.utils.read_snapshot import current_read_snapshot
+from app.utils.sharding import current_shard_router
+from app.utils.stock_helpers import (
+    get_prices_by_tickers,
+    get_stock_or_404,
+    normalize_ticker,
+    select_by_tickers,
+)
+from app.utils.stock_store import (
+    CompactStock,
+    load_compact_stocks,
+    read_descriptions,
+)
+
+
+class StockCache:
+    """
+    Per-process LRU cache of stocks, held as CompactStock.
+
+    Writes in this process invalidate entries directly. Writes made by other
+    workers (or CLI scripts) are picked up by polling the stock_changes log
+    for sequence numbers newer than the last one seen, at most once every
+    `poll_interval` seconds, so entries are never staler than that.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, poll_interval: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self._entries: OrderedDict[str, tuple[float, CompactStock]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._last_seq: Optional[int] = None
+        self._last_poll = 0.0
+
+    def get(self, ticker: str) -> Optional[CompactStock]:
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[ticker]
+                entry = None
+            count_cache_lookup(entry is not None)
+            if entry is None:
+                return None
+            self._entries.move_to_end(ticker)
+            return entry[1]
+
+    def token(self) -> int:
+        """Take before reading the DB; put() drops values read before an invalidation"""
+        return self._epoch
+
+    def put(self, ticker: str, value: CompactStock, token: int):
+        with self._lock:
+            if token != self._epoch:
+                return
+            self._entries[ticker] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(ticker)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def load_descriptions(
+        self, session: Session, stocks: Iterable[CompactStock]
+    ) -> set[str]:
+        """
+        Fill in the descriptions of cached stocks that were not loaded yet.
+        Returns the tickers no longer in the table, whose entries are dropped.
+        """
+        pending = [stock for stock in stocks if not stock.description_loaded]
+        if not pending:
+            return set()
+
+        descriptions = read_descriptions(session, [stock.ticker for stock in pending])
+        gone = set()
+        with self._lock:
+            for stock in pending:
+                if stock.ticker in descriptions:
+                    stock.description = descriptions[stock.ticker]
+                    continue
+                # Deleted since it was cached, and the change not synced yet
+                gone.add(stock.ticker)
+                entry = self._entries.get(stock.ticker)
+                if entry is not None and entry[1] is stock:
+                    del self._entries[stock.ticker]
+        return gone
+
+    def invalidate(self, *tickers: str):
+        with self._lock:
+            self._epoch += 1
+            for ticker in tickers:
+                if ticker == ALL_TICKERS:
+                    self._entries.clear()
+                else:
+                    self._entries.pop(ticker, None)
+
+    def clear(self):
+        self.invalidate(ALL_TICKERS)
+
+    def reset(self):
+        """Forget entries and the change log position (e.g. after switching DB)"""
+        self.clear()
+        self._last_seq = None
+        self._last_poll = 0.0
+
+    def sync(self, session: Session):
+        """Apply changes written by other processes since the last poll"""
+        now = time.monotonic()
+        if now - self._last_poll < self.poll_interval:
+            return
+        self._last_poll = now
+
+        latest = latest_change_seq(session)
+        if self._last_seq is None or latest < self._last_seq:
+            # First poll, or the log was recreated: nothing cached can be trusted
+            self.clear()
+        elif latest > self._last_seq:
+            limit = settings.stock_cache_max_entries
+            changes = changed_tickers_since(session, self._last_seq, limit)
+            if len(changes) == limit:
+                self.clear()
+            else:
+                self.invalidate(*(change.ticker for change in changes))
+        self._last_seq = latest
+
+
+stock_cache = StockCache(
+    max_entries=settings.stock_cache_max_entries,
+    ttl=settings.stock_cache_ttl,
+    poll_interval=settings.stock_cache_poll_interval,
+)
+
+
+def get_stock_cached(session: Session, ticker: str) -> StockResponse:
+    """get_stock_or_404 behind the per-process stock cache"""
+    normalized = normalize_ticker(ticker)
+    # The read snapshot is already a lookup in memory, and writes to shards
+    # are not in the change log the cache follows
+    if (
+        not settings.stock_cache_enabled
+        or current_read_snapshot() is not None
+        or current_shard_router() is not None
+    ):
+        return StockResponse.model_validate(get_stock_or_404(session, normalized))
+
+    stock_cache.sync(session)
+    cached = stock_cache.get(normalized)
+    # Cached by a price lookup, which skips descriptions
+    if cached is not None and not stock_cache.load_descriptions(session, [cached]):
+        return cached.to_response()
+
+    token = stock_cache.token()
+    stock = CompactStock.from_stock(get_stock_or_404(session, normalized))
+    stock_cache.put(normalized, stock, token)
+    return stock.to_response()
+
+
+def get_prices_cached(
+    session: Session, tickers: list[str]
+) -> dict[str, Optional[float]]:
+    """
+    current_price for each existing ticker (normalized), served from the stock
+    cache where possible and from chunked IN queries for the rest, which are
+    cached without their descriptions.
+    """
+    router = current_shard_router()
+    if router is not None:
+        prices = {}
+        for found in router.by_shard(tickers, get_prices_by_tickers):
+            prices.update(found)
+        return prices
+    if not settings.stock_cache_enabled:
+        return get_prices_by_tickers(session, tickers)
+
+    stock_cache.sync(session)
+    prices: dict[str, Optional[float]] = {}
+    misses = []
+    for ticker in tickers:
+        cached = stock_cache.get(ticker)
+        if cached is None:
+            misses.append(ticker)
+        else:
+            prices[ticker] = cached.current_price
+
+    token = stock_cache.token()
+    for stock in load_compact_stocks(session, misses, with_description=False):
+        stock_cache.put(stock.ticker, stock, token)
+        prices[stock.ticker] = stock.current_price
+    return prices
+
+
+def get_stocks_cached(session: Session, tickers: list[str]) -> dict[str, StockResponse]:
+    """
+    Batch version of get_stock_cached for normalized tickers: cache hits first,
+    then one chunked IN query for the misses. Unknown tickers are left out.
+    """
+    router = current_shard_router()
+    if router is not None:
+        found = router.by_shard(tickers, select_by_tickers)
+        return {
+            row.ticker: StockResponse.model_validate(row)
+            for rows in found
+            for row in rows
+        }
+    if not settings.stock_cache_enabled:
+        rows = select_by_tickers(session, tickers)
+        return {row.ticker: StockResponse.model_validate(row) for row in rows}
+
+    stock_cache.sync(session)
+    stocks: dict[str, CompactStock] = {}
+    misses = []
+    for ticker in tickers:
+        cached = stock_cache.get(ticker)
+        if cached is None:
+            misses.append(ticker)
+        else:
+            stocks[ticker] = cached
+    for ticker in stock_cache.load_descriptions(session, stocks.values()):
+        del stocks[ticker]
+
+    token = stock_cache.token()
+    for stock in load_compact_stocks(session, misses):
+        stock_cache.put(stock.ticker, stock, token)
+        stocks[stock.ticker] = stock
+    return {ticker: stock.to_response() for ticker, stock in stocks.items()}
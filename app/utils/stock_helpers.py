@@ -1,6 +1,31 @@
+import logging
+import uuid
+from functools import partial
+from itertools import batched
+from typing import Iterable, Iterator, Optional
+
 from fastapi import HTTPException, status
-from sqlmodel import Session, select
+from sqlalchemy import and_, false, or_, select as core_select
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, delete, select, update
+from app.core.settings import settings
 from app.models.database import Stocks
+from app.modules.stock.schema import StockResponse
+from app.utils.change_log import CREATE, DELETE, UPDATE, record_stock_change
+from app.utils.content_negotiation import STOCK_COLUMNS
+from app.utils.db_helpers import begin_write, upsert_insert
+from app.utils.read_snapshot import current_read_snapshot
+from app.utils.sharding import ShardRouter, current_shard_router
+from app.utils.sector_summary import (
+    add_to_sector_summary,
+    move_in_sector_summary,
+    remove_from_sector_summary,
+)
+
+logger = logging.getLogger(__name__)
+
+# Stay below SQLite's default limit of 999 bound variables per statement
+IN_CLAUSE_CHUNK_SIZE = 900
 
 
 def normalize_ticker(ticker: str) -> str:
@@ -8,16 +33,82 @@ def normalize_ticker(ticker: str) -> str:
     return ticker.upper().strip()
 
 
+def ticker_exists_error(ticker: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Stock with ticker {ticker} already exists",
+    )
+
+
+def stock_not_found_error(ticker: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Stock with ticker {ticker} not found",
+    )
+
+
+def precondition_failed_error(ticker: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail=f"Stock with ticker {ticker} was changed since it was read",
+    )
+
+
+def stock_etag(stock) -> str:
+    """Strong ETag of a stock row: its id and row version"""
+    return f'"{stock.id.hex}-{stock.version}"'
+
+
+def parse_if_match(header: Optional[str]) -> Optional[list[tuple[uuid.UUID, int]]]:
+    """
+    (id, version) pairs an If-Match header accepts, or None when any version
+    will do (no header, or '*'). Weak and foreign tags never match.
+    """
+    if header is None or header.strip() == "*":
+        return None
+    accepted = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        try:
+            stock_id, version = tag.removeprefix('"').removesuffix('"').split("-")
+            accepted.append((uuid.UUID(hex=stock_id), int(version)))
+        except ValueError:
+            continue
+    return accepted
+
+
+def _matches(if_match: list[tuple[uuid.UUID, int]]):
+    if not if_match:
+        return false()
+    return or_(
+        *(
+            and_(Stocks.id == stock_id, Stocks.version == version)
+            for stock_id, version in if_match
+        )
+    )
+
+
+def _missing_or_changed(session: Session, ticker: str, if_match) -> HTTPException:
+    """The error for a conditional write that matched no row"""
+    if if_match is not None and check_ticker_exists(session, ticker):
+        return precondition_failed_error(ticker)
+    return stock_not_found_error(ticker)
+
+
 def get_stock_or_404(session: Session, ticker: str) -> Stocks:
     """Get stock by ticker or raise 404. Auto-normalizes ticker."""
     normalized = normalize_ticker(ticker)
-    stock = session.exec(select(Stocks).where(Stocks.ticker == normalized)).first()
+    router = current_shard_router()
+    snapshot = current_read_snapshot()
+    if router is not None:
+        stock = router.get(normalized)
+    elif snapshot is not None:
+        stock = snapshot.get(normalized)
+    else:
+        stock = session.exec(select(Stocks).where(Stocks.ticker == normalized)).first()
 
     if not stock:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Stock with ticker {normalized} not found",
-        )
+        raise stock_not_found_error(normalized)
 
     return stock
 
@@ -29,3 +120,199 @@ def check_ticker_exists(session: Session, ticker: str) -> bool:
         session.exec(select(Stocks).where(Stocks.ticker == normalized)).first()
         is not None
     )
+
+
+def select_by_tickers(session: Session, tickers: Iterable[str], *entities) -> list:
+    """
+    Run `select(*entities)` for many (already normalized) tickers using
+    chunked `WHERE ticker IN (...)` queries. Defaults to full Stocks rows.
+    """
+    entities = entities or (Stocks,)
+    rows = []
+    for chunk in batched(tickers, IN_CLAUSE_CHUNK_SIZE):
+        rows.extend(session.exec(select(*entities).where(Stocks.ticker.in_(chunk))))
+    return rows
+
+
+def get_prices_by_tickers(
+    session: Session, tickers: Iterable[str]
+) -> dict[str, float | None]:
+    """current_price per existing ticker, read with Core to skip ORM row overhead"""
+    table = Stocks.__table__
+    conn = session.connection()
+    prices = {}
+    for chunk in batched(tickers, IN_CLAUSE_CHUNK_SIZE):
+        query = core_select(table.c.ticker, table.c.current_price).where(
+            table.c.ticker.in_(chunk)
+        )
+        prices.update(conn.execute(query).all())
+    return prices
+
+
+def get_stock_rows(session: Session, sector: Optional[str] = None) -> Iterator[tuple]:
+    """
+    Every stock (or one sector's) as plain tuples in STOCK_COLUMNS order,
+    sorted by ticker. Read with Core: exports are too large for ORM objects.
+    Rows are streamed (a server-side cursor on Postgres), so consume them
+    before the session closes.
+    """
+    table = Stocks.__table__
+    query = (
+        core_select(*(table.c[column] for column in STOCK_COLUMNS))
+        .order_by(table.c.ticker)
+        .execution_options(yield_per=settings.db_stream_rows)
+    )
+    if sector:
+        query = query.where(table.c.sector == sector)
+    return iter(session.connection().execute(query))
+
+
+def insert_stock(session: Session, stock_data: dict) -> StockResponse:
+    """
+    Insert a stock with one INSERT ... ON CONFLICT DO NOTHING RETURNING, so a
+    concurrent create of the same ticker yields a 400 instead of a 500.
+    Does not commit.
+    """
+    values = Stocks(**stock_data).model_dump()
+    stmt = (
+        upsert_insert(session, Stocks)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=[Stocks.ticker])
+        .returning(Stocks)
+    )
+    stock = session.scalars(stmt).first()
+    if stock is None:
+        raise ticker_exists_error(values["ticker"])
+
+    add_to_sector_summary(session, stock.sector, stock.current_price)
+    record_stock_change(session, stock.ticker, CREATE, stock)
+    return StockResponse.model_validate(stock)
+
+
+def update_stock_row(
+    session: Session,
+    ticker: str,
+    update_data: dict,
+    if_match: Optional[list[tuple[uuid.UUID, int]]] = None,
+) -> StockResponse:
+    """
+    Apply a partial update with a single UPDATE ... RETURNING that also bumps
+    the row version. With `if_match` (see parse_if_match) the statement only
+    matches those versions, so a concurrent writer gets 412 rather than
+    silently overwriting. The old sector and price are read first (locking
+    the row, or on SQLite the database via begin_write) only when the sector
+    summary needs them. Does not commit.
+    """
+    condition = Stocks.ticker == ticker
+    if if_match is not None:
+        condition = and_(condition, _matches(if_match))
+
+    if not update_data:
+        if if_match is None:
+            return StockResponse.model_validate(get_stock_or_404(session, ticker))
+        stock = session.exec(select(Stocks).where(condition)).first()
+        if stock is None:
+            raise _missing_or_changed(session, ticker, if_match)
+        return StockResponse.model_validate(stock)
+
+    # Before the first read: a deferred SQLite transaction that reads and then
+    # writes gets SQLITE_BUSY from a concurrent writer, which busy_timeout
+    # does not retry
+    begin_write(session)
+    old = None
+    if update_data.keys() & {"sector", "current_price"}:
+        old = session.exec(
+            select(Stocks.sector, Stocks.current_price)
+            .where(condition)
+            .with_for_update()
+        ).first()
+        if old is None:
+            raise _missing_or_changed(session, ticker, if_match)
+
+    stmt = (
+        update(Stocks)
+        .where(condition)
+        .values(**update_data, version=Stocks.version + 1)
+        .returning(Stocks)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    if "ticker" in update_data:
+        # A rename can hit the unique index; the savepoint keeps the failure
+        # from poisoning the surrounding transaction
+        try:
+            with session.begin_nested():
+                stock = session.scalars(stmt).first()
+        except IntegrityError:
+            raise ticker_exists_error(update_data["ticker"])
+    else:
+        stock = session.scalars(stmt).first()
+    if stock is None:
+        raise _missing_or_changed(session, ticker, if_match)
+
+    if old is not None:
+        move_in_sector_summary(session, tuple(old), (stock.sector, stock.current_price))
+    if stock.ticker != ticker:
+        # A rename: mirrors keyed by ticker drop the old one
+        record_stock_change(session, ticker, DELETE)
+    record_stock_change(session, stock.ticker, UPDATE, stock)
+    return StockResponse.model_validate(stock)
+
+
+def delete_stock_row(
+    session: Session,
+    ticker: str,
+    if_match: Optional[list[tuple[uuid.UUID, int]]] = None,
+) -> Stocks:
+    """
+    Delete with a single DELETE ... RETURNING, only matching the `if_match`
+    versions when given, and return the deleted row. Does not commit.
+    """
+    condition = Stocks.ticker == ticker
+    if if_match is not None:
+        condition = and_(condition, _matches(if_match))
+    stmt = (
+        delete(Stocks)
+        .where(condition)
+        .returning(Stocks)
+        .execution_options(synchronize_session=False)
+    )
+    row = session.scalars(stmt).first()
+    if row is None:
+        raise _missing_or_changed(session, ticker, if_match)
+
+    remove_from_sector_summary(session, row.sector, row.current_price)
+    record_stock_change(session, ticker, DELETE)
+    return row
+
+
+def move_stock_row(
+    router: ShardRouter,
+    ticker: str,
+    update_data: dict,
+    if_match: Optional[list[tuple[uuid.UUID, int]]] = None,
+) -> StockResponse:
+    """
+    A rename to a ticker owned by another shard: delete the stock on its
+    shard, insert the updated row on the new one. The delete commits only
+    after the insert has, so a failed insert (e.g. a taken ticker) leaves the
+    stock where it was; if that last commit fails, the inserted copy is
+    deleted again.
+    """
+    new_ticker = update_data["ticker"]
+    with Session(router.engines[router.shard_of(ticker)]) as source:
+        begin_write(source)
+        old = delete_stock_row(source, ticker, if_match)
+        stock_data = {**old.model_dump(), **update_data, "version": old.version + 1}
+        moved = router.write(new_ticker, partial(insert_stock, stock_data=stock_data))
+        try:
+            source.commit()
+        except Exception:
+            logger.exception(
+                "Moving %s to %s failed; deleting the copy on %s",
+                ticker,
+                new_ticker,
+                router.shard_of(new_ticker),
+            )
+            router.write(new_ticker, partial(delete_stock_row, ticker=new_ticker))
+            raise
+    return moved
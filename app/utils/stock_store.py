@@ -0,0 +1,121 @@
+import sys
+import uuid
+from itertools import batched
+from typing import Iterable, Optional
+
+from sqlalchemy import select as core_select
+from sqlmodel import Session
+
+from app.models.database import Stocks
+from app.modules.stock.schema import StockResponse
+from app.utils.stock_helpers import IN_CLAUSE_CHUNK_SIZE
+
+# Marks a description not read from the database yet
+UNLOADED = object()
+
+
+class CompactStock:
+    """
+    A stock as held by the in-process caches: a few slots instead of an ORM
+    instance with its instrumentation state, or a pydantic model with its
+    __dict__ and field sets. The id is kept as its 16 raw bytes, sectors are
+    interned so all stocks of a sector share one string, and the description
+    (by far the largest field) is only loaded when a response needs it.
+    """
+
+    __slots__ = (
+        "_id",
+        "ticker",
+        "name",
+        "sector",
+        "current_price",
+        "version",
+        "description",
+    )
+
+    def __init__(
+        self,
+        id: uuid.UUID,
+        ticker: str,
+        name: str,
+        sector: Optional[str],
+        current_price: Optional[float],
+        version: int,
+        description=UNLOADED,
+    ):
+        self._id = id.bytes
+        self.ticker = ticker
+        self.name = name
+        self.sector = None if sector is None else sys.intern(sector)
+        self.current_price = current_price
+        self.version = version
+        self.description = description
+
+    @property
+    def id(self) -> uuid.UUID:
+        return uuid.UUID(bytes=self._id)
+
+    @property
+    def description_loaded(self) -> bool:
+        return self.description is not UNLOADED
+
+    @classmethod
+    def from_stock(cls, stock) -> "CompactStock":
+        """From a Stocks row or StockResponse"""
+        return cls(
+            stock.id,
+            stock.ticker,
+            stock.name,
+            stock.sector,
+            stock.current_price,
+            stock.version,
+            stock.description,
+        )
+
+    def to_response(self) -> StockResponse:
+        if not self.description_loaded:
+            raise ValueError(f"Description of {self.ticker} is not loaded")
+        return StockResponse.model_validate(self)
+
+
+def load_compact_stocks(
+    session: Session, tickers: Iterable[str], with_description: bool = True
+) -> list[CompactStock]:
+    """
+    Stocks for many (normalized) tickers, read with Core in chunked IN queries.
+    Unknown tickers are left out.
+    """
+    table = Stocks.__table__
+    columns = [
+        table.c.id,
+        table.c.ticker,
+        table.c.name,
+        table.c.sector,
+        table.c.current_price,
+        table.c.version,
+    ]
+    if with_description:
+        columns.append(table.c.description)
+
+    conn = session.connection()
+    stocks = []
+    for chunk in batched(tickers, IN_CLAUSE_CHUNK_SIZE):
+        query = core_select(*columns).where(table.c.ticker.in_(chunk))
+        stocks.extend(CompactStock(*row) for row in conn.execute(query))
+    return stocks
+
+
+def read_descriptions(
+    session: Session, tickers: Iterable[str]
+) -> dict[str, Optional[str]]:
+    """Descriptions of many tickers; tickers no longer in the table are left out"""
+    table = Stocks.__table__
+    conn = session.connection()
+    descriptions = {}
+    for chunk in batched(tickers, IN_CLAUSE_CHUNK_SIZE):
+        query = core_select(table.c.ticker, table.c.description).where(
+            table.c.ticker.in_(chunk)
+        )
+        for ticker, description in conn.execute(query):
+            descriptions[ticker] = description
+    return descriptions
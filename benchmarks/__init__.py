@@ -0,0 +1 @@
+# Benchmark suite for assignment-1 project
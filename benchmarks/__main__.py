@@ -0,0 +1,27 @@
+"""
+Run every benchmark module in this package
+
+    python -m benchmarks              # all benchmarks
+    python -m benchmarks pagination   # only bench_pagination.py
+"""
+
+import importlib
+import pkgutil
+import sys
+
+import benchmarks
+
+
+def main():
+    selected = set(sys.argv[1:])
+    for module in pkgutil.iter_modules(benchmarks.__path__):
+        if not module.name.startswith("bench_"):
+            continue
+        if selected and module.name.removeprefix("bench_") not in selected:
+            continue
+        print(f"\n=== {module.name} ===")
+        importlib.import_module(f"benchmarks.{module.name}").main()
+
+
+if __name__ == "__main__":
+    main()
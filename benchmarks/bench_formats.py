@@ -0,0 +1,37 @@
+"""
+Encode time versus bytes on the wire for the stock export in each format
+and content coding
+"""
+
+from app.core.compression import Compressor, brotli
+from app.models.generate_data import generate_stocks
+from app.utils.content_negotiation import OFFERED, STOCK_COLUMNS, render_stocks
+from benchmarks.common import BENCH_STOCKS, measure, report
+
+ENCODINGS = [None, "gzip"] + (["br"] if brotli is not None else [])
+
+
+def main():
+    rows = [
+        tuple(stock[column] for column in STOCK_COLUMNS)
+        for stock in generate_stocks(BENCH_STOCKS, seed=42)
+    ]
+    print(f"{len(rows)} stocks")
+
+    for media_type in OFFERED:
+        for encoding in ENCODINGS:
+            sizes = []
+
+            def encode():
+                body = render_stocks(media_type, rows).body
+                if encoding is not None:
+                    body = Compressor(encoding, 6, 4).compress(body, final=True)
+                sizes.append(len(body))
+
+            stats = measure(encode, repeat=5)
+            label = f"{media_type.split('/')[-1]} + {encoding or 'identity'}"
+            report(label, {"median_ms": stats["median_ms"], "kb": sizes[0] / 1024})
+
+
+if __name__ == "__main__":
+    main()
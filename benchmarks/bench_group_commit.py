@@ -0,0 +1,65 @@
+"""
+Stock inserts per second at different concurrency levels, committing each
+write on its own versus through the group-commit writer
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import count
+
+from sqlmodel import Session
+
+from app.models.generate_data import make_ticker
+from app.utils.group_commit import GroupCommitWriter
+from app.utils.stock_helpers import insert_stock
+from benchmarks.common import report, temp_engine
+
+WRITES = 2_000
+CONCURRENCY = (1, 8, 32, 128)
+# Let direct writers queue for the lock instead of failing under contention
+CONNECT_ARGS = {"timeout": 60}
+
+
+def stock(index: int) -> dict:
+    return {"ticker": make_ticker(index), "name": "Bench", "current_price": 100.0}
+
+
+def run(concurrency: int, write) -> dict[str, float]:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(write, range(WRITES)))
+    elapsed = time.perf_counter() - started
+    return {"writes_per_s": WRITES / elapsed, "elapsed_ms": elapsed * 1000}
+
+
+def main():
+    tickers = count()
+    for concurrency in CONCURRENCY:
+        with temp_engine(connect_args=CONNECT_ARGS) as engine:
+
+            def direct(_):
+                with Session(engine) as session:
+                    insert_stock(session, stock(next(tickers)))
+                    session.commit()
+
+            report(f"direct, {concurrency} concurrent", run(concurrency, direct))
+
+        with temp_engine(connect_args=CONNECT_ARGS) as engine:
+            writer = GroupCommitWriter(partial(Session, engine), 0.002, 100)
+            writer.start()
+
+            def grouped(_):
+                operation = partial(insert_stock, stock_data=stock(next(tickers)))
+                writer.submit(operation).result()
+
+            try:
+                report(
+                    f"group commit, {concurrency} concurrent", run(concurrency, grouped)
+                )
+            finally:
+                writer.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Bytes per cached stock: ORM instances versus the pydantic responses the
+cache used to hold versus CompactStock
+"""
+
+import gc
+import tracemalloc
+
+from sqlmodel import Session, select
+
+from app.models.database import Stocks
+from app.models.generate_data import generate_dataset
+from app.modules.stock.schema import StockResponse
+from app.utils.stock_store import load_compact_stocks
+from benchmarks.common import BENCH_STOCKS, report, temp_engine
+
+
+def allocated(build) -> int:
+    """Bytes still allocated by build() while its result is alive"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    with temp_engine() as engine:
+        generate_dataset(engine, stocks=BENCH_STOCKS, seed=42)
+        with Session(engine) as session:
+            tickers = list(session.exec(select(Stocks.ticker)))
+        print(f"{len(tickers)} stocks")
+
+        def orm():
+            # The session's identity map keeps the instances and their state
+            session = Session(engine)
+            return session, session.exec(select(Stocks)).all()
+
+        def responses():
+            with Session(engine) as session:
+                rows = session.exec(select(Stocks)).all()
+                return [StockResponse.model_validate(row) for row in rows]
+
+        def compact(with_description: bool):
+            def build():
+                with Session(engine) as session:
+                    return load_compact_stocks(session, tickers, with_description)
+
+            return build
+
+        cases = {
+            "Stocks (ORM)": orm,
+            "StockResponse": responses,
+            "CompactStock": compact(True),
+            "CompactStock without description": compact(False),
+        }
+        for label, build in cases.items():
+            size = allocated(build)
+            report(label, {"bytes_per_stock": size / len(tickers)})
+
+
+if __name__ == "__main__":
+    main()
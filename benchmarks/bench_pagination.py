@@ -0,0 +1,39 @@
+"""
+Pagination and sector filter latency on a synthetic dataset
+
+    BENCH_STOCKS=1000000 python -m benchmarks pagination
+"""
+
+import time
+
+from sqlmodel import Session, select
+
+from app.models.database import Stocks
+from app.models.generate_data import generate_dataset
+from app.utils.pagination import paginate_query
+from benchmarks.common import BENCH_STOCKS, measure, report, temp_engine
+
+
+def main():
+    with temp_engine() as engine:
+        started = time.perf_counter()
+        generate_dataset(engine, stocks=BENCH_STOCKS, seed=42)
+        elapsed = time.perf_counter() - started
+        print(f"generated {BENCH_STOCKS} stocks in {elapsed:.2f}s")
+
+        last_page = max(1, BENCH_STOCKS // 10)
+        with Session(engine) as session:
+            for page in (1, last_page // 2, last_page):
+                stats = measure(
+                    lambda: paginate_query(session, select(Stocks), page, 10)
+                )
+                report(f"page {page}", stats)
+
+            for sector in ("Banking", "Transportation"):
+                query = select(Stocks).where(Stocks.sector == sector)
+                stats = measure(lambda: paginate_query(session, query, 1, 10))
+                report(f"sector={sector} page 1", stats)
+
+
+if __name__ == "__main__":
+    main()
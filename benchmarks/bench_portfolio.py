@@ -0,0 +1,36 @@
+"""
+POST /portfolio/value latency for large portfolios
+"""
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.main import app
+from app.models.engine import db_session
+from app.models.generate_data import generate_dataset, make_ticker
+from benchmarks.common import BENCH_STOCKS, measure, report, temp_engine
+
+
+def main():
+    with temp_engine() as engine:
+        generate_dataset(engine, stocks=BENCH_STOCKS, seed=42)
+
+        def session_override():
+            with Session(engine) as session:
+                yield session
+
+        app.dependency_overrides[db_session] = session_override
+        client = TestClient(app)
+        try:
+            for size in (100, 1_000, 10_000):
+                holdings = {make_ticker(i * 7 % BENCH_STOCKS): 10 for i in range(size)}
+                stats = measure(
+                    lambda: client.post("/portfolio/value", json=holdings), repeat=10
+                )
+                report(f"{size} positions", stats)
+        finally:
+            app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Cold-start cost: importing app.main, running the lifespan and the first requests
+
+Every measurement runs in a fresh interpreter so module caches don't hide
+import time.
+"""
+
+import json
+import subprocess
+import sys
+
+from benchmarks.common import report
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    t2 = time.perf_counter()
+    client.get("/openapi.json")
+    t3 = time.perf_counter()
+    client.get("/scalar")
+    t4 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "lifespan_ms": (t2 - t1) * 1000,
+    "first_openapi_ms": (t3 - t2) * 1000,
+    "first_scalar_ms": (t4 - t3) * 1000,
+}))
+"""
+
+
+def main(repeat: int = 5):
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE], capture_output=True, text=True, check=True
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    for key in runs[0]:
+        samples = sorted(run[key] for run in runs)
+        report(key, {"median_ms": samples[len(samples) // 2], "min_ms": samples[0]})
+
+
+if __name__ == "__main__":
+    main()
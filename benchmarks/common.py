@@ -0,0 +1,46 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+from sqlmodel import SQLModel, create_engine
+
+BENCH_STOCKS = int(os.getenv("BENCH_STOCKS", "100000"))
+
+
+@contextmanager
+def temp_engine(**kwargs):
+    """File-backed SQLite database in a temp dir, with all tables created"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db", **kwargs)
+        SQLModel.metadata.create_all(engine)
+        try:
+            yield engine
+        finally:
+            engine.dispose()
+
+
+def measure(fn: Callable, repeat: int = 20) -> dict[str, float]:
+    """Run fn `repeat` times and return timing stats in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples),
+        "p95_ms": samples[int(len(samples) * 0.95) - 1],
+        "min_ms": samples[0],
+    }
+
+
+def report(label: str, stats: dict[str, float]):
+    values = "  ".join(f"{key}={value:8.2f}" for key, value in stats.items())
+    print(f"{label:<40} {values}")
@@ -17,16 +17,32 @@ git pull origin master
 # Activate virtual environment and sync dependencies
 echo "📦 Installing dependencies..."
 source .venv/bin/activate
-uv sync
+uv sync --extra formats
 
 # Run database migrations
 echo "🗄️  Running database migrations..."
 alembic upgrade head
 
-# Restart the application service
+# Restart the application service. On SIGTERM the old process stops
+# accepting connections and finishes its in-flight requests first
 echo "♻️  Restarting application service..."
 sudo systemctl restart fastapi-app
 
+# Wait until the new process has warmed up before declaring success
+echo "⏳ Waiting for the app to report ready..."
+HEALTH_URL="${HEALTH_URL:-http://127.0.0.1:8000/health/ready}"
+for _ in $(seq 1 60); do
+    if curl -fsS "$HEALTH_URL" > /dev/null 2>&1; then
+        break
+    fi
+    sleep 1
+done
+if ! curl -fsS "$HEALTH_URL" > /dev/null; then
+    echo "❌ App did not become ready at $HEALTH_URL"
+    sudo systemctl status fastapi-app --no-pager
+    exit 1
+fi
+
 # Reload nginx
 echo "🔄 Reloading nginx..."
 sudo systemctl reload nginx
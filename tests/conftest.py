@@ -2,16 +2,32 @@
 Pytest configuration and fixtures for the test suite
 """
 
+import os
+import shutil
+import subprocess
+import time
+import uuid
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import make_url, text
 from sqlmodel import Session, SQLModel, create_engine
 from sqlmodel.pool import StaticPool
+from app.core.health import readiness
+from app.core.rate_limit import reset_rate_limits
 from app.main import app
-from app.models.engine import db_session
+from app.models.engine import db_session, engine_options
+from app.models.generate_data import generate_dataset
+from app.modules.jobs.tasks import job_runner
+from app.utils.change_notify import change_notifier
+from app.utils.price_board import price_board
+from app.utils.stock_cache import stock_cache
 
+SCALE_STOCKS = int(os.getenv("SCALE_STOCKS", "100000"))
 
-@pytest.fixture(name="session")
-def session_fixture():
+
+@pytest.fixture(name="engine")
+def engine_fixture():
     """
     Create a fresh in-memory SQLite database for each test.
     This ensures tests are isolated and don't affect each other.
@@ -22,12 +38,19 @@ def session_fixture():
         poolclass=StaticPool,
     )
     SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="session")
+def session_fixture(engine):
+    """Session bound to the per-test in-memory database"""
     with Session(engine) as session:
         yield session
 
 
 @pytest.fixture(name="client")
-def client_fixture(session: Session):
+def client_fixture(engine, session: Session):
     """
     Create a test client with dependency override for database session.
     This allows us to use the in-memory test database instead of the real one.
@@ -37,8 +60,15 @@ def client_fixture(session: Session):
         return session
 
     app.dependency_overrides[db_session] = get_session_override
+    stock_cache.reset()
+    price_board.reset()
+    change_notifier.reset(lambda: Session(engine))
+    reset_rate_limits()
+    readiness.reset()
+    job_runner.reset(engine)
     client = TestClient(app)
     yield client
+    job_runner.stop()
     app.dependency_overrides.clear()
 
 
@@ -89,3 +119,101 @@ def sample_stocks_list():
             "current_price": 5500.0,
         },
     ]
+
+
+@pytest.fixture
+def large_dataset(engine):
+    """
+    Synthetic dataset for tests marked `scale` (SCALE_STOCKS stocks).
+    Returns the row counts per table.
+    """
+    return generate_dataset(engine, stocks=SCALE_STOCKS, seed=42)
+
+
+@pytest.fixture(scope="session")
+def postgres_url(tmp_path_factory):
+    """
+    URL of a throwaway Postgres server for the session: TEST_POSTGRES_URL if
+    set, else a server started with initdb/pg_ctl in a temp directory, else a
+    docker container. Tests needing it are skipped when none is available.
+    """
+    pytest.importorskip("psycopg")
+    if os.getenv("TEST_POSTGRES_URL"):
+        yield os.environ["TEST_POSTGRES_URL"]
+    elif shutil.which("pg_ctl") and shutil.which("initdb") and os.geteuid() != 0:
+        data = tmp_path_factory.mktemp("pgdata")
+        subprocess.run(
+            ["initdb", "-D", data, "-U", "postgres", "-A", "trust", "-E", "UTF8"],
+            check=True,
+            capture_output=True,
+        )
+        # Unix socket only, in the data directory: no port to collide on
+        options = f"-k {data} -c listen_addresses=''"
+        subprocess.run(
+            ["pg_ctl", "-D", data, "-l", data / "log", "-o", options, "-w", "start"],
+            check=True,
+            capture_output=True,
+        )
+        try:
+            yield f"postgresql+psycopg://postgres@/postgres?host={data}"
+        finally:
+            subprocess.run(
+                ["pg_ctl", "-D", data, "-m", "immediate", "-w", "stop"],
+                capture_output=True,
+            )
+    elif shutil.which("docker"):
+        container = subprocess.run(
+            ["docker", "run", "-d", "--rm", "-p", "127.0.0.1::5432"]
+            + ["-e", "POSTGRES_HOST_AUTH_METHOD=trust", "postgres:16-alpine"],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+        try:
+            address = subprocess.run(
+                ["docker", "port", container, "5432/tcp"],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.split()[0]
+            url = f"postgresql+psycopg://postgres@{address}/postgres"
+            _wait_for_postgres(url)
+            yield url
+        finally:
+            subprocess.run(["docker", "stop", container], capture_output=True)
+    else:
+        pytest.skip("No Postgres: set TEST_POSTGRES_URL or install pg_ctl or docker")
+
+
+def _wait_for_postgres(url: str, timeout: float = 30.0):
+    engine = create_engine(url)
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                with engine.connect():
+                    return
+            except Exception:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.5)
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture
+def postgres_engine(postgres_url):
+    """Engine on a fresh database of the throwaway server, with the app's tables"""
+    name = f"test_{uuid.uuid4().hex}"
+    admin = create_engine(postgres_url, isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text(f"CREATE DATABASE {name}"))
+
+    url = make_url(postgres_url).set(database=name)
+    engine = create_engine(url, **engine_options(postgres_url))
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+    with admin.connect() as conn:
+        conn.execute(text(f"DROP DATABASE {name} WITH (FORCE)"))
+    admin.dispose()
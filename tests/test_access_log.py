@@ -0,0 +1,71 @@
+"""
+Tests for the structured access log
+"""
+
+import io
+import json
+import logging
+import random
+
+import pytest
+
+from app.core.access_log import AccessLog, access_log
+
+
+@pytest.fixture
+def access_lines():
+    """Read back the JSON lines logged while the test runs"""
+    stream = io.StringIO()
+    access_log.start(stream)
+
+    def read():
+        access_log.stop()
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    yield read
+    access_log.stop()
+
+
+@pytest.mark.integration
+class TestAccessLog:
+    """Test the access log lines written for requests"""
+
+    def test_logs_route_status_and_counters(
+        self, client, sample_stock_data, access_lines, monkeypatch
+    ):
+        """Test a sampled request's line: route template, DB and cache counts"""
+        client.post("/stocks/", json=sample_stock_data)
+        monkeypatch.setattr(random, "random", lambda: 0.0)
+        client.get("/stocks/BBCA")
+        client.get("/stocks/BBCA")
+
+        first, second = [
+            line for line in access_lines() if line["path"] == "/stocks/BBCA"
+        ]
+        assert first["method"] == "GET"
+        assert first["route"] == "/stocks/{ticker}"
+        assert first["status"] == 200
+        assert first["duration_ms"] > 0
+        assert first["db_statements"] >= 1
+        assert (first["cache_hits"], first["cache_misses"]) == (0, 1)
+        assert (second["cache_hits"], second["cache_misses"]) == (1, 0)
+        assert first["sample_rate"] == pytest.approx(0.1)
+
+    def test_errors_are_always_logged(self, client, access_lines, monkeypatch):
+        """Test sampling only skips successful requests"""
+        monkeypatch.setattr(random, "random", lambda: 0.99)
+        client.get("/stocks/?page_size=1")
+        client.get("/stocks/NOPE")
+
+        lines = access_lines()
+        assert [(line["path"], line["status"]) for line in lines] == [
+            ("/stocks/NOPE", 404)
+        ]
+        assert lines[0]["sample_rate"] == 1.0
+
+    def test_full_queue_drops_lines(self):
+        """Test a full queue drops records instead of blocking"""
+        log = AccessLog(queue_size=1)
+        for _ in range(3):
+            log.handler.handle(logging.makeLogRecord({"msg": "access"}))
+        assert log.dropped == 2
@@ -2,9 +2,17 @@
 Tests for authentication endpoints
 """
 
+import bcrypt
 import pytest
 from fastapi.testclient import TestClient
 
+from sqlmodel import Session, select
+
+from app.core.rate_limit import FailureLockout
+from app.core.settings import settings
+from app.models.database import User
+from app.modules.auth.credential_cache import CredentialCache, credential_cache
+
 
 @pytest.mark.unit
 class TestLoginEndpoint:
@@ -55,3 +63,179 @@ class TestLoginEndpoint:
             "/login", data="not a json", headers={"Content-Type": "application/json"}
         )
         assert response.status_code == 422
+
+
+@pytest.fixture
+def registered_user(client: TestClient):
+    """A user registered through /auth/register"""
+    user = {"name": "Admin", "email": "admin@admin.com", "password": "admin123"}
+    client.post("/auth/register", json=user)
+    return user
+
+
+@pytest.fixture
+def checkpw_calls(monkeypatch):
+    """Count bcrypt verifications"""
+    calls = []
+    checkpw = bcrypt.checkpw
+
+    def counting_checkpw(password, hashed):
+        calls.append(hashed)
+        return checkpw(password, hashed)
+
+    monkeypatch.setattr(bcrypt, "checkpw", counting_checkpw)
+    return calls
+
+
+@pytest.mark.unit
+class TestLoginLockout:
+    """Test cases for brute-force protection on /auth/login"""
+
+    def login(self, client: TestClient, email: str, password: str):
+        return client.post("/auth/login", json={"email": email, "password": password})
+
+    def test_unknown_email_still_runs_bcrypt(self, client: TestClient, checkpw_calls):
+        """Test an unknown email costs a bcrypt check like a wrong password"""
+        response = self.login(client, "nobody@example.com", "whatever")
+
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Invalid Credentials!"
+        assert len(checkpw_calls) == 1
+
+    def test_lockout_skips_bcrypt(
+        self, client: TestClient, registered_user, checkpw_calls
+    ):
+        """Test a locked account is rejected before any bcrypt work"""
+        for _ in range(5):
+            assert (
+                self.login(client, registered_user["email"], "wrong").status_code == 401
+            )
+        checkpw_calls.clear()
+
+        response = self.login(client, registered_user["email"], "admin123")
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert checkpw_calls == []
+
+    def test_unknown_emails_lock_out_too(self, client: TestClient):
+        """Test lockout does not reveal whether an account exists"""
+        for _ in range(5):
+            assert self.login(client, "nobody@example.com", "x").status_code == 401
+
+        assert self.login(client, "nobody@example.com", "x").status_code == 429
+
+    def test_overlong_password_is_a_failed_login(
+        self, client: TestClient, registered_user
+    ):
+        """Test a password over bcrypt's 72 bytes is a 401 that counts to lockout"""
+        email = registered_user["email"]
+        for _ in range(5):
+            assert self.login(client, email, "x" * 80).status_code == 401
+        assert self.login(client, email, "x" * 80).status_code == 429
+
+        response = self.login(client, "nobody@example.com", "x" * 80)
+        assert response.status_code == 401
+
+    def test_success_resets_failures(self, client: TestClient, registered_user):
+        """Test a successful login clears the account's failure count"""
+        email = registered_user["email"]
+        for _ in range(4):
+            self.login(client, email, "wrong")
+        assert self.login(client, email, "admin123").status_code == 200
+
+        assert self.login(client, email, "wrong").status_code == 401
+
+
+@pytest.mark.unit
+class TestFailureLockout:
+    """Test cases for FailureLockout"""
+
+    def test_lockout_doubles(self, monkeypatch):
+        """Test the lockout starts at base_delay and doubles up to max_delay"""
+        now = [1000.0]
+        monkeypatch.setattr("app.core.rate_limit.time.monotonic", lambda: now[0])
+        lockout = FailureLockout(threshold=2, base_delay=1, max_delay=3, window=60)
+
+        lockout.record_failure("a")
+        assert lockout.locked_for("a") == 0
+        lockout.record_failure("a")
+        assert lockout.locked_for("a") == 1
+        lockout.record_failure("a")
+        assert lockout.locked_for("a") == 2
+        lockout.record_failure("a")
+        assert lockout.locked_for("a") == 3
+
+    def test_window_forgets_old_failures(self, monkeypatch):
+        """Test failures older than the window no longer count"""
+        now = [1000.0]
+        monkeypatch.setattr("app.core.rate_limit.time.monotonic", lambda: now[0])
+        lockout = FailureLockout(threshold=2, base_delay=1, max_delay=3, window=60)
+
+        lockout.record_failure("a")
+        now[0] += 61
+        lockout.record_failure("a")
+        assert lockout.locked_for("a") == 0
+
+
+@pytest.mark.unit
+class TestCredentialCache:
+    """Test cases for the login fast path and transparent rehash"""
+
+    def login(self, client: TestClient, user: dict, password: str = None):
+        return client.post(
+            "/auth/login",
+            json={"email": user["email"], "password": password or user["password"]},
+        )
+
+    def test_repeat_login_skips_bcrypt(
+        self, client: TestClient, registered_user, checkpw_calls
+    ):
+        """Test a second login within the TTL is served from the cache"""
+        assert self.login(client, registered_user).status_code == 200
+        assert self.login(client, registered_user).status_code == 200
+
+        assert len(checkpw_calls) == 1
+
+    def test_wrong_password_is_not_cached(
+        self, client: TestClient, registered_user, checkpw_calls
+    ):
+        """Test a cached login does not let a different password through"""
+        assert self.login(client, registered_user).status_code == 200
+        assert self.login(client, registered_user, "wrong").status_code == 401
+
+        assert len(checkpw_calls) == 2
+
+    def test_entries_hold_no_plaintext(self):
+        """Test only an HMAC digest is stored"""
+        cache = CredentialCache(ttl=60, max_entries=10)
+        cache.add("a@example.com", "secret", "$2b$12$hash")
+
+        digest, _ = cache._entries["a@example.com"]
+        assert b"secret" not in digest
+        assert cache.verify("a@example.com", "secret", "$2b$12$hash")
+        assert not cache.verify("a@example.com", "secret", "$2b$12$other")
+
+    def test_entries_expire(self):
+        """Test entries stop matching after the TTL"""
+        cache = CredentialCache(ttl=0, max_entries=10)
+        cache.add("a@example.com", "secret", "hash")
+
+        assert not cache.verify("a@example.com", "secret", "hash")
+
+    def test_old_cost_is_rehashed(
+        self, client: TestClient, session: Session, monkeypatch
+    ):
+        """Test a hash made with another cost factor is replaced on login"""
+        monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+        user = {"name": "Old", "email": "old@example.com", "password": "secret"}
+        client.post("/auth/register", json=user)
+
+        monkeypatch.setattr(settings, "bcrypt_rounds", 5)
+        credential_cache.clear()
+        assert self.login(client, user).status_code == 200
+
+        stored = session.exec(
+            select(User.password).where(User.email == user["email"])
+        ).one()
+        assert stored.startswith("$2b$05$")
+        assert self.login(client, user).status_code == 200
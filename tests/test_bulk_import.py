@@ -0,0 +1,200 @@
+"""
+Tests for bulk user import
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.rate_limit import bulk_import_limiter
+from app.core.settings import settings
+from app.models.database import User
+from app.modules.auth.bulk_import import (
+    PARALLEL_HASH_MIN,
+    UserRowParser,
+    hash_passwords,
+    shutdown_hash_pool,
+)
+from app.modules.auth.utils import verify_password
+
+
+@pytest.fixture(autouse=True)
+def fast_hashing(monkeypatch):
+    """Cheap bcrypt cost and a small hashing pool"""
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+    monkeypatch.setattr(settings, "password_hash_workers", 2)
+    yield
+    shutdown_hash_pool()
+
+
+def csv_body(rows: list[tuple[str, str, str]]) -> str:
+    lines = ["name,email,password"] + [",".join(row) for row in rows]
+    return "\n".join(lines) + "\n"
+
+
+@pytest.mark.unit
+class TestHashPasswords:
+    """Test cases for parallel password hashing"""
+
+    def test_pool_hashes_match(self):
+        """Test hashes from the process pool verify and keep their order"""
+        passwords = [f"secret{i}" for i in range(PARALLEL_HASH_MIN + 4)]
+        hashes = hash_passwords(passwords)
+
+        assert len(hashes) == len(passwords)
+        assert all(h.startswith("$2b$04$") for h in hashes)
+        assert verify_password(passwords[0], hashes[0])
+        assert verify_password(passwords[-1], hashes[-1])
+
+
+@pytest.mark.unit
+class TestUserRowParser:
+    """Test cases for UserRowParser"""
+
+    def test_csv_across_chunks(self):
+        """Test the CSV header is remembered between fed chunks"""
+        parser = UserRowParser("csv")
+        first = list(parser.parse(["name,email,password", "A,a@x.com,pw"]))
+        second = list(parser.parse(["B,b@x.com,pw", ""]))
+
+        assert [(line, row.email) for line, row, _ in first + second] == [
+            (2, "a@x.com"),
+            (3, "b@x.com"),
+        ]
+
+    def test_invalid_rows_are_reported(self):
+        """Test bad JSON and missing fields become per-line errors"""
+        parser = UserRowParser("ndjson")
+        results = list(parser.parse(["not json", '{"name": "A", "email": "a@x"}']))
+
+        assert [(line, row) for line, row, _ in results] == [(1, None), (2, None)]
+        assert "password" in results[1][2]
+
+    def test_quoted_newline(self):
+        """Test a quoted CSV field may span lines, fed in separate chunks"""
+        parser = UserRowParser("csv")
+        first = list(parser.parse(["name,email,password", '"Line one']))
+        second = list(parser.parse(['line two",a@x.com,pw', "B,b@x.com,pw"]))
+
+        assert first == []
+        assert [(line, row.name) for line, row, _ in second] == [
+            (2, "Line one\nline two"),
+            (4, "B"),
+        ]
+
+    def test_unterminated_quote(self):
+        """Test a quoted field left open at the end is reported at its line"""
+        parser = UserRowParser("csv")
+        assert list(parser.parse(["name,email,password", '"A,a@x.com,pw'])) == []
+
+        assert list(parser.close()) == [
+            (2, None, "Invalid row: unterminated quoted field")
+        ]
+
+    def test_overlong_password_is_reported(self):
+        """Test a password over bcrypt's 72 bytes is a row error, not a crash"""
+        parser = UserRowParser("csv")
+        results = list(parser.parse(["name,email,password", f"A,a@x.com,{'é' * 40}"]))
+
+        assert [(line, row) for line, row, _ in results] == [(2, None)]
+        assert results[0][2].startswith("password:")
+
+
+@pytest.mark.integration
+class TestBulkImportEndpoint:
+    """Test cases for POST /auth/users/bulk"""
+
+    def test_csv_import(self, client: TestClient, session: Session):
+        """Test a CSV import creates users and reports duplicates per row"""
+        client.post(
+            "/auth/register",
+            json={"name": "Old", "email": "taken@x.com", "password": "pw"},
+        )
+        rows = [(f"User {i}", f"user{i}@x.com", f"pw{i}") for i in range(20)]
+        rows += [("Dup", "user3@x.com", "pw"), ("Taken", "taken@x.com", "pw")]
+        body = csv_body(rows) + "Broken,row\n"
+
+        response = client.post(
+            "/auth/users/bulk", content=body, headers={"Content-Type": "text/csv"}
+        )
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result["created"] == 20
+        assert [(e["line"], e["email"]) for e in result["errors"]] == [
+            (22, "user3@x.com"),
+            (23, "taken@x.com"),
+            (24, None),
+        ]
+        password = session.exec(
+            select(User.password).where(User.email == "user3@x.com")
+        ).one()
+        assert verify_password("pw3", password)
+
+    def test_ndjson_import(self, client: TestClient):
+        """Test an NDJSON import"""
+        body = "\n".join(
+            json.dumps({"name": "A", "email": f"a{i}@x.com", "password": "pw"})
+            for i in range(3)
+        )
+
+        response = client.post(
+            "/auth/users/bulk",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+        assert response.json() == {"created": 3, "errors": []}
+
+    def test_overlong_password_row(self, client: TestClient):
+        """Test an overlong password fails its row and the rest are imported"""
+        body = csv_body([("A", "a@x.com", "pw"), ("B", "b@x.com", "x" * 80)])
+
+        response = client.post(
+            "/auth/users/bulk", content=body, headers={"Content-Type": "text/csv"}
+        )
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result["created"] == 1
+        assert [e["line"] for e in result["errors"]] == [3]
+
+    def test_too_many_rows(self, client: TestClient, monkeypatch):
+        """Test bodies past bulk_import_max_rows get 413"""
+        monkeypatch.setattr(settings, "bulk_import_max_rows", 2)
+        rows = [(f"User {i}", f"user{i}@x.com", "pw") for i in range(3)]
+
+        response = client.post(
+            "/auth/users/bulk",
+            content=csv_body(rows),
+            headers={"Content-Type": "text/csv"},
+        )
+
+        assert response.status_code == 413
+
+    def test_hashed_rows_are_charged(self, client: TestClient, monkeypatch):
+        """Test each hashed password takes a token; duplicates are free"""
+        monkeypatch.setattr(bulk_import_limiter, "burst", 3)
+        monkeypatch.setattr(bulk_import_limiter, "rate", 0.001)
+        rows = [(f"User {i}", f"user{i}@x.com", "pw") for i in range(3)]
+
+        def post(rows):
+            return client.post(
+                "/auth/users/bulk",
+                content=csv_body(rows),
+                headers={"Content-Type": "text/csv"},
+            )
+
+        assert post(rows).json()["created"] == 3
+        assert post(rows).status_code == 200
+        response = post([("New", "new@x.com", "pw")])
+        assert response.status_code == 429
+        assert "Retry-After" in response.headers
+
+    def test_unsupported_content_type(self, client: TestClient):
+        """Test other bodies are rejected with 415"""
+        response = client.post("/auth/users/bulk", json=[{"name": "A"}])
+
+        assert response.status_code == 415
@@ -0,0 +1,186 @@
+"""
+Tests for response compression and binary stock formats
+"""
+
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import compression
+from app.core.compression import CompressionMiddleware, choose_encoding
+from app.utils.content_negotiation import ARROW, JSON, MSGPACK, stream_stocks
+from app.utils.stock_helpers import get_stock_rows
+
+# Brotli, MessagePack and Arrow come from the optional `formats` extra
+requires_brotli = pytest.mark.skipif(
+    compression.brotli is None, reason="brotli is not installed"
+)
+
+
+@pytest.fixture
+def stocks(client: TestClient, sample_stocks_list):
+    for stock in sample_stocks_list:
+        client.post("/stocks/", json=stock)
+    return sample_stocks_list
+
+
+@pytest.mark.unit
+class TestCompression:
+    """Test cases for CompressionMiddleware"""
+
+    @pytest.fixture
+    def client(self):
+        inner = FastAPI()
+
+        @inner.get("/small")
+        def small():
+            return PlainTextResponse("x" * 10)
+
+        @inner.get("/large")
+        def large():
+            return PlainTextResponse("x" * 5000)
+
+        @inner.get("/stream")
+        def stream():
+            return StreamingResponse(iter([b"a" * 3000, b"b" * 3000]))
+
+        @inner.get("/file")
+        def file():
+            return FileResponse(__file__, filename="x.py", headers={"ETag": '"v1"'})
+
+        return TestClient(CompressionMiddleware(inner, minimum_size=1024))
+
+    @requires_brotli
+    def test_choose_encoding(self):
+        """Test brotli is preferred and q=0 excludes a coding"""
+        assert choose_encoding("gzip, br") == "br"
+        assert choose_encoding("gzip, br;q=0") == "gzip"
+        assert choose_encoding("identity") is None
+        assert choose_encoding("*") == "br"
+
+    def test_large_body_is_compressed(self, client):
+        """Test bodies over the threshold are gzipped when asked"""
+        response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert int(response.headers["content-length"]) < 5000
+        assert response.text == "x" * 5000
+        assert "Accept-Encoding" in response.headers["vary"]
+
+    def test_small_body_is_not(self, client):
+        """Test bodies under the threshold go out unchanged"""
+        response = client.get("/small", headers={"Accept-Encoding": "gzip, br"})
+
+        assert "content-encoding" not in response.headers
+        assert response.text == "x" * 10
+
+    @requires_brotli
+    def test_brotli(self, client):
+        """Test brotli is used when the client accepts it"""
+        response = client.get("/large", headers={"Accept-Encoding": "br"})
+
+        assert response.headers["content-encoding"] == "br"
+        assert response.text == "x" * 5000
+
+    def test_file_download_is_not(self, client):
+        """Test file downloads keep their bytes, length and strong ETag"""
+        response = client.get("/file", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.headers["etag"] == '"v1"'
+        with open(__file__, "rb") as f:
+            assert response.content == f.read()
+
+    def test_streamed_body(self, client):
+        """Test streamed responses are compressed chunk by chunk"""
+        with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as r:
+            raw = b"".join(r.iter_raw())
+
+        assert r.headers["content-encoding"] == "gzip"
+        assert gzip.decompress(raw) == b"a" * 3000 + b"b" * 3000
+
+
+@pytest.mark.integration
+class TestStockFormats:
+    """Test content negotiation on the stock list and export endpoints"""
+
+    def test_json_by_default(self, client: TestClient, stocks):
+        """Test plain requests still get JSON"""
+        response = client.get("/stocks/export")
+
+        assert response.headers["content-type"] == "application/json"
+        tickers = [s["ticker"] for s in response.json()["stocks"]]
+        assert tickers == sorted(s["ticker"] for s in stocks)
+
+    def test_export_is_streamed(self, client: TestClient, stocks):
+        """Test JSON and Arrow exports are sent in chunks, not as one body"""
+        for accept in (JSON, ARROW):
+            if accept == ARROW:
+                pytest.importorskip("pyarrow")
+            response = client.get("/stocks/export", headers={"Accept": accept})
+            assert response.status_code == 200
+            assert "content-length" not in response.headers
+
+    def test_stream_stocks_across_chunks(self, stocks, session):
+        """Test bodies split over several chunks decode to every row"""
+        inner = FastAPI()
+
+        @inner.get("/{fmt}")
+        def export(fmt: str):
+            media_type = ARROW if fmt == "arrow" else JSON
+            return stream_stocks(media_type, get_stock_rows(session), chunk_rows=2)
+
+        tickers = sorted(s["ticker"] for s in stocks)
+        body = TestClient(inner).get("/json").json()
+        assert [s["ticker"] for s in body["stocks"]] == tickers
+
+        pa = pytest.importorskip("pyarrow")
+        table = pa.ipc.open_stream(TestClient(inner).get("/arrow").content).read_all()
+        assert table.column("ticker").to_pylist() == tickers
+
+    def test_list_as_msgpack(self, client: TestClient, stocks):
+        """Test GET /stocks/ as MessagePack has the StockList shape"""
+        msgpack = pytest.importorskip("msgpack")
+        json_body = client.get("/stocks/?page_size=3").json()
+        response = client.get("/stocks/?page_size=3", headers={"Accept": MSGPACK})
+
+        assert response.headers["content-type"] == MSGPACK
+        assert msgpack.unpackb(response.content) == json_body
+
+    def test_export_as_arrow(self, client: TestClient, stocks):
+        """Test the export as an Arrow IPC stream, filtered by sector"""
+        pa = pytest.importorskip("pyarrow")
+        response = client.get(
+            "/stocks/export?sector=Banking", headers={"Accept": ARROW}
+        )
+
+        table = pa.ipc.open_stream(response.content).read_all()
+        assert table.column("ticker").to_pylist() == ["BBCA", "BBRI", "BMRI"]
+        assert table.column("current_price").to_pylist() == [8500.0, 4800.0, 6200.0]
+
+    def test_list_as_arrow_keeps_pagination(self, client: TestClient, stocks):
+        """Test pagination fields travel in the Arrow schema metadata"""
+        pa = pytest.importorskip("pyarrow")
+        response = client.get("/stocks/?page=2&page_size=2", headers={"Accept": ARROW})
+
+        table = pa.ipc.open_stream(response.content).read_all()
+        assert table.num_rows == 2
+        assert table.schema.metadata[b"total"] == b"5"
+        assert table.schema.metadata[b"page"] == b"2"
+
+    def test_quality_values(self, client: TestClient, stocks):
+        """Test the client's preference order is respected"""
+        pytest.importorskip("msgpack")
+        accept = f"application/json;q=0.5, {MSGPACK}"
+        response = client.get("/stocks/export", headers={"Accept": accept})
+
+        assert response.headers["content-type"] == MSGPACK
+
+    def test_not_acceptable(self, client: TestClient):
+        """Test 406 when no offered format is acceptable"""
+        response = client.get("/stocks/export", headers={"Accept": "text/csv"})
+
+        assert response.status_code == 406
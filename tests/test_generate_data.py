@@ -0,0 +1,108 @@
+"""
+Tests for the synthetic dataset generator
+"""
+
+from collections import Counter
+from itertools import batched
+
+import pytest
+from sqlmodel import Session, func, select
+
+from app.models.database import Stocks, StockPrice, User
+from app.models.generate_data import (
+    generate_dataset,
+    generate_price_history,
+    generate_stocks,
+    make_ticker,
+)
+from app.utils.pagination import paginate_query
+
+
+@pytest.mark.unit
+class TestGenerateStocks:
+    """Test cases for the stock row generator"""
+
+    def test_deterministic_from_seed(self):
+        """Test the same seed produces identical rows"""
+        assert list(generate_stocks(100, seed=7)) == list(generate_stocks(100, seed=7))
+
+    def test_different_seeds_differ(self):
+        """Test different seeds produce different rows"""
+        assert list(generate_stocks(100, seed=1)) != list(generate_stocks(100, seed=2))
+
+    def test_tickers_are_unique(self):
+        """Test tickers stay unique past the 4-letter range"""
+        tickers = [make_ticker(i) for i in range(26**4 - 5, 26**4 + 5)]
+        assert len(set(tickers)) == len(tickers)
+        assert make_ticker(0) == "AAAA"
+        assert make_ticker(26**4) == "AAAAA"
+
+    def test_sector_skew(self):
+        """Test the largest sector clearly outnumbers the smallest"""
+        sectors = Counter(s["sector"] for s in generate_stocks(5000))
+        assert sectors["Banking"] > 5 * sectors["Transportation"]
+
+    def test_prices_are_positive(self):
+        """Test generated prices satisfy the API's gt=0 constraint"""
+        assert all(s["current_price"] > 0 for s in generate_stocks(1000))
+
+    def test_price_history_ends_at_current_price(self):
+        """Test history rows are per stock and day, the latest at current_price"""
+        stocks = list(generate_stocks(3))
+        history = list(generate_price_history(stocks, days=5))
+        assert len(history) == 15
+        assert all(h["price"] > 0 for h in history)
+        for stock, rows in zip(stocks, batched(history, 5)):
+            assert [h["recorded_at"] for h in rows] == sorted(
+                h["recorded_at"] for h in rows
+            )
+            assert rows[-1]["price"] == stock["current_price"]
+
+    def test_price_history_ignores_batching(self):
+        """Test a stock's history is the same however the stocks are split"""
+        stocks = list(generate_stocks(6))
+        whole = list(generate_price_history(stocks, days=4, seed=3))
+        split = list(generate_price_history(stocks[:2], days=4, seed=3))
+        split += list(generate_price_history(stocks[2:], days=4, seed=3))
+        assert whole == split
+        assert whole != list(generate_price_history(stocks, days=4, seed=4))
+
+
+@pytest.mark.integration
+class TestGenerateDataset:
+    """Test cases for bulk inserting a generated dataset"""
+
+    def test_inserts_all_tables(self, engine, session: Session):
+        """Test stocks, price history and users are bulk inserted"""
+        counts = generate_dataset(
+            engine, stocks=50, history_days=3, users=5, password_hash="x"
+        )
+        assert counts == {"stocks": 50, "stock_price": 150, "user": 5}
+        assert session.exec(select(func.count()).select_from(Stocks)).one() == 50
+        assert session.exec(select(func.count()).select_from(StockPrice)).one() == 150
+        assert session.exec(select(func.count()).select_from(User)).one() == 5
+
+    def test_small_batches(self, engine):
+        """Test batching does not drop or duplicate rows"""
+        counts = generate_dataset(engine, stocks=23, batch_size=5)
+        assert counts["stocks"] == 23
+
+
+@pytest.mark.scale
+class TestPaginationAtScale:
+    """Pagination and sector filtering against the large synthetic dataset"""
+
+    def test_total_and_last_page(self, session: Session, large_dataset):
+        """Test counting and deep pages on the full dataset"""
+        total = large_dataset["stocks"]
+        result = paginate_query(session, select(Stocks), total // 10, 10)
+        assert result.total == total
+        assert len(result.items) == 10
+
+    def test_sector_filter(self, session: Session, large_dataset):
+        """Test sector filter totals add up to the dataset size"""
+        totals = 0
+        for sector in session.exec(select(Stocks.sector).distinct()).all():
+            query = select(Stocks).where(Stocks.sector == sector)
+            totals += paginate_query(session, query, 1, 10).total
+        assert totals == large_dataset["stocks"]
@@ -0,0 +1,139 @@
+"""
+Tests for the group-commit writer
+"""
+
+import threading
+from functools import partial
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+import app.utils.group_commit as group_commit_module
+from app.models.database import Stocks
+from app.utils.group_commit import GroupCommitWriter
+from app.utils.stock_helpers import insert_stock
+
+
+@pytest.fixture
+def writer(engine):
+    """Writer over the test database with a window wide enough to batch"""
+    writer = GroupCommitWriter(partial(Session, engine), window=0.2, max_batch=50)
+    writer.start()
+    yield writer
+    writer.stop()
+
+
+@pytest.fixture
+def commits(engine):
+    """Count transactions committed on the test engine"""
+    count = []
+    listener = lambda conn: count.append(1)  # noqa: E731
+    event.listen(engine, "commit", listener)
+    yield count
+    event.remove(engine, "commit", listener)
+
+
+def stock(ticker: str) -> dict:
+    return {"ticker": ticker, "name": f"{ticker} Tbk", "current_price": 100.0}
+
+
+@pytest.mark.unit
+class TestGroupCommitWriter:
+    """Test cases for GroupCommitWriter"""
+
+    def test_concurrent_writes_share_one_commit(self, writer, commits, session):
+        """Test writes submitted together are committed in one transaction"""
+        futures = [
+            writer.submit(partial(insert_stock, stock_data=stock(f"T{i:03d}")))
+            for i in range(20)
+        ]
+        results = [future.result(timeout=5) for future in futures]
+
+        assert [r.ticker for r in results] == [f"T{i:03d}" for i in range(20)]
+        assert len(commits) == 1
+        assert len(session.exec(select(Stocks)).all()) == 20
+
+    def test_failed_write_only_fails_its_caller(self, writer, session):
+        """Test one failing operation rolls back only its own savepoint"""
+        futures = [
+            writer.submit(partial(insert_stock, stock_data=stock("BBCA"))),
+            writer.submit(partial(insert_stock, stock_data=stock("BBCA"))),
+            writer.submit(partial(insert_stock, stock_data=stock("BMRI"))),
+        ]
+
+        assert futures[0].result(timeout=5).ticker == "BBCA"
+        with pytest.raises(HTTPException) as exc_info:
+            futures[1].result(timeout=5)
+        assert exc_info.value.status_code == 400
+        assert futures[2].result(timeout=5).ticker == "BMRI"
+        tickers = session.exec(select(Stocks.ticker).order_by(Stocks.ticker)).all()
+        assert tickers == ["BBCA", "BMRI"]
+
+    def test_stop_applies_pending_writes(self, engine, session):
+        """Test stopping the writer drains what was already submitted"""
+        writer = GroupCommitWriter(partial(Session, engine), window=5, max_batch=50)
+        writer.start()
+        future = writer.submit(partial(insert_stock, stock_data=stock("BBCA")))
+        writer.stop()
+
+        assert future.result(timeout=0).ticker == "BBCA"
+        assert not writer.running
+
+    def test_commit_failure_fails_whole_batch(self, engine):
+        """Test every caller sees the error when the shared commit fails"""
+
+        def failing_session():
+            session = Session(engine)
+            session.commit = lambda: (_ for _ in ()).throw(RuntimeError("disk full"))
+            return session
+
+        writer = GroupCommitWriter(failing_session, window=0.2, max_batch=50)
+        writer.start()
+        try:
+            futures = [
+                writer.submit(partial(insert_stock, stock_data=stock(t)))
+                for t in ("BBCA", "BMRI")
+            ]
+            for future in futures:
+                with pytest.raises(RuntimeError):
+                    future.result(timeout=5)
+        finally:
+            writer.stop()
+
+
+@pytest.mark.integration
+class TestGroupCommitEndpoints:
+    """Test the stock endpoints with the writer running"""
+
+    def test_concurrent_creates(self, client, writer, commits, monkeypatch):
+        """Test concurrent POST /stocks requests are batched and all succeed"""
+        monkeypatch.setattr(group_commit_module, "group_commit", writer)
+        responses = []
+
+        def create(ticker):
+            responses.append(client.post("/stocks/", json=stock(ticker)))
+
+        # Stay within the admission controller's default write cap
+        threads = [
+            threading.Thread(target=create, args=(f"T{i:03d}",)) for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(r.status_code for r in responses) == [201] * 8
+        assert len(commits) < 8
+        assert client.get("/stocks/?page_size=100").json()["total"] == 8
+
+    def test_errors_reach_the_caller(self, client, writer, monkeypatch):
+        """Test HTTP errors raised inside the writer keep their status"""
+        monkeypatch.setattr(group_commit_module, "group_commit", writer)
+
+        assert client.post("/stocks/", json=stock("BBCA")).status_code == 201
+        assert client.post("/stocks/", json=stock("BBCA")).status_code == 400
+        assert client.delete("/stocks/NOPE").status_code == 404
+        response = client.patch("/stocks/BBCA", json={"name": "BCA"})
+        assert response.json()["name"] == "BCA"
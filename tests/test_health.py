@@ -0,0 +1,63 @@
+"""
+Tests for the health probes and draining on shutdown
+"""
+
+import threading
+import time
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app.core.health import readiness
+from app.main import app
+
+
+@pytest.mark.integration
+class TestHealth:
+    """Test /health/live, /health/ready and draining"""
+
+    def test_live(self, client):
+        """Test liveness does not depend on startup"""
+        response = client.get("/health/live")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"status": "ok"}
+
+    def test_ready_follows_lifecycle(self, client):
+        """Test 503 before startup finishes and once shutdown begins"""
+        response = client.get("/health/ready")
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()["detail"] == "Starting up"
+
+        readiness.mark_ready()
+        assert client.get("/health/ready").status_code == status.HTTP_200_OK
+
+        readiness.start_draining()
+        response = client.get("/health/ready")
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()["detail"] == "Shutting down"
+
+    def test_lifespan_marks_ready_then_draining(self):
+        """Test the lifespan reports ready after startup and drains on exit"""
+        with TestClient(app):
+            assert readiness.ready
+        assert readiness.draining
+        readiness.reset()
+
+    def test_draining_releases_long_polls(self, client):
+        """Test parked long polls return at once when draining starts"""
+        result = {}
+
+        def poll():
+            started = time.monotonic()
+            result["body"] = client.get("/stocks/changes?wait=10").json()
+            result["elapsed"] = time.monotonic() - started
+
+        poller = threading.Thread(target=poll)
+        poller.start()
+        time.sleep(0.2)
+        readiness.start_draining()
+        poller.join()
+
+        assert result["body"]["changes"] == []
+        assert result["elapsed"] < 5
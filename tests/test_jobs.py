@@ -0,0 +1,198 @@
+"""
+Tests for background jobs: POST /jobs, status polling and cancellation
+"""
+
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from fastapi import status
+from pydantic import BaseModel
+from sqlmodel import SQLModel, create_engine
+
+from app.core.settings import settings
+from app.models.database import Job
+from app.modules.jobs.runner import JobKind
+from app.modules.jobs.tasks import JOB_KINDS, job_runner
+
+
+@pytest.fixture(name="engine")
+def file_engine_fixture(tmp_path):
+    """
+    A file database with a real connection pool: jobs run on their own
+    thread, and sharing the in-memory database's single connection with the
+    requests would interleave their transactions
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def wait_for_job(client, job_id, until=("succeeded", "failed", "cancelled")):
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in until:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} still {job['status']}")
+
+
+class BlockingParams(BaseModel):
+    pass
+
+
+@pytest.fixture
+def blocking_job(monkeypatch):
+    """A job kind that reports progress until released or cancelled"""
+    started, release = threading.Event(), threading.Event()
+
+    def run(context, params):
+        started.set()
+        while not release.is_set():
+            context.report(0.5, "waiting")
+            time.sleep(0.01)
+        return {"released": True}
+
+    monkeypatch.setitem(JOB_KINDS, "block", JobKind(BlockingParams, run))
+    monkeypatch.setattr(job_runner, "progress_interval", 0)
+    yield started, release
+    release.set()
+
+
+@pytest.mark.integration
+class TestJobs:
+    """Test submitting and following background jobs"""
+
+    def test_seed_returns_202_and_runs_in_background(self, client):
+        """Test /stocks/seed queues a job that seeds the stocks"""
+        response = client.post("/stocks/seed")
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job = response.json()
+        assert job["kind"] == "seed"
+        assert response.headers["location"] == f"/jobs/{job['id']}"
+
+        finished = wait_for_job(client, job["id"])
+        assert finished["status"] == "succeeded"
+        assert finished["progress"] == 1.0
+        assert client.get("/stocks/BBCA").status_code == status.HTTP_200_OK
+
+    def test_generate_reports_result(self, client, monkeypatch):
+        """Test a generate job records its row counts"""
+        monkeypatch.setattr(settings, "job_generate_enabled", True)
+        response = client.post(
+            "/jobs/", json={"kind": "generate", "params": {"stocks": 50}}
+        )
+        assert response.status_code == status.HTTP_202_ACCEPTED
+
+        finished = wait_for_job(client, response.json()["id"])
+        assert finished["status"] == "succeeded"
+        assert finished["result"]["stocks"] == 50
+        assert client.get("/stocks/?page_size=1").json()["total"] == 50
+
+    def test_generate_is_off_by_default(self, client):
+        """Test generate jobs are refused unless job_generate_enabled is set"""
+        response = client.post("/jobs/", json={"kind": "generate"})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_generate_needs_empty_stocks(self, client, monkeypatch):
+        """Test a generate job fails instead of adding to existing stocks"""
+        monkeypatch.setattr(settings, "job_generate_enabled", True)
+        client.post("/stocks/", json={"ticker": "BBCA", "name": "BCA"})
+        response = client.post(
+            "/jobs/", json={"kind": "generate", "params": {"stocks": 5}}
+        )
+
+        finished = wait_for_job(client, response.json()["id"])
+        assert finished["status"] == "failed"
+        assert "empty" in finished["error"]
+        assert client.get("/stocks/?page_size=1").json()["total"] == 1
+
+    def test_unknown_kind_and_bad_params_are_422(self, client, monkeypatch):
+        """Test jobs are validated before they are queued"""
+        monkeypatch.setattr(settings, "job_generate_enabled", True)
+        response = client.post("/jobs/", json={"kind": "nope"})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+        response = client.post(
+            "/jobs/", json={"kind": "generate", "params": {"stocks": 0}}
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+        assert response.json()["detail"][0]["loc"] == ["body", "params", "stocks"]
+
+    def test_missing_job_is_404(self, client):
+        """Test unknown job ids"""
+        missing = "00000000-0000-0000-0000-000000000000"
+        assert client.get(f"/jobs/{missing}").status_code == 404
+        assert client.post(f"/jobs/{missing}/cancel").status_code == 404
+
+    def test_failed_job_records_error(self, client, monkeypatch):
+        """Test an exception in a job marks it failed"""
+
+        def run(context, params):
+            raise RuntimeError("disk full")
+
+        monkeypatch.setitem(JOB_KINDS, "broken", JobKind(BlockingParams, run))
+        job_id = client.post("/jobs/", json={"kind": "broken"}).json()["id"]
+
+        finished = wait_for_job(client, job_id)
+        assert finished["status"] == "failed"
+        assert finished["error"] == "disk full"
+
+    def test_cancel_running_job(self, client, blocking_job):
+        """Test a running job stops at its next progress report"""
+        started, _ = blocking_job
+        job_id = client.post("/jobs/", json={"kind": "block"}).json()["id"]
+        assert started.wait(5)
+
+        response = client.post(f"/jobs/{job_id}/cancel")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["cancel_requested"] is True
+
+        finished = wait_for_job(client, job_id)
+        assert finished["status"] == "cancelled"
+        assert finished["progress"] == 0.5
+
+        response = client.post(f"/jobs/{job_id}/cancel")
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+    def test_cancel_queued_job(self, client, blocking_job):
+        """Test a job waiting behind another is cancelled without running"""
+        started, release = blocking_job
+        client.post("/jobs/", json={"kind": "block"})
+        assert started.wait(5)
+        queued = client.post("/jobs/", json={"kind": "seed"}).json()
+
+        response = client.post(f"/jobs/{queued['id']}/cancel")
+        assert response.json()["status"] == "cancelled"
+        release.set()
+        assert client.get("/stocks/BBCA").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_full_queue_is_503(self, client, blocking_job, monkeypatch):
+        """Test submissions past job_max_queued are shed"""
+        started, _ = blocking_job
+        client.post("/jobs/", json={"kind": "block"})
+        assert started.wait(5)
+        monkeypatch.setattr(job_runner, "max_queued", 1)
+
+        assert client.post("/jobs/", json={"kind": "seed"}).status_code == 202
+        response = client.post("/jobs/", json={"kind": "seed"})
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert "retry-after" in response.headers
+
+    def test_restart_fails_orphaned_jobs(self, client, session):
+        """Test jobs left running by a dead worker are failed on start"""
+        dead = subprocess.Popen([sys.executable, "-c", ""])
+        dead.wait()
+        orphan = Job(kind="seed", status="running", worker=dead.pid)
+        session.add(orphan)
+        session.commit()
+
+        job_runner.start()
+
+        job = client.get(f"/jobs/{orphan.id}").json()
+        assert job["status"] == "failed"
+        assert job["error"] == "Interrupted by a restart"
@@ -2,9 +2,14 @@
 Tests for main application setup
 """
 
+import subprocess
+import sys
+
 import pytest
 from fastapi.testclient import TestClient
 
+from app.main import app
+
 
 @pytest.mark.unit
 class TestMainApp:
@@ -40,3 +45,21 @@ class TestMainApp:
         # Check stocks endpoints
         assert "/stocks/" in paths
         assert "/stocks/{ticker}" in paths
+
+    def test_openapi_schema_built_at_startup(self):
+        """Test the lifespan builds the OpenAPI schema before any request"""
+        app.openapi_schema = None
+        with TestClient(app):
+            assert app.openapi_schema is not None
+
+    def test_docs_and_seed_modules_loaded_lazily(self):
+        """Test importing the app skips the docs UI and seed data modules"""
+        code = (
+            "import sys, app.main; "
+            "print('scalar_fastapi' in sys.modules, "
+            "'app.models.seed_data' in sys.modules)"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        assert out.stdout.strip() == "False False"
@@ -0,0 +1,95 @@
+"""
+Tests for portfolio valuation endpoint
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.models.generate_data import generate_dataset, make_ticker
+from app.utils import stock_helpers
+
+
+@pytest.mark.integration
+class TestPortfolioValue:
+    """Test cases for POST /portfolio/value"""
+
+    def test_value_portfolio(self, client: TestClient, sample_stocks_list):
+        """Test position values and the total"""
+        for stock in sample_stocks_list:
+            client.post("/stocks/", json=stock)
+
+        response = client.post("/portfolio/value", json={"BBCA": 10, "TLKM": 2})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_value"] == 10 * 8500.0 + 2 * 3200.0
+        assert data["positions"][0] == {
+            "ticker": "BBCA",
+            "quantity": 10,
+            "price": 8500.0,
+            "value": 85000.0,
+        }
+        assert data["missing"] == []
+
+    def test_missing_and_unpriced(self, client: TestClient, sample_stock_data):
+        """Test unknown tickers and stocks without a price are reported"""
+        client.post("/stocks/", json=sample_stock_data)
+        client.post("/stocks/", json={"ticker": "NOPX", "name": "No Price"})
+
+        data = client.post(
+            "/portfolio/value", json={"BBCA": 1, "NOPE": 5, "NOPX": 3}
+        ).json()
+        assert data["total_value"] == 8500.0
+        assert data["missing"] == ["NOPE"]
+        assert data["unpriced"] == ["NOPX"]
+        assert data["positions"][1]["value"] is None
+
+    def test_tickers_normalized_and_merged(self, client: TestClient, sample_stock_data):
+        """Test lowercase duplicates of a ticker are summed into one position"""
+        client.post("/stocks/", json=sample_stock_data)
+        data = client.post("/portfolio/value", json={"bbca": 1, " BBCA": 2}).json()
+        assert len(data["positions"]) == 1
+        assert data["positions"][0]["quantity"] == 3
+
+    def test_empty_portfolio(self, client: TestClient):
+        """Test an empty portfolio is worth nothing"""
+        data = client.post("/portfolio/value", json={}).json()
+        assert data == {
+            "positions": [],
+            "total_value": 0.0,
+            "missing": [],
+            "unpriced": [],
+        }
+
+    def test_invalid_quantity(self, client: TestClient):
+        """Test non-numeric quantities are rejected"""
+        response = client.post("/portfolio/value", json={"BBCA": "many"})
+        assert response.status_code == 422
+
+    def test_uses_cached_prices(self, client: TestClient, engine, sample_stock_data):
+        """Test prices already in the stock cache are used after a GET"""
+        client.post("/stocks/", json=sample_stock_data)
+        client.get("/stocks/BBCA")
+
+        sent = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            sent.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            data = client.post("/portfolio/value", json={"BBCA": 2}).json()
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert data["total_value"] == 17000.0
+        assert not [statement for statement in sent if "FROM stocks" in statement]
+
+    def test_large_portfolio_is_chunked(self, client: TestClient, engine, monkeypatch):
+        """Test more tickers than fit in one IN clause are all resolved"""
+        monkeypatch.setattr(stock_helpers, "IN_CLAUSE_CHUNK_SIZE", 7)
+        generate_dataset(engine, stocks=50)
+        holdings = {make_ticker(i): 1 for i in range(50)}
+
+        data = client.post("/portfolio/value", json=holdings).json()
+        assert len(data["positions"]) == 50
+        assert data["missing"] == []
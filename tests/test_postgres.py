@@ -0,0 +1,111 @@
+"""
+Tests for the Postgres backend, against a throwaway server (see the
+postgres_url fixture); skipped when no server can be started
+"""
+
+import os
+import subprocess
+
+import pytest
+from fastapi import status
+from sqlalchemy import event, text
+from sqlmodel import Session, select
+
+from app.models.database import Stocks, StockPrice, User
+from app.models.generate_data import generate_dataset
+from app.utils.change_log import UPDATE, record_stock_change
+from app.utils.db_helpers import CHANGE_LOG_LOCK
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(postgres_engine):
+    """Run the API through the client fixture on Postgres"""
+    return postgres_engine
+
+
+@pytest.mark.integration
+class TestPostgresBackend:
+    """Test the app on Postgres"""
+
+    def test_stock_crud(self, client, sample_stock_data):
+        """Test creating, conditionally updating and deleting a stock"""
+        created = client.post("/stocks/", json=sample_stock_data)
+        assert created.status_code == status.HTTP_201_CREATED
+        etag = created.headers["etag"]
+
+        response = client.patch(
+            "/stocks/bbca", json={"current_price": 9000.0}, headers={"If-Match": etag}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        response = client.patch(
+            "/stocks/BBCA", json={"current_price": 9100.0}, headers={"If-Match": etag}
+        )
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+        duplicate = client.post("/stocks/", json=sample_stock_data)
+        assert duplicate.status_code == status.HTTP_400_BAD_REQUEST
+
+        assert client.delete("/stocks/BBCA").status_code == 204
+        assert client.get("/stocks/BBCA").status_code == 404
+
+        ops = [c["op"] for c in client.get("/stocks/changes").json()["changes"]]
+        assert ops == ["create", "update", "delete"]
+
+    def test_export_streams_sorted_rows(self, client, sample_stocks_list):
+        """Test the export reads through a server-side cursor in ticker order"""
+        for stock in sample_stocks_list:
+            client.post("/stocks/", json=stock)
+
+        stocks = client.get("/stocks/export").json()["stocks"]
+        tickers = [stock["ticker"] for stock in stocks]
+        assert tickers == sorted(s["ticker"] for s in sample_stocks_list)
+
+    def test_generate_dataset_uses_copy(self, engine):
+        """Test bulk loads go through COPY rather than INSERT statements"""
+        statements = []
+        event.listen(
+            engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+
+        counts = generate_dataset(
+            engine, stocks=300, history_days=2, users=5, password_hash="x"
+        )
+
+        assert counts == {"stocks": 300, "stock_price": 600, "user": 5}
+        with Session(engine) as session:
+            assert len(session.exec(select(Stocks.id)).all()) == 300
+            assert len(session.exec(select(StockPrice.id)).all()) == 600
+            assert len(session.exec(select(User.id)).all()) == 5
+        copied = ("INSERT INTO stocks", "INSERT INTO stock_price", 'INSERT INTO "user"')
+        assert not [s for s in statements if s.startswith(copied)]
+
+    def test_change_log_writers_serialized(self, engine):
+        """Test appending to the change log holds the advisory lock to commit"""
+        with Session(engine) as session:
+            record_stock_change(session, "BBCA", UPDATE)
+            session.flush()
+            with engine.connect() as other:
+                held = other.execute(
+                    text(
+                        "SELECT count(*) FROM pg_locks "
+                        "WHERE locktype = 'advisory' AND objid = :key"
+                    ),
+                    {"key": CHANGE_LOG_LOCK},
+                ).scalar()
+            assert held == 1
+            session.commit()
+
+    def test_migrations_match_models(self, postgres_engine):
+        """Test the migrations run on Postgres and produce the models' schema"""
+        with postgres_engine.begin() as conn:
+            conn.execute(text("DROP SCHEMA public CASCADE"))
+            conn.execute(text("CREATE SCHEMA public"))
+        url = postgres_engine.url.render_as_string(hide_password=False)
+        env = {**os.environ, "DATABASE_URL": url}
+        for command in (["upgrade", "head"], ["check"]):
+            result = subprocess.run(
+                ["alembic", *command], env=env, capture_output=True, text=True
+            )
+            assert result.returncode == 0, result.stderr
@@ -0,0 +1,159 @@
+"""
+Tests for the price rankings: GET /stocks/movers and GET /stocks/{ticker}/rank
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import status
+from sqlmodel import select
+
+from app.models.database import StockPrice, Stocks
+from app.utils.price_board import PriceBoard
+
+# Latest recorded price per ticker; older rows must be ignored
+HISTORY = {
+    "BBCA": [9000.0, 8000.0],  # +6.25%
+    "BMRI": [5000.0, 6200.0],  # 0%
+    "BBRI": [4000.0, 6000.0],  # -20%
+    "TLKM": [3000.0, 3100.0],  # +3.23%
+}
+
+
+@pytest.fixture
+def stocks_with_history(client, session, sample_stocks_list):
+    for stock in sample_stocks_list:
+        client.post("/stocks/", json=stock)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for ticker, prices in HISTORY.items():
+        stock_id = session.exec(select(Stocks.id).where(Stocks.ticker == ticker)).one()
+        for day, price in enumerate(prices):
+            session.add(
+                StockPrice(
+                    stock_id=stock_id,
+                    price=price,
+                    recorded_at=start + timedelta(days=day),
+                )
+            )
+    session.commit()
+    return sample_stocks_list
+
+
+@pytest.mark.integration
+class TestMovers:
+    """Test the top gainers and losers"""
+
+    def test_gainers_and_losers(self, client, stocks_with_history):
+        """Test moves against the latest recorded price, biggest first"""
+        body = client.get("/stocks/movers").json()
+        gainers = [
+            (m["ticker"], round(m["change_percent"], 2)) for m in body["gainers"]
+        ]
+        assert gainers == [("BBCA", 6.25), ("TLKM", 3.23)]
+        assert body["gainers"][0]["reference_price"] == 8000.0
+        assert [(m["ticker"], m["change_percent"]) for m in body["losers"]] == [
+            ("BBRI", -20.0)
+        ]
+
+    def test_limit_and_sector(self, client, stocks_with_history):
+        """Test the top-k cut and the sector filter"""
+        body = client.get("/stocks/movers?limit=1").json()
+        assert [m["ticker"] for m in body["gainers"]] == ["BBCA"]
+
+        body = client.get("/stocks/movers?sector=Telecommunications").json()
+        assert [m["ticker"] for m in body["gainers"]] == ["TLKM"]
+        assert body["losers"] == []
+        body = client.get("/stocks/movers?sector=Nope").json()
+        assert body == {"gainers": [], "losers": []}
+
+    def test_price_changes_are_picked_up(self, client, stocks_with_history):
+        """Test writes after the arrays were built show up in the next answer"""
+        client.get("/stocks/movers")
+        client.patch("/stocks/BMRI", json={"current_price": 9300.0})
+        client.delete("/stocks/BBCA")
+
+        body = client.get("/stocks/movers").json()
+        assert [m["ticker"] for m in body["gainers"]] == ["BMRI", "TLKM"]
+        assert body["gainers"][0]["change_percent"] == 50.0
+
+    def test_sync_runs_off_the_event_loop(self, client, monkeypatch):
+        """Test the DB reads of a sync do not block the event loop"""
+        loops = []
+        sync = PriceBoard.sync
+
+        def recording_sync(self, session):
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+            sync(self, session)
+
+        monkeypatch.setattr(PriceBoard, "sync", recording_sync)
+        client.get("/stocks/movers")
+        client.get("/stocks/BBCA/rank")
+
+        assert loops == [None, None]
+
+
+@pytest.mark.integration
+class TestStockRank:
+    """Test a stock's standing within its sector"""
+
+    def test_rank_in_sector(self, client, sample_stocks_list):
+        """Test rank, percentile and z-score among the Banking stocks"""
+        for stock in sample_stocks_list:
+            client.post("/stocks/", json=stock)
+
+        rank = client.get("/stocks/bmri/rank").json()
+        assert rank["ticker"] == "BMRI"
+        assert rank["sector"] == "Banking"
+        assert rank["sector_size"] == 3
+        assert rank["sector_rank"] == 2
+        assert rank["percentile"] == pytest.approx(200 / 3)
+        # Banking prices 4800, 6200, 8500: mean 6500
+        assert rank["z_score"] == pytest.approx(-300 / 1525.4098, rel=1e-4)
+        assert rank["change_percent"] is None
+
+        top = client.get("/stocks/BBCA/rank").json()
+        assert (top["sector_rank"], top["percentile"]) == (1, 100.0)
+
+    def test_unpriced_and_missing(self, client):
+        """Test stocks without a price have no rank, unknown tickers are 404"""
+        client.post("/stocks/", json={"ticker": "NEW", "name": "New Listing"})
+        rank = client.get("/stocks/NEW/rank").json()
+        assert rank["sector"] is None
+        assert rank["sector_rank"] is None
+        assert rank["sector_size"] == 0
+
+        response = client.get("/stocks/NOPE/rank")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_writes_patch_arrays_in_place(
+        self, client, sample_stocks_list, monkeypatch
+    ):
+        """Test creates, renames and deletes are applied without a rebuild"""
+        for stock in sample_stocks_list:
+            client.post("/stocks/", json=stock)
+        client.get("/stocks/BBCA/rank")
+
+        def no_rebuild(self, session):
+            raise AssertionError("rebuilt")
+
+        monkeypatch.setattr(PriceBoard, "_rebuild", no_rebuild)
+        client.post(
+            "/stocks/",
+            json={
+                "ticker": "BNGA",
+                "name": "CIMB Niaga",
+                "sector": "Banking",
+                "current_price": 9000.0,
+            },
+        )
+        client.patch("/stocks/BBRI", json={"ticker": "BRIS"})
+        client.delete("/stocks/BMRI")
+
+        assert client.get("/stocks/BBCA/rank").json()["sector_rank"] == 2
+        assert client.get("/stocks/BRIS/rank").json()["sector_size"] == 3
+        assert client.get("/stocks/BBRI/rank").status_code == 404
+        assert client.get("/stocks/BMRI/rank").status_code == 404
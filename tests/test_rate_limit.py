@@ -0,0 +1,132 @@
+"""
+Tests for rate limiting and admission control
+"""
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.admission import AdmissionControlMiddleware, release_admission
+from app.core.rate_limit import RateLimiter, stocks_list_limiter
+
+
+@pytest.mark.unit
+class TestRateLimiter:
+    """Test cases for the token bucket limiter"""
+
+    def test_burst_then_limited(self):
+        """Test a client gets `burst` requests, then a wait time"""
+        limiter = RateLimiter(rate=1.0, burst=3)
+
+        assert [limiter.acquire("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert limiter.acquire("a") > 0
+        assert limiter.acquire("b") == 0.0
+
+    def test_cost_is_capped_at_burst(self):
+        """Test an expensive request is still possible with a full bucket"""
+        limiter = RateLimiter(rate=1.0, burst=5)
+
+        assert limiter.acquire("a", cost=100) == 0.0
+        assert limiter.acquire("a") > 0
+
+    def test_buckets_are_bounded(self):
+        """Test least recently used buckets are dropped past max_keys"""
+        limiter = RateLimiter(rate=1.0, burst=1, max_keys=2)
+        for key in ("a", "b", "c"):
+            limiter.acquire(key)
+
+        assert limiter.acquire("a") == 0.0
+
+
+@pytest.mark.integration
+class TestRateLimitedEndpoints:
+    """Test 429 responses from the API"""
+
+    def test_register_flood_gets_429(self, client: TestClient):
+        """Test repeated registrations from one client are throttled"""
+        responses = [
+            client.post(
+                "/auth/register",
+                json={"name": "A", "email": f"a{i}@example.com", "password": "x"},
+            )
+            for i in range(12)
+        ]
+
+        limited = [r for r in responses if r.status_code == 429]
+        assert limited
+        assert int(limited[0].headers["Retry-After"]) >= 1
+
+    def test_deep_pages_cost_more(self, client: TestClient, monkeypatch):
+        """Test deep GET /stocks/ pages drain the bucket faster than shallow ones"""
+        monkeypatch.setattr(stocks_list_limiter, "burst", 10)
+
+        shallow = [client.get("/stocks/?page=1").status_code for _ in range(10)]
+        assert 429 not in shallow
+
+        stocks_list_limiter.reset()
+        deep = [
+            client.get("/stocks/?page=50&page_size=100").status_code for _ in range(3)
+        ]
+        assert deep[-1] == 429
+
+
+@pytest.mark.unit
+class TestAdmissionControl:
+    """Test cases for AdmissionControlMiddleware"""
+
+    @pytest.fixture
+    def middleware(self):
+        inner = FastAPI()
+
+        @inner.get("/")
+        @inner.post("/")
+        def endpoint():
+            return {"ok": True}
+
+        return AdmissionControlMiddleware(
+            inner, max_in_flight=2, max_writes=1, retry_after=3
+        )
+
+    def test_admits_under_limit(self, middleware):
+        """Test requests pass and the counters go back down"""
+        client = TestClient(middleware)
+
+        assert client.get("/").status_code == 200
+        assert client.post("/").status_code == 200
+        assert (middleware.in_flight, middleware.writes) == (0, 0)
+
+    def test_sheds_when_busy(self, middleware):
+        """Test 503 with Retry-After once the in-flight cap is reached"""
+        client = TestClient(middleware)
+        middleware.in_flight = 2
+
+        response = client.get("/")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "3"
+
+    def test_write_cap_only_applies_to_writes(self, middleware):
+        """Test reads still pass while the write cap is reached"""
+        client = TestClient(middleware)
+        middleware.in_flight = middleware.writes = 1
+
+        assert client.post("/").status_code == 503
+        assert client.get("/").status_code == 200
+
+    def test_released_requests_are_not_counted(self):
+        """Test a request that released its slot (a parked long poll) is not counted"""
+        inner = FastAPI()
+        middleware = AdmissionControlMiddleware(
+            inner, max_in_flight=1, max_writes=1, retry_after=3
+        )
+        seen = []
+
+        @inner.get("/park")
+        def park(request: Request):
+            release_admission(request)
+            seen.append(middleware.in_flight)
+            return {"ok": True}
+
+        client = TestClient(middleware)
+        assert client.get("/park").status_code == 200
+        assert seen == [0]
+        assert middleware.in_flight == 0
@@ -0,0 +1,152 @@
+"""
+Tests for the memory-mapped read snapshot
+"""
+
+import fcntl
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.settings import settings
+from app.models.database import Stocks
+from app.models.generate_data import generate_dataset
+from app.utils.pagination import paginate_query
+from app.utils.read_snapshot import (
+    ReadSnapshot,
+    compile_read_snapshot,
+    current_read_snapshot,
+    refresh_read_snapshot,
+    reset_read_snapshot,
+)
+
+
+@pytest.fixture
+def mmap_backend(tmp_path, monkeypatch):
+    """Serve reads from a snapshot file in a temp dir"""
+    monkeypatch.setattr(settings, "read_backend", "mmap")
+    monkeypatch.setattr(settings, "read_snapshot_path", str(tmp_path / "stocks.mmap"))
+    reset_read_snapshot()
+    yield tmp_path / "stocks.mmap"
+    reset_read_snapshot()
+
+
+@pytest.mark.unit
+class TestReadSnapshot:
+    """Test cases for compiling and reading the snapshot file"""
+
+    def test_matches_database(self, engine, session: Session, tmp_path):
+        """Test lookups and pages match the database, including sector filters"""
+        generate_dataset(engine, stocks=60, history_days=0, seed=3)
+        path = tmp_path / "stocks.mmap"
+        compile_read_snapshot(session, path)
+        snapshot = ReadSnapshot(path)
+
+        stocks = session.exec(select(Stocks)).all()
+        assert snapshot.count == len(stocks)
+        for stock in stocks:
+            found = snapshot.get(stock.ticker)
+            assert found.model_dump() == stock.model_dump()
+        assert snapshot.get("NOPE") is None
+        assert snapshot.get("") is None
+
+        sector = stocks[0].sector
+        for filtered in (None, sector, "No Such Sector"):
+            for page in (1, 2, 7):
+                query = select(Stocks)
+                if filtered:
+                    query = query.where(Stocks.sector == filtered)
+                expected = paginate_query(session, query, page, 9)
+                result = snapshot.paginate(page, 9, filtered)
+                assert result.total == expected.total
+                assert [s.model_dump() for s in result.items] == [
+                    s.model_dump() for s in expected.items
+                ]
+
+    def test_refresh_only_after_changes(self, session: Session, mmap_backend):
+        """Test the file is rebuilt only when the stocks changed"""
+        assert refresh_read_snapshot(session) is True
+        inode = os.stat(mmap_backend).st_ino
+        assert refresh_read_snapshot(session) is False
+        assert os.stat(mmap_backend).st_ino == inode
+
+    def test_non_ascii_tickers(self, session: Session, tmp_path):
+        """Test UTF-8 tickers are found and do not collide with each other"""
+        for ticker in ("ÄÖÜ", "ĀĀĀĀĀĀĀĀĀĀ", "A"):
+            session.add(Stocks(ticker=ticker, name=ticker))
+        session.commit()
+        path = tmp_path / "stocks.mmap"
+        compile_read_snapshot(session, path)
+        snapshot = ReadSnapshot(path)
+
+        assert snapshot.get("ÄÖÜ").name == "ÄÖÜ"
+        assert snapshot.get("ĀĀĀĀĀĀĀĀĀĀ").name == "ĀĀĀĀĀĀĀĀĀĀ"
+        assert snapshot.get("???") is None
+        assert snapshot.get("ÄÖ") is None
+        assert snapshot.get("𝔸" * 11) is None
+
+    def test_one_worker_compiles(self, session: Session, mmap_backend):
+        """Test a refresh is skipped while another worker holds the lock"""
+        with open(mmap_backend.with_suffix(".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            assert refresh_read_snapshot(session) is False
+        assert not mmap_backend.exists()
+        assert refresh_read_snapshot(session) is True
+
+    def test_stale_snapshot_falls_back(self, session: Session, mmap_backend):
+        """Test reads go back to the database once the snapshot is too old"""
+        refresh_read_snapshot(session)
+        assert current_read_snapshot() is not None
+
+        old = time.time() - settings.read_snapshot_max_lag - 5
+        os.utime(mmap_backend, (old, old))
+        reset_read_snapshot()
+        assert current_read_snapshot() is None
+
+
+@pytest.mark.integration
+class TestReadSnapshotEndpoints:
+    """Test cases for GET /stocks/ served from the snapshot"""
+
+    def test_reads_report_freshness(
+        self, client: TestClient, session: Session, sample_stocks_list, mmap_backend
+    ):
+        """Test list and lookup come from the snapshot with freshness headers"""
+        for stock in sample_stocks_list:
+            client.post("/stocks/", json=stock)
+        refresh_read_snapshot(session)
+
+        response = client.get("/stocks/BBCA")
+        assert response.status_code == 200
+        assert response.json()["name"] == "Bank Central Asia"
+        assert float(response.headers["X-Snapshot-Lag"]) < 5
+        assert "X-Snapshot-Version" in response.headers
+
+        response = client.get("/stocks/?sector=Banking&page_size=2")
+        assert response.json()["total"] == 3
+        assert len(response.json()["stocks"]) == 2
+        assert "X-Snapshot-Lag" in response.headers
+
+        assert client.get("/stocks/NOPE").status_code == 404
+
+    def test_snapshot_is_not_read_your_writes(
+        self, client: TestClient, session: Session, sample_stock_data, mmap_backend
+    ):
+        """Test a new stock appears once the snapshot is refreshed"""
+        refresh_read_snapshot(session)
+        client.post("/stocks/", json=sample_stock_data)
+        assert client.get(f"/stocks/{sample_stock_data['ticker']}").status_code == 404
+
+        refresh_read_snapshot(session)
+        reset_read_snapshot()
+        assert client.get(f"/stocks/{sample_stock_data['ticker']}").status_code == 200
+
+    def test_sqlite_backend_has_no_headers(self, client: TestClient, sample_stock_data):
+        """Test the default backend reads the database directly"""
+        client.post("/stocks/", json=sample_stock_data)
+
+        response = client.get(f"/stocks/{sample_stock_data['ticker']}")
+        assert response.status_code == 200
+        assert "X-Snapshot-Lag" not in response.headers
@@ -0,0 +1,162 @@
+"""
+Tests for the incrementally maintained sector summary
+"""
+
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models.generate_data import generate_dataset
+from app.utils.sector_summary import get_sector_summaries, rebuild_sector_summary
+
+
+def _summary(client: TestClient) -> dict:
+    response = client.get("/stocks/sectors/summary")
+    assert response.status_code == 200
+    return {row["sector"]: row for row in response.json()["sectors"]}
+
+
+def _snapshot(session: Session) -> list[tuple]:
+    return [
+        (
+            s.sector,
+            s.stock_count,
+            s.priced_count,
+            round(s.price_sum, 6),
+            s.price_min,
+            s.price_max,
+        )
+        for s in get_sector_summaries(session)
+    ]
+
+
+@pytest.mark.integration
+class TestSectorSummaryEndpoint:
+    """Test cases for GET /stocks/sectors/summary"""
+
+    def test_empty(self, client: TestClient):
+        """Test an empty database has no sectors"""
+        assert _summary(client) == {}
+
+    def test_aggregates_after_create(self, client: TestClient, sample_stocks_list):
+        """Test counts, average, min/max and total per sector"""
+        for stock in sample_stocks_list:
+            client.post("/stocks/", json=stock)
+
+        banking = _summary(client)["Banking"]
+        assert banking["stock_count"] == 3
+        assert banking["min_price"] == 4800.0
+        assert banking["max_price"] == 8500.0
+        assert banking["total_market_value"] == 19500.0
+        assert banking["average_price"] == pytest.approx(6500.0)
+
+    def test_stock_without_sector_or_price(self, client: TestClient):
+        """Test unsectored stocks are grouped under null sector"""
+        client.post("/stocks/", json={"ticker": "TEST", "name": "Test"})
+        row = _summary(client)[None]
+        assert row["stock_count"] == 1
+        assert row["average_price"] is None
+        assert row["total_market_value"] == 0
+
+    def test_update_moves_between_sectors(self, client: TestClient, sample_stocks_list):
+        """Test a sector change moves the stock and recomputes extremes"""
+        for stock in sample_stocks_list:
+            client.post("/stocks/", json=stock)
+
+        client.patch("/stocks/BBCA", json={"sector": "Automotive"})
+        summary = _summary(client)
+        assert summary["Banking"]["stock_count"] == 2
+        assert summary["Banking"]["max_price"] == 6200.0
+        assert summary["Automotive"]["stock_count"] == 2
+        assert summary["Automotive"]["max_price"] == 8500.0
+
+    def test_price_update(self, client: TestClient, sample_stocks_list):
+        """Test lowering the minimum price updates min and total"""
+        for stock in sample_stocks_list:
+            client.post("/stocks/", json=stock)
+
+        client.patch("/stocks/BBRI", json={"current_price": 100.0})
+        banking = _summary(client)["Banking"]
+        assert banking["min_price"] == 100.0
+        assert banking["total_market_value"] == 14800.0
+
+    def test_delete_removes_extreme_and_empty_sector(
+        self, client: TestClient, sample_stocks_list
+    ):
+        """Test deleting the max recomputes it and empty sectors disappear"""
+        for stock in sample_stocks_list:
+            client.post("/stocks/", json=stock)
+
+        client.delete("/stocks/BBCA")
+        client.delete("/stocks/TLKM")
+        summary = _summary(client)
+        assert summary["Banking"]["max_price"] == 6200.0
+        assert "Telecommunications" not in summary
+
+    def test_delete_extreme_from_mixed_unknown_sector(
+        self, client: TestClient, session: Session
+    ):
+        """Test "" and None sectors share one bucket when min/max is recomputed"""
+        for ticker, sector, price in [
+            ("EMPTY", "", 100.0),
+            ("NONE", None, 50.0),
+            ("TOP", None, 300.0),
+        ]:
+            client.post(
+                "/stocks/",
+                json={
+                    "ticker": ticker,
+                    "name": ticker,
+                    "sector": sector,
+                    "current_price": price,
+                },
+            )
+
+        client.delete("/stocks/TOP")
+        incremental = _snapshot(session)
+        assert incremental[0][4:] == (50.0, 100.0)
+        rebuild_sector_summary(session)
+        session.commit()
+        assert _snapshot(session) == incremental
+
+
+@pytest.mark.integration
+class TestRebuildSectorSummary:
+    """Test cases for rebuilding the summary from scratch"""
+
+    def test_incremental_matches_rebuild(self, client: TestClient, session: Session):
+        """Test a random mix of writes leaves the same summary as a rebuild"""
+        rng = random.Random(3)
+        sectors = ["Banking", "Mining", None]
+        for i in range(30):
+            client.post(
+                "/stocks/",
+                json={
+                    "ticker": f"T{i}",
+                    "name": f"Stock {i}",
+                    "sector": rng.choice(sectors),
+                    "current_price": rng.choice([None, rng.randint(1, 100)]),
+                },
+            )
+        for i in rng.sample(range(30), 10):
+            client.patch(
+                f"/stocks/T{i}",
+                json={
+                    "sector": rng.choice(sectors),
+                    "current_price": rng.randint(1, 100),
+                },
+            )
+        for i in rng.sample(range(30), 10):
+            client.delete(f"/stocks/T{i}")
+
+        incremental = _snapshot(session)
+        rebuild_sector_summary(session)
+        session.commit()
+        assert _snapshot(session) == incremental
+
+    def test_generator_rebuilds_summary(self, engine, session: Session):
+        """Test the bulk generator leaves a consistent summary"""
+        generate_dataset(engine, stocks=200)
+        assert sum(s.stock_count for s in get_sector_summaries(session)) == 200
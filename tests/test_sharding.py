@@ -0,0 +1,187 @@
+"""
+Tests for sharded stock storage: routing by ticker and merged listings
+"""
+
+import pytest
+from fastapi import status
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.models.database import Stocks
+from app.utils.sharding import ShardRouter, set_shard_router
+
+SHARDS = ("alpha", "beta", "gamma")
+
+
+def memory_engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def shards():
+    """Three in-memory shards, routed to for the duration of the test"""
+    router = ShardRouter({name: memory_engine() for name in SHARDS})
+    set_shard_router(router)
+    yield router
+    set_shard_router(None)
+    router.close()
+
+
+def tickers_on(router, name):
+    with Session(router.engines[name]) as session:
+        return sorted(session.exec(select(Stocks.ticker)).all())
+
+
+@pytest.fixture
+def many_stocks(client, shards, sample_stocks_list):
+    """The sample stocks plus enough more that every shard gets some"""
+    stocks = sample_stocks_list + [
+        {"ticker": f"X{n:03d}", "name": f"Stock {n}", "sector": "Mining"}
+        for n in range(30)
+    ]
+    for stock in stocks:
+        assert client.post("/stocks/", json=stock).status_code == 201
+    return stocks
+
+
+@pytest.mark.unit
+class TestShardRouter:
+    """Test how tickers map to shards"""
+
+    def test_shard_of_is_stable(self, shards):
+        """Test a ticker always maps to the same shard"""
+        assert shards.shard_of("BBCA") == shards.shard_of("BBCA")
+        owners = {shards.shard_of(f"T{n}") for n in range(100)}
+        assert owners == set(SHARDS)
+
+    def test_adding_a_shard_only_moves_stocks_to_it(self, shards):
+        """Test rendezvous hashing: existing shards keep their other stocks"""
+        grown = ShardRouter({name: None for name in (*SHARDS, "delta")})
+        for n in range(500):
+            before, after = shards.shard_of(f"T{n}"), grown.shard_of(f"T{n}")
+            assert after in (before, "delta")
+
+
+@pytest.mark.integration
+class TestShardedStocks:
+    """Test the stock endpoints with sharded storage"""
+
+    def test_each_stock_lives_on_its_owning_shard(self, client, shards, many_stocks):
+        """Test writes go to exactly one shard, picked by ticker"""
+        placed = {name: tickers_on(shards, name) for name in SHARDS}
+        assert sum(len(tickers) for tickers in placed.values()) == len(many_stocks)
+        for name, tickers in placed.items():
+            assert tickers
+            assert all(shards.shard_of(ticker) == name for ticker in tickers)
+
+    def test_get_update_delete_route_to_owner(self, client, shards, many_stocks):
+        """Test single-stock endpoints find the stock on its shard"""
+        assert client.get("/stocks/tlkm").json()["name"] == "Telkom Indonesia"
+
+        response = client.patch("/stocks/TLKM", json={"current_price": 3300.0})
+        assert response.status_code == status.HTTP_200_OK
+        assert client.get("/stocks/TLKM").json()["current_price"] == 3300.0
+
+        assert client.delete("/stocks/TLKM").status_code == 204
+        assert client.get("/stocks/TLKM").status_code == 404
+
+    def test_duplicate_ticker_rejected(self, client, shards, sample_stock_data):
+        """Test the owning shard's unique index still applies"""
+        client.post("/stocks/", json=sample_stock_data)
+        response = client.post("/stocks/", json=sample_stock_data)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_pages_merge_shards_in_ticker_order(self, client, shards, many_stocks):
+        """Test paging over all shards yields every stock once, sorted"""
+        seen = []
+        for page in range(1, 6):
+            body = client.get(f"/stocks/?page={page}&page_size=8").json()
+            assert body["total"] == len(many_stocks)
+            seen += [stock["ticker"] for stock in body["stocks"]]
+        assert seen == sorted(stock["ticker"] for stock in many_stocks)
+
+        body = client.get("/stocks/?sector=Banking&page_size=2&page=2").json()
+        assert body["total"] == 3
+        assert [stock["ticker"] for stock in body["stocks"]] == ["BMRI"]
+
+    def test_export_and_batch_span_shards(self, client, shards, many_stocks):
+        """Test fan-out reads: export, batch and portfolio valuation"""
+        exported = client.get("/stocks/export").json()["stocks"]
+        tickers = sorted(stock["ticker"] for stock in many_stocks)
+        assert [stock["ticker"] for stock in exported] == tickers
+
+        body = client.get("/stocks/batch?tickers=X001,BBCA,TLKM,NOPE").json()
+        assert [stock["ticker"] for stock in body["stocks"]] == ["X001", "BBCA", "TLKM"]
+        assert body["missing"] == ["NOPE"]
+
+        value = client.post("/portfolio/value", json={"BBCA": 2, "TLKM": 1}).json()
+        assert value["total_value"] == 2 * 8500.0 + 3200.0
+
+    def test_sector_summary_combines_shards(self, client, shards, many_stocks):
+        """Test per-shard sector summaries add up"""
+        sectors = {
+            s["sector"]: s
+            for s in client.get("/stocks/sectors/summary").json()["sectors"]
+        }
+        assert sectors["Banking"]["stock_count"] == 3
+        assert sectors["Banking"]["min_price"] == 4800.0
+        assert sectors["Banking"]["max_price"] == 8500.0
+        assert sectors["Mining"]["stock_count"] == 30
+        assert sectors["Mining"]["average_price"] is None
+
+    def test_rename_across_shards_moves_stock(self, client, shards, sample_stock_data):
+        """Test a rename to another shard's ticker moves the row there"""
+        created = client.post("/stocks/", json=sample_stock_data)
+        other = next(
+            f"B{n}" for n in range(100) if not shards.same_shard("BBCA", f"B{n}")
+        )
+        response = client.patch(
+            "/stocks/BBCA",
+            json={"ticker": other.lower(), "current_price": 9000.0},
+            headers={"If-Match": created.headers["ETag"]},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["ticker"] == other
+        assert response.json()["id"] == created.json()["id"]
+        assert response.headers["ETag"] != created.headers["ETag"]
+
+        assert tickers_on(shards, shards.shard_of(other)) == [other]
+        assert tickers_on(shards, shards.shard_of("BBCA")) == []
+        assert client.get("/stocks/BBCA").status_code == 404
+        assert client.get(f"/stocks/{other}").json()["current_price"] == 9000.0
+        banking = client.get("/stocks/sectors/summary").json()["sectors"][0]
+        assert banking["stock_count"] == 1
+        assert banking["max_price"] == 9000.0
+
+    def test_failed_move_keeps_stock(self, client, shards, sample_stock_data):
+        """Test a move onto a taken ticker or a stale ETag changes nothing"""
+        created = client.post("/stocks/", json=sample_stock_data)
+        other = next(
+            f"B{n}" for n in range(100) if not shards.same_shard("BBCA", f"B{n}")
+        )
+        client.post("/stocks/", json={**sample_stock_data, "ticker": other})
+
+        response = client.patch("/stocks/BBCA", json={"ticker": other})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = client.patch(
+            "/stocks/BBCA",
+            json={"ticker": other},
+            headers={"If-Match": '"' + "0" * 32 + '-1"'},
+        )
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+        assert client.get("/stocks/BBCA").headers["ETag"] == created.headers["ETag"]
+        assert tickers_on(shards, shards.shard_of("BBCA")) == ["BBCA"]
+        assert tickers_on(shards, shards.shard_of(other)) == [other]
+
+    def test_change_feed_unavailable(self, client, shards):
+        """Test features needing one change order report 501"""
+        assert client.get("/stocks/changes").status_code == 501
+        assert client.get("/stocks/BBCA?wait=1").status_code == 501
+        assert client.get("/stocks/movers").status_code == 501
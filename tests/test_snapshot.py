@@ -0,0 +1,93 @@
+"""
+Tests for the columnar stock snapshots
+"""
+
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.utils.snapshot as snapshot_module
+from app.core.settings import settings
+from app.models.generate_data import generate_dataset
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+@pytest.fixture
+def dataset(engine, tmp_path, monkeypatch):
+    """Small dataset with price history, snapshots written to a temp dir"""
+    monkeypatch.setattr(settings, "snapshot_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "snapshot_chunk_rows", 16)
+    return generate_dataset(engine, stocks=40, history_days=3, seed=7)
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Count snapshot builds"""
+    calls = []
+    write_snapshot = snapshot_module.write_snapshot
+
+    def counting_write(session, table, fmt, path):
+        calls.append((table, fmt))
+        write_snapshot(session, table, fmt, path)
+
+    monkeypatch.setattr(snapshot_module, "write_snapshot", counting_write)
+    return calls
+
+
+@pytest.mark.integration
+class TestSnapshotEndpoint:
+    """Test cases for GET /stocks/snapshot.{fmt}"""
+
+    def test_parquet_stocks(self, client: TestClient, dataset):
+        """Test the Parquet snapshot holds every stock with a dictionary sector"""
+        response = client.get("/stocks/snapshot.parquet")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/vnd.apache.parquet"
+        table = pq.read_table(io.BytesIO(response.content))
+        assert table.num_rows == dataset["stocks"]
+        assert pa.types.is_dictionary(table.schema.field("sector").type)
+        tickers = table.column("ticker").to_pylist()
+        assert tickers == sorted(tickers)
+
+    def test_arrow_prices(self, client: TestClient, dataset):
+        """Test the price history as an Arrow IPC file"""
+        response = client.get("/stocks/snapshot.arrow?table=prices")
+
+        table = pa.ipc.open_file(response.content).read_all()
+        assert table.num_rows == dataset["stock_price"]
+        assert table.column_names == ["ticker", "price", "recorded_at"]
+
+    def test_reused_until_stocks_change(
+        self, client: TestClient, dataset, builds, sample_stock_data
+    ):
+        """Test repeat downloads serve the cached file until a write lands"""
+        first = client.get("/stocks/snapshot.parquet")
+        second = client.get("/stocks/snapshot.parquet")
+        assert builds == [("stocks", "parquet")]
+        assert first.headers["etag"] == second.headers["etag"]
+
+        client.post("/stocks/", json=sample_stock_data)
+        third = client.get("/stocks/snapshot.parquet")
+
+        assert len(builds) == 2
+        assert third.headers["etag"] != first.headers["etag"]
+        assert pq.read_table(io.BytesIO(third.content)).num_rows == 41
+
+    def test_stale_versions_are_removed(
+        self, client: TestClient, dataset, sample_stock_data, tmp_path
+    ):
+        """Test only the current and previous snapshot stay on disk"""
+        client.get("/stocks/snapshot.parquet")
+        for ticker in ("AAA1", "AAA2"):
+            client.post("/stocks/", json={**sample_stock_data, "ticker": ticker})
+            client.get("/stocks/snapshot.parquet")
+
+        assert len(list(tmp_path.glob("stocks-*.parquet"))) == 2
+
+    def test_unknown_format(self, client: TestClient):
+        """Test formats other than parquet/arrow are rejected"""
+        assert client.get("/stocks/snapshot.csv").status_code == 422
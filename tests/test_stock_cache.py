@@ -0,0 +1,185 @@
+"""
+Tests for the per-worker stock cache and its change log invalidation
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.models.database import StockChange, Stocks
+from app.utils.change_log import (
+    ALL_TICKERS,
+    latest_change_seq,
+    prune_stock_changes,
+    record_stock_change,
+)
+from app.utils.stock_cache import (
+    StockCache,
+    get_prices_cached,
+    get_stock_cached,
+    get_stocks_cached,
+    stock_cache,
+)
+from app.utils.stock_store import CompactStock, load_compact_stocks
+
+
+def _other_worker_update(session: Session, ticker: str, price: float):
+    """Write to the DB the way another worker would: no local invalidation"""
+    stock = session.exec(select(Stocks).where(Stocks.ticker == ticker)).one()
+    stock.current_price = price
+    session.add(stock)
+    record_stock_change(session, ticker)
+    session.commit()
+
+
+@pytest.mark.unit
+class TestStockCache:
+    """Test cases for the StockCache class"""
+
+    def test_put_and_get(self):
+        """Test a value put under the current token is returned"""
+        cache = StockCache(max_entries=10, ttl=60, poll_interval=0)
+        cache.put("BBCA", "value", cache.token())
+        assert cache.get("BBCA") == "value"
+
+    def test_stale_token_is_dropped(self):
+        """Test values read before an invalidation are not cached"""
+        cache = StockCache(max_entries=10, ttl=60, poll_interval=0)
+        token = cache.token()
+        cache.invalidate("BBCA")
+        cache.put("BBCA", "old", token)
+        assert cache.get("BBCA") is None
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first"""
+        cache = StockCache(max_entries=2, ttl=60, poll_interval=0)
+        for ticker in ("A", "B"):
+            cache.put(ticker, ticker, cache.token())
+        cache.get("A")
+        cache.put("C", "C", cache.token())
+        assert cache.get("B") is None
+        assert cache.get("A") == "A"
+
+    def test_ttl_expiry(self):
+        """Test expired entries are not returned"""
+        cache = StockCache(max_entries=10, ttl=0, poll_interval=0)
+        cache.put("BBCA", "value", cache.token())
+        assert cache.get("BBCA") is None
+
+
+@pytest.mark.unit
+class TestCompactStock:
+    """Test cases for the compact cached stock representation"""
+
+    def test_round_trip(self, session: Session):
+        """Test a compact stock gives back the same response as the row"""
+        row = Stocks(
+            ticker="BBCA", name="Bank Central Asia", sector="Banking", description="x"
+        )
+        session.add(row)
+        session.commit()
+
+        stock = CompactStock.from_stock(row)
+        assert not hasattr(stock, "__dict__")
+        response = stock.to_response()
+        assert response.model_dump() == row.model_dump(exclude={"stockFrom", "version"})
+        assert response.version == row.version
+
+    def test_sectors_are_shared(self, session: Session):
+        """Test stocks of one sector reference a single sector string"""
+        for ticker in ("BBCA", "BMRI"):
+            session.add(Stocks(ticker=ticker, name=ticker, sector="Banking"))
+        session.commit()
+
+        first, second = load_compact_stocks(session, ["BBCA", "BMRI"])
+        assert first.sector is second.sector
+
+    def test_description_loaded_on_demand(self, session: Session):
+        """Test stocks cached by a price lookup get their description later"""
+        stock_cache.reset()
+        session.add(Stocks(ticker="BBCA", name="BCA", current_price=1, description="d"))
+        session.commit()
+
+        assert get_prices_cached(session, ["BBCA"]) == {"BBCA": 1}
+        assert not stock_cache.get("BBCA").description_loaded
+        assert get_stocks_cached(session, ["BBCA"])["BBCA"].description == "d"
+        assert get_stock_cached(session, "BBCA").description == "d"
+
+    def test_deleted_before_description_loaded(self, session: Session):
+        """Test a stock deleted before its description loads is dropped, not served"""
+        stock_cache.reset()
+        session.add(Stocks(ticker="BBCA", name="BCA", current_price=1))
+        session.commit()
+        get_prices_cached(session, ["BBCA"])
+        session.delete(session.exec(select(Stocks)).one())
+        session.commit()
+
+        assert get_stocks_cached(session, ["BBCA"]) == {}
+        assert stock_cache.get("BBCA") is None
+
+
+@pytest.mark.integration
+class TestCrossWorkerInvalidation:
+    """Test cases for invalidation through the stock_changes log"""
+
+    @pytest.fixture(autouse=True)
+    def _poll_every_read(self, monkeypatch):
+        stock_cache.reset()
+        monkeypatch.setattr(stock_cache, "poll_interval", 0)
+
+    def test_change_log_evicts_entry(self, session: Session):
+        """Test a write recorded by another worker evicts the cached stock"""
+        session.add(Stocks(ticker="BBCA", name="Bank Central Asia", current_price=1))
+        session.commit()
+        assert get_stock_cached(session, "BBCA").current_price == 1
+
+        _other_worker_update(session, "BBCA", 2)
+        assert get_stock_cached(session, "bbca").current_price == 2
+
+    def test_bulk_change_clears_cache(self, session: Session):
+        """Test a '*' change drops every cached stock"""
+        session.add(Stocks(ticker="BBCA", name="Bank Central Asia"))
+        session.commit()
+        get_stock_cached(session, "BBCA")
+
+        record_stock_change(session, ALL_TICKERS)
+        session.commit()
+        stock_cache.sync(session)
+        assert stock_cache.get("BBCA") is None
+
+    def test_without_polling_entry_is_served_from_cache(
+        self, session: Session, monkeypatch
+    ):
+        """Test reads between polls are served from memory"""
+        session.add(Stocks(ticker="BBCA", name="Bank Central Asia", current_price=1))
+        session.commit()
+        get_stock_cached(session, "BBCA")
+
+        monkeypatch.setattr(stock_cache, "poll_interval", 3600)
+        _other_worker_update(session, "BBCA", 2)
+        assert get_stock_cached(session, "BBCA").current_price == 1
+
+    def test_local_writes_invalidate_immediately(
+        self, client: TestClient, sample_stock_data, monkeypatch
+    ):
+        """Test PATCH in this worker is visible without waiting for a poll"""
+        monkeypatch.setattr(stock_cache, "poll_interval", 3600)
+        client.post("/stocks/", json=sample_stock_data)
+        client.get("/stocks/BBCA")
+        client.patch("/stocks/BBCA", json={"current_price": 9999.0})
+        assert client.get("/stocks/BBCA").json()["current_price"] == 9999.0
+
+        client.delete("/stocks/BBCA")
+        assert client.get("/stocks/BBCA").status_code == 404
+
+    def test_prune_keeps_sequence_monotonic(self, session: Session):
+        """Test pruning the whole log never reuses sequence numbers"""
+        record_stock_change(session, "BBCA")
+        session.commit()
+        seq = latest_change_seq(session)
+
+        prune_stock_changes(session, retention=-1)
+        session.commit()
+        session.add(StockChange(ticker="BMRI"))
+        session.commit()
+        assert latest_change_seq(session) > seq
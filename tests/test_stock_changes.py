@@ -0,0 +1,264 @@
+"""
+Tests for the stock change log feed and watching a stock for changes
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.settings import settings
+from app.models.database import StockChange, Stocks
+from app.utils.change_log import (
+    DELETE,
+    UPDATE,
+    latest_change_seq,
+    prune_stock_changes,
+    record_stock_change,
+)
+from app.utils.change_notify import change_notifier
+
+
+@pytest.mark.integration
+class TestStockChangesEndpoint:
+    """Test cases for GET /stocks/changes"""
+
+    def test_writes_are_logged_in_order(self, client: TestClient, sample_stock_data):
+        """Test create, update, rename and delete appear with their data"""
+        client.post("/stocks/", json=sample_stock_data)
+        client.patch("/stocks/BBCA", json={"current_price": 9000.0})
+        client.patch("/stocks/BBCA", json={"ticker": "BCA"})
+        client.delete("/stocks/BCA")
+
+        body = client.get("/stocks/changes").json()
+        changes = [(c["op"], c["ticker"]) for c in body["changes"]]
+        assert changes == [
+            ("create", "BBCA"),
+            ("update", "BBCA"),
+            ("delete", "BBCA"),
+            ("update", "BCA"),
+            ("delete", "BCA"),
+        ]
+        assert body["changes"][1]["data"]["current_price"] == 9000.0
+        assert body["changes"][4]["data"] is None
+        seqs = [c["seq"] for c in body["changes"]]
+        assert seqs == sorted(seqs)
+        assert body["next_since"] == seqs[-1]
+
+    def test_since_and_limit_page_through(self, client: TestClient, sample_stocks_list):
+        """Test following next_since returns every change exactly once"""
+        for stock in sample_stocks_list:
+            client.post("/stocks/", json=stock)
+
+        seen, since = [], 0
+        while True:
+            body = client.get(f"/stocks/changes?since={since}&limit=2").json()
+            if not body["changes"]:
+                break
+            seen += [c["ticker"] for c in body["changes"]]
+            since = body["next_since"]
+        assert seen == [stock["ticker"] for stock in sample_stocks_list]
+
+    def test_empty_poll_returns_since(self, client: TestClient):
+        """Test a poll with nothing new returns no changes and the same cursor"""
+        body = client.get("/stocks/changes?since=7").json()
+        assert body == {"changes": [], "next_since": 7}
+
+    def test_long_poll_wakes_on_write(self, client: TestClient, sample_stock_data):
+        """Test a waiting request returns as soon as a stock is written"""
+        result = {}
+
+        def poll():
+            started = time.monotonic()
+            result["body"] = client.get("/stocks/changes?wait=10").json()
+            result["elapsed"] = time.monotonic() - started
+
+        poller = threading.Thread(target=poll)
+        poller.start()
+        time.sleep(0.2)
+        client.post("/stocks/", json=sample_stock_data)
+        poller.join()
+
+        assert [c["ticker"] for c in result["body"]["changes"]] == ["BBCA"]
+        assert result["elapsed"] < 5
+
+    def test_long_poll_times_out(self, client: TestClient, monkeypatch):
+        """Test the wait is capped and an empty page comes back"""
+        monkeypatch.setattr(settings, "stock_changes_max_wait", 0.2)
+        started = time.monotonic()
+        body = client.get("/stocks/changes?wait=60").json()
+
+        assert body["changes"] == []
+        assert time.monotonic() - started < 2
+
+    def test_pruned_history_is_gone(
+        self, client: TestClient, session: Session, sample_stocks_list, monkeypatch
+    ):
+        """Test 410 for a cursor behind retention when compaction is off"""
+        monkeypatch.setattr(settings, "stock_change_compact", False)
+        for stock in sample_stocks_list[:3]:
+            client.post("/stocks/", json=stock)
+        first = session.exec(select(StockChange).order_by(StockChange.seq)).first()
+        session.delete(first)
+        session.commit()
+
+        assert client.get("/stocks/changes?since=0").status_code == 410
+        assert client.get(f"/stocks/changes?since={first.seq}").status_code == 200
+
+    def test_expired_delete_is_gone(
+        self, client: TestClient, session: Session, sample_stocks_list
+    ):
+        """Test 410 with compaction for a cursor behind an expired delete"""
+        for stock in sample_stocks_list[:2]:
+            client.post("/stocks/", json=stock)
+        before = latest_change_seq(session)
+        client.delete(f"/stocks/{sample_stocks_list[0]['ticker']}")
+        deleted = latest_change_seq(session)
+        old = datetime.now(timezone.utc) - timedelta(days=30)
+        for change in session.exec(select(StockChange)).all():
+            change.changed_at = old
+            session.add(change)
+        session.commit()
+
+        prune_stock_changes(session, retention=3600, compact=True)
+        session.commit()
+        assert DELETE not in session.exec(select(StockChange.op)).all()
+
+        response = client.get(f"/stocks/changes?since={before}")
+        assert response.status_code == 410
+        assert client.get(f"/stocks/changes?since={deleted}").status_code == 200
+
+
+@pytest.mark.unit
+class TestChangeRetention:
+    """Test cases for compacting the change log"""
+
+    def _log(
+        self, session: Session, *tickers: str, age: float = 7200, op: str = UPDATE
+    ):
+        changed_at = datetime.now(timezone.utc) - timedelta(seconds=age)
+        for ticker in tickers:
+            session.add(StockChange(ticker=ticker, op=op, changed_at=changed_at))
+        session.commit()
+
+    def test_compaction_keeps_latest_per_ticker(self, session: Session):
+        """Test superseded old rows go, each ticker's latest stays"""
+        self._log(session, "BBCA", "BMRI", "BBCA", "BBCA")
+        latest = latest_change_seq(session)
+
+        assert prune_stock_changes(session, retention=3600, compact=True) == 2
+        session.commit()
+        rows = session.exec(select(StockChange.ticker, StockChange.seq)).all()
+        assert sorted(rows) == [("BBCA", latest), ("BMRI", 2)]
+
+    def test_compaction_expires_deletes(self, session: Session):
+        """Test a deleted ticker's delete is kept until tombstone retention"""
+        self._log(session, "BBCA", "BMRI", age=90_000)
+        self._log(session, "BBCA", age=90_000, op=DELETE)
+        self._log(session, "BMRI", age=7200, op=DELETE)
+
+        assert (
+            prune_stock_changes(
+                session, retention=3600, compact=True, tombstone_retention=86400
+            )
+            == 3
+        )
+        session.commit()
+        rows = session.exec(select(StockChange.ticker, StockChange.op)).all()
+        assert rows == [("BMRI", DELETE)]
+
+    def test_recent_rows_are_kept(self, session: Session):
+        """Test rows younger than retention are never compacted"""
+        self._log(session, "BBCA", "BBCA", age=0)
+
+        assert prune_stock_changes(session, retention=3600, compact=True) == 0
+
+    def test_without_compaction_old_rows_are_deleted(self, session: Session):
+        """Test plain retention deletes every old row"""
+        self._log(session, "BBCA", "BMRI")
+
+        assert prune_stock_changes(session, retention=3600, compact=False) == 2
+
+
+@pytest.mark.integration
+class TestWatchStock:
+    """Test cases for GET /stocks/{ticker}?wait=&since_version="""
+
+    @pytest.fixture
+    def watched(self, client: TestClient, sample_stock_data) -> int:
+        """Create BBCA and return its current version"""
+        client.post("/stocks/", json=sample_stock_data)
+        response = client.get("/stocks/BBCA?wait=0")
+        return int(response.headers["X-Stock-Version"])
+
+    def _watch_in_thread(self, client: TestClient, url: str) -> tuple:
+        result = {}
+
+        def watch():
+            started = time.monotonic()
+            result["response"] = client.get(url)
+            result["elapsed"] = time.monotonic() - started
+
+        thread = threading.Thread(target=watch)
+        thread.start()
+        time.sleep(0.2)
+        return thread, result
+
+    def test_returns_when_stock_changes(self, client: TestClient, watched: int):
+        """Test a watcher gets the new row as soon as it is written"""
+        thread, result = self._watch_in_thread(
+            client, f"/stocks/BBCA?wait=10&since_version={watched}"
+        )
+        client.patch("/stocks/BBCA", json={"current_price": 9100.0})
+        thread.join()
+
+        response = result["response"]
+        assert response.json()["current_price"] == 9100.0
+        assert int(response.headers["X-Stock-Version"]) > watched
+        assert result["elapsed"] < 5
+
+    def test_other_tickers_do_not_wake(
+        self, client: TestClient, watched: int, monkeypatch
+    ):
+        """Test writes to other stocks leave the watcher parked until timeout"""
+        monkeypatch.setattr(settings, "stock_changes_max_wait", 0.6)
+        thread, result = self._watch_in_thread(
+            client, f"/stocks/BBCA?wait=10&since_version={watched}"
+        )
+        client.post("/stocks/", json={"ticker": "BMRI", "name": "Bank Mandiri"})
+        thread.join()
+
+        response = result["response"]
+        assert response.headers["X-Stock-Version"] == str(watched)
+        assert result["elapsed"] >= 0.5
+
+    def test_sees_writes_from_other_workers(
+        self, client: TestClient, session: Session, watched: int, monkeypatch
+    ):
+        """Test a change only visible in stock_changes wakes the watcher"""
+        monkeypatch.setattr(change_notifier, "poll_interval", 0.05)
+        thread, result = self._watch_in_thread(
+            client, f"/stocks/BBCA?wait=10&since_version={watched}"
+        )
+        stock = session.exec(select(Stocks).where(Stocks.ticker == "BBCA")).one()
+        stock.current_price = 1.0
+        session.add(stock)
+        record_stock_change(session, "BBCA", UPDATE, stock)
+        session.commit()
+        thread.join()
+
+        assert result["response"].json()["current_price"] == 1.0
+        assert result["elapsed"] < 5
+
+    def test_deleted_while_watching(self, client: TestClient, watched: int):
+        """Test a watcher gets 404 when the stock is deleted"""
+        thread, result = self._watch_in_thread(
+            client, f"/stocks/BBCA?wait=10&since_version={watched}"
+        )
+        client.delete("/stocks/BBCA")
+        thread.join()
+
+        assert result["response"].status_code == 404
@@ -260,3 +260,116 @@ class TestDeleteStock:
         # Delete with lowercase ticker
         response = client.delete("/stocks/bbca")
         assert response.status_code == 204
+
+
+@pytest.mark.integration
+class TestGetStocksBatch:
+    """Test cases for GET /stocks/batch"""
+
+    def test_batch_in_requested_order(self, client: TestClient, sample_stocks_list):
+        """Test stocks come back in the order they were requested"""
+        for stock in sample_stocks_list:
+            client.post("/stocks/", json=stock)
+
+        response = client.get("/stocks/batch?tickers=TLKM,bbca,BMRI")
+        assert response.status_code == 200
+        data = response.json()
+        assert [s["ticker"] for s in data["stocks"]] == ["TLKM", "BBCA", "BMRI"]
+        assert data["missing"] == []
+
+    def test_batch_reports_missing(self, client: TestClient, sample_stock_data):
+        """Test unknown tickers are listed as missing"""
+        client.post("/stocks/", json=sample_stock_data)
+        data = client.get("/stocks/batch?tickers=BBCA,NOPE").json()
+        assert [s["ticker"] for s in data["stocks"]] == ["BBCA"]
+        assert data["missing"] == ["NOPE"]
+
+    def test_batch_repeated_param_and_duplicates(
+        self, client: TestClient, sample_stocks_list
+    ):
+        """Test repeated params are merged and duplicates collapsed"""
+        for stock in sample_stocks_list:
+            client.post("/stocks/", json=stock)
+
+        data = client.get("/stocks/batch?tickers=BBCA,ASII&tickers=bbca").json()
+        assert [s["ticker"] for s in data["stocks"]] == ["BBCA", "ASII"]
+
+    def test_batch_sees_updates(self, client: TestClient, sample_stock_data):
+        """Test cached entries shared with GET /stocks/{ticker} stay fresh"""
+        client.post("/stocks/", json=sample_stock_data)
+        client.get("/stocks/batch?tickers=BBCA")
+        client.patch("/stocks/BBCA", json={"current_price": 1.0})
+        data = client.get("/stocks/batch?tickers=BBCA").json()
+        assert data["stocks"][0]["current_price"] == 1.0
+
+    def test_batch_requires_tickers(self, client: TestClient):
+        """Test the tickers parameter is required"""
+        assert client.get("/stocks/batch").status_code == 422
+
+    def test_batch_too_many_tickers(self, client: TestClient):
+        """Test the per-request ticker limit"""
+        tickers = ",".join(f"T{i}" for i in range(1001))
+        assert client.get(f"/stocks/batch?tickers={tickers}").status_code == 422
+
+
+@pytest.mark.integration
+class TestConditionalRequests:
+    """Test cases for ETag / If-Match optimistic concurrency"""
+
+    def test_etag_changes_with_each_update(self, client: TestClient, sample_stock_data):
+        """Test GET, POST and PATCH return the current version's ETag"""
+        created = client.post("/stocks/", json=sample_stock_data)
+        assert client.get("/stocks/BBCA").headers["ETag"] == created.headers["ETag"]
+
+        updated = client.patch("/stocks/BBCA", json={"current_price": 1.0})
+        assert updated.headers["ETag"] != created.headers["ETag"]
+        assert client.get("/stocks/BBCA").headers["ETag"] == updated.headers["ETag"]
+        assert "version" not in updated.json()
+
+    def test_stale_if_match_gets_412(self, client: TestClient, sample_stock_data):
+        """Test the second of two writers holding the same ETag is rejected"""
+        etag = client.post("/stocks/", json=sample_stock_data).headers["ETag"]
+
+        first = client.patch(
+            "/stocks/BBCA", json={"current_price": 1.0}, headers={"If-Match": etag}
+        )
+        second = client.patch(
+            "/stocks/BBCA", json={"current_price": 2.0}, headers={"If-Match": etag}
+        )
+        assert first.status_code == 200
+        assert second.status_code == 412
+        assert client.get("/stocks/BBCA").json()["current_price"] == 1.0
+
+        response = client.delete("/stocks/BBCA", headers={"If-Match": etag})
+        assert response.status_code == 412
+        response = client.delete(
+            "/stocks/BBCA", headers={"If-Match": first.headers["ETag"]}
+        )
+        assert response.status_code == 204
+
+    def test_if_match_any_or_unknown_ticker(
+        self, client: TestClient, sample_stock_data
+    ):
+        """Test If-Match: * matches any version and a missing stock is still 404"""
+        client.post("/stocks/", json=sample_stock_data)
+
+        response = client.patch(
+            "/stocks/BBCA", json={"name": "BCA"}, headers={"If-Match": "*"}
+        )
+        assert response.status_code == 200
+        response = client.patch(
+            "/stocks/NOPE", json={"name": "x"}, headers={"If-Match": '"junk"'}
+        )
+        assert response.status_code == 404
+
+    def test_malformed_if_match_never_matches(
+        self, client: TestClient, sample_stock_data
+    ):
+        """Test weak or foreign tags fail the precondition"""
+        etag = client.post("/stocks/", json=sample_stock_data).headers["ETag"]
+
+        for header in (f"W/{etag}", '"not-an-etag"'):
+            response = client.patch(
+                "/stocks/BBCA", json={"name": "x"}, headers={"If-Match": header}
+            )
+            assert response.status_code == 412
@@ -3,12 +3,16 @@ Tests for utility functions
 """
 
 import pytest
+from sqlalchemy import event
 from sqlmodel import Session
 from fastapi import HTTPException
 from app.utils.stock_helpers import (
     normalize_ticker,
     get_stock_or_404,
     check_ticker_exists,
+    delete_stock_row,
+    insert_stock,
+    update_stock_row,
 )
 from app.utils.pagination import PaginationParams
 from app.models.database import Stocks
@@ -160,3 +164,87 @@ class TestPaginationParams:
 
         with pytest.raises(Exception):  # Pydantic validation error
             PaginationParams(page=1, page_size=101)  # Exceeds max limit
+
+
+@pytest.mark.unit
+class TestConditionalWrites:
+    """Test cases for the single-statement write helpers"""
+
+    @pytest.fixture
+    def statements(self, engine):
+        """Collect the SQL statements sent to the database"""
+        sent = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            sent.append(statement.split()[0].upper())
+
+        event.listen(engine, "before_cursor_execute", record)
+        yield sent
+        event.remove(engine, "before_cursor_execute", record)
+
+    def test_insert_duplicate_raises_400(self, session: Session):
+        """Test a conflicting insert maps to 400 instead of an IntegrityError"""
+        session.add(Stocks(ticker="BBCA", name="Bank Central Asia"))
+        session.commit()
+
+        with pytest.raises(HTTPException) as exc_info:
+            insert_stock(session, {"ticker": "BBCA", "name": "Duplicate"})
+        assert exc_info.value.status_code == 400
+
+    def test_update_name_is_one_stock_statement(self, session: Session, statements):
+        """Test an update not touching sector/price reads nothing first"""
+        session.add(Stocks(ticker="BBCA", name="Bank Central Asia"))
+        session.commit()
+        statements.clear()
+
+        updated = update_stock_row(session, "BBCA", {"name": "BCA"})
+        assert updated.name == "BCA"
+        # BEGIN IMMEDIATE on SQLite (begin_write)
+        assert statements[:2] == ["BEGIN", "UPDATE"]
+        assert "SELECT" not in statements
+
+    def test_price_update_takes_write_lock_first(self, session: Session, statements):
+        """Test the old-value read runs inside an IMMEDIATE write transaction"""
+        session.add(Stocks(ticker="BBCA", name="Bank Central Asia"))
+        session.commit()
+        statements.clear()
+
+        update_stock_row(session, "BBCA", {"current_price": 9000.0})
+        assert statements[:2] == ["BEGIN", "SELECT"]
+
+    def test_update_missing_raises_404(self, session: Session):
+        """Test updating a missing ticker maps to 404"""
+        with pytest.raises(HTTPException) as exc_info:
+            update_stock_row(session, "NOPE", {"name": "x"})
+        assert exc_info.value.status_code == 404
+
+    def test_rename_conflict_keeps_transaction_usable(self, session: Session):
+        """Test a rename onto an existing ticker fails without aborting the session"""
+        session.add(Stocks(ticker="BBCA", name="Bank Central Asia"))
+        session.add(Stocks(ticker="BMRI", name="Bank Mandiri"))
+        session.commit()
+
+        with pytest.raises(HTTPException) as exc_info:
+            update_stock_row(session, "BMRI", {"ticker": "BBCA"})
+        assert exc_info.value.status_code == 400
+        assert update_stock_row(session, "BMRI", {"name": "Mandiri"}).name == "Mandiri"
+
+    def test_rename_is_not_committed_early(self, session: Session):
+        """Test a rename's savepoint does not commit it ahead of the caller"""
+        session.add(Stocks(ticker="BMRI", name="Bank Mandiri"))
+        session.commit()
+
+        update_stock_row(session, "BMRI", {"ticker": "BMRX"})
+        session.rollback()
+        assert check_ticker_exists(session, "BMRI") is True
+        assert check_ticker_exists(session, "BMRX") is False
+
+    def test_delete_is_one_stock_statement(self, session: Session, statements):
+        """Test delete does not look the stock up before deleting it"""
+        session.add(Stocks(ticker="BBCA", name="Bank Central Asia"))
+        session.commit()
+        statements.clear()
+
+        delete_stock_row(session, "BBCA")
+        assert statements[0] == "DELETE"
+        assert check_ticker_exists(session, "BBCA") is False